@@ -1,15 +1,102 @@
-from MonteCarloTreeSearch import MonteCarlo, Node
+import threading
+import time
+
+from MonteCarloTreeSearch import ArrayMonteCarlo, Node, TranspositionTable
+from Agent.CacheDecisioni import CacheDecisioni
+from Agent.Configurazione import CONFIGURAZIONE_PREDEFINITA
 from Agent.GameState import ScopaGameState
+from Agent.RicercaParallela import cerca_in_parallelo
+from Agent.RisolutoreFinale import RisolutoreFinale
+from GameEngine import Maschera, Simmetria
 
 
 class AgenteMonteCarlo:
-    def __init__(self, giocatore):
+    def __init__(self, giocatore, avversario=None, configurazione=CONFIGURAZIONE_PREDEFINITA, processi=None,
+                 cache_decisioni=None, **parametri):
         """
         Inizializza l'agente Monte Carlo per il giocatore.
 
+        Tutti i parametri dell'agente (limiti della ricerca, esplorazione, policy e pesi delle
+        euristiche) stanno nella configurazione; quelli passati per nome la modificano. La
+        ricerca si ferma al primo dei limiti raggiunti tra iterazioni, tempo e nodi; con
+        iterazioni=None e un tempo per mossa la latenza di ogni scelta è fissata dal tempo.
+
         :param giocatore: L'istanza del giocatore a cui appartiene l'agente
+        :param avversario: L'istanza del giocatore avversario, di cui l'agente osserva solo le
+            informazioni pubbliche (carte raccolte, scope e numero di carte in mano)
+        :param configurazione: La ConfigurazioneAgente da usare
+        :param processi: Se indicato, ogni scelta esegue una ricerca indipendente (con i limiti
+            della configurazione) in ciascuno di questi processi e ne unisce le statistiche della radice
+        :param cache_decisioni: CacheDecisioni, o percorso del suo file, da cui far partire le
+            ricerche dalle posizioni già cercate e in cui salvarne le statistiche della radice
+            (non con processi: le ricerche nei processi partono sempre da un albero vuoto)
+        :param parametri: Campi della configurazione da cambiare (ad esempio iterazioni=None,
+            tempo_per_mossa=0.5)
         """
         self.giocatore = giocatore
+        self.avversario = avversario
+        self.configurazione = configurazione.modifica(**parametri) if parametri else configurazione
+        self.processi = processi
+        if processi and cache_decisioni is not None:
+            raise ValueError("La cache delle decisioni non si può usare con la ricerca in più processi")
+        if isinstance(cache_decisioni, str):
+            cache_decisioni = CacheDecisioni.condivisa(cache_decisioni)
+        self.cache_decisioni = cache_decisioni
+
+        # Statistiche delle ricerche: l'ultima scelta (iterazioni, secondi, iterazioni risparmiate
+        # dall'arresto anticipato e, con la tabella delle trasposizioni, ricerche e stati trovati
+        # nella tabella; con la cache delle decisioni, se la posizione c'era e con quante visite)
+        # e i totali del round
+        self.ultima_ricerca = {'iterazioni': 0, 'tempo': 0., 'iterazioni_risparmiate': 0}
+        self.mosse = 0
+        self.iterazioni_totali = 0
+        self.tempo_totale = 0.
+        self.iterazioni_risparmiate_totali = 0
+
+        # Ultimo ad aver fatto una presa nel round (0 l'agente, 1 l'avversario), ricavato
+        # confrontando le carte raccolte tra una mossa e la successiva
+        self.ultimo_presa = None
+        self._num_raccolte = (0, 0)
+
+        # Risolutore esatto per l'ultima mano, con la sua tabella delle trasposizioni
+        self.risolutore_finale = RisolutoreFinale()
+
+        # Albero della ricerca precedente, tenuto per riusarlo alla mossa successiva, e quanto
+        # serve per riconoscere le mosse giocate da allora: (tavolo, raccolte dell'agente,
+        # raccolte dell'avversario, carta giocata) al momento della scelta
+        self.mcts = None
+        self._ultima_scelta = None
+        self.visite_ereditate = 0  # Visite ereditate dall'albero precedente nell'ultima scelta
+        self.visite_ereditate_totali = 0
+        self._velocita_ricerca = 0.  # Iterazioni al secondo dell'ultima ricerca
+
+        # Riflessione durante il turno dell'avversario: il thread che la esegue sull'albero in
+        # self.mcts, le iterazioni al secondo che ha ottenuto e se l'albero riusato nell'ultima
+        # scelta veniva da una riflessione
+        self._riflessione = None
+        self._velocita_riflessione = 0.
+        self._da_riflessione = False
+        self.iterazioni_riflessione_totali = 0
+
+    def _aggiorna_ultimo_presa(self):
+        """Aggiorna chi ha fatto l'ultima presa in base alle carte raccolte dall'ultima mossa"""
+        num_raccolte = (
+            len(self.giocatore.carte_raccolte),
+            len(self.avversario.carte_raccolte) if self.avversario is not None else 0
+        )
+
+        if num_raccolte[0] < self._num_raccolte[0] or num_raccolte[1] < self._num_raccolte[1]:
+            # Le carte raccolte sono state azzerate: è iniziato un nuovo round
+            self.ultimo_presa = None
+            self._num_raccolte = (0, 0)
+
+        # L'avversario muove dopo l'agente, quindi una sua presa è sempre la più recente
+        if num_raccolte[1] > self._num_raccolte[1]:
+            self.ultimo_presa = 1
+        elif num_raccolte[0] > self._num_raccolte[0]:
+            self.ultimo_presa = 0
+
+        self._num_raccolte = num_raccolte
 
     def scegli_mossa(self, tavolo):
         """
@@ -18,58 +105,438 @@ class AgenteMonteCarlo:
         :param tavolo: Lo stato attuale del tavolo di gioco
         :return: La carta da giocare scelta dall'agente
         """
-        # Creazione dello stato di gioco iniziale per l'MCTS
+        inizio = time.perf_counter()
+        self.ferma_riflessione()
+        self._aggiorna_ultimo_presa()
+        avversario = self.avversario
+
+        # Con una sola carta in mano la mossa è obbligata: nessuna ricerca
+        if self.configurazione.arresto_anticipato and len(self.giocatore.carte_mano) == 1:
+            self.mcts = None
+            self._ultima_scelta = None
+            self._registra_ricerca(0, inizio, self.configurazione.iterazioni or 0)
+            return self.giocatore.carte_mano[0]
+
+        # Creazione dello stato di gioco iniziale per l'MCTS: la mano dell'avversario e il
+        # mazzo sono nascosti e vengono estratti dalle carte non viste a ogni simulazione
         stato_iniziale = ScopaGameState(
             self.giocatore,
             tavolo,
             self.giocatore.carte_mano,
             self.giocatore.carte_raccolte,
-            []
+            avversario.carte_raccolte if avversario is not None else [],
+            num_carte_avversario=len(avversario.carte_mano) if avversario is not None else None,
+            scope_avversario=avversario.scope if avversario is not None else 0,
+            ultimo_presa=self.ultimo_presa,
+            configurazione=self.configurazione
         )
 
-        # Creazione del nodo radice per l'MCTS
-        root_node = Node(stato_iniziale)
-        root_node.player_number = 1  # Identifica il numero del giocatore
-        root_node.discovery_factor = 0.4  # Controlla il livello di esplorazione dell'algoritmo
+        # A mazzo finito le carte non viste sono tutte in mano all'avversario: il finale
+        # si risolve in modo esatto invece di simularlo
+        if avversario is not None and len(avversario.carte_mano) == Maschera.conta(stato_iniziale.non_viste):
+            self.mcts = None
+            self._ultima_scelta = None
+            carta = self._risolvi_finale(tavolo, stato_iniziale)
+            self._registra_ricerca(0, inizio)
+            return carta
 
-        # Inizializzazione dell'algoritmo MCTS
-        mcts = MonteCarlo(root_node)
+        if self.processi:
+            # Ricerche indipendenti nei processi del pool, unite sulle statistiche della radice
+            self.mcts = None
+            self._ultima_scelta = None
+            mossa, iterazioni = cerca_in_parallelo(self, stato_iniziale, self.processi)
+            self._registra_ricerca(iterazioni, inizio)
+            return Maschera.CARTE[mossa[0]]
 
-        # Imposta le funzioni personalizzate per trovare i figli e valutare i nodi
-        mcts.child_finder = self.child_finder
-        mcts.node_evaluator = self.node_evaluator
+        # Riparte dal sottoalbero delle mosse giocate da allora, se la ricerca precedente le aveva esplorate
+        mcts = self._riusa_albero(stato_iniziale)
+
+        cache = self.cache_decisioni
+        chiave_cache = None
+        if cache is not None and cache.da_salvare(stato_iniziale):
+            chiave_cache = cache.chiave(stato_iniziale, self.configurazione)
+
+        statistiche_cache, visite_cache, cercata = None, 0, False
+        if mcts is None:
+            mcts = self._nuova_ricerca(stato_iniziale)
+
+            # Una posizione già cercata riparte dalle statistiche della radice salvate nella cache
+            if chiave_cache is not None:
+                statistiche_cache = cache.cerca(*chiave_cache)
+                cercata = True
+                if statistiche_cache is not None:
+                    visite_cache = mcts.warm_start(statistiche_cache)
 
-        # Aumentiamo il numero di simulazioni per ottenere scelte più affidabili
-        mcts.simulate(1000)
+        # Simula fino al primo limite raggiunto tra iterazioni, tempo e nodi
+        configurazione = self.configurazione
+        budget_iterazioni, budget_tempo = configurazione.iterazioni, configurazione.tempo_per_mossa
+        if visite_cache and budget_iterazioni is not None:
+            # Le visite della cache contano nel budget: se bastano non serve cercare ancora
+            budget_iterazioni = max(budget_iterazioni - visite_cache, 0)
+        elif visite_cache and budget_tempo is not None and self._velocita_ricerca:
+            # Con solo un tempo per mossa le visite si convertono in secondi con la velocità
+            # dell'ultima ricerca, come per la riflessione
+            budget_tempo -= visite_cache / self._velocita_ricerca
+            if budget_tempo <= 0:
+                budget_iterazioni, budget_tempo = 0, None
+        if self._da_riflessione:
+            # Le visite ereditate dalla riflessione contano nel budget, convertite in secondi con
+            # la velocità della riflessione: la ricerca resta la stessa, ma è già in gran parte fatta
+            if budget_iterazioni is not None:
+                budget_iterazioni = max(budget_iterazioni - self.visite_ereditate, 1)
+            if budget_tempo is not None and self._velocita_riflessione:
+                budget_tempo = max(budget_tempo - self.visite_ereditate / self._velocita_riflessione, 0.)
+        visite_radice = mcts.tree.visits[0]
+        iterazioni = mcts.simulate(budget_iterazioni, budget_tempo, configurazione.nodi_per_mossa)
+        if iterazioni and mcts.elapsed:
+            self._velocita_ricerca = iterazioni / mcts.elapsed
 
         # Seleziona il miglior nodo risultante dalle simulazioni
         best_node = mcts.make_choice()
 
+        # Conserva l'albero per la prossima mossa
+        self.mcts = mcts
+        self._ultima_scelta = (
+            stato_iniziale.tavolo,
+            stato_iniziale.raccolte_giocatore,
+            stato_iniziale.raccolte_avversario,
+            best_node.move[0]
+        )
+
+        self._registra_ricerca(iterazioni, inizio, mcts.iterations_saved)
+
+        if chiave_cache is not None:
+            if iterazioni:
+                cache.salva(*chiave_cache, self._statistiche_radice(mcts, mcts.tree.visits[0] - visite_radice))
+            if cercata:
+                self.ultima_ricerca.update({'cache_trovata': statistiche_cache is not None, 'visite_cache': visite_cache})
+
+        tabella = mcts.transposition_table
+        if tabella is not None:
+            self.ultima_ricerca.update({
+                'trasposizioni_cercate': tabella.lookups,
+                'trasposizioni_trovate': tabella.hits,
+                'trasposizioni_scartate': tabella.evictions,
+                'frequenza_trasposizioni': tabella.hit_rate
+            })
+
         # Restituisce la carta selezionata come miglior mossa
-        return best_node.state.last_move[0]
+        return Maschera.CARTE[best_node.move[0]]
+
+    def _statistiche_radice(self, mcts, visite_nuove):
+        """
+        Statistiche (mossa, visite, valore) dei figli della radice da salvare nella cache delle
+        decisioni. Le visite si limitano a quelle di una ricerca completa con i limiti della
+        configurazione, stimate dalle visite per iterazione dell'ultima ricerca, riducendo in
+        proporzione visite e valori: se la ricerca non si accorcia per le visite della cache (con
+        solo un tempo per mossa e nessuna velocità nota, o con un limite di nodi) le visite
+        salvate non crescono a ogni ricerca della stessa posizione.
+
+        :param mcts: L'istanza MCTS dopo simulate
+        :param visite_nuove: Visite aggiunte alla radice da simulate
+        """
+        tree = mcts.tree
+        figli = tree.children(0)
+        configurazione = self.configurazione
+        limiti = []
+        if configurazione.iterazioni is not None:
+            limiti.append(configurazione.iterazioni)
+        if configurazione.tempo_per_mossa is not None:
+            limiti.append(int(self._velocita_ricerca * configurazione.tempo_per_mossa))
+        iterazioni_complete = max(min(limiti, default=mcts.iterations), mcts.iterations)
+
+        massimo = iterazioni_complete * visite_nuove / mcts.iterations
+        visite = sum(tree.visits[figlio] for figlio in figli)
+        riduzione = massimo / visite if visite > massimo else 1.
+        statistiche = []
+        for figlio in figli:
+            visite_figlio = round(tree.visits[figlio] * riduzione)
+            valore = tree.win_value[figlio] * visite_figlio / tree.visits[figlio] if tree.visits[figlio] else 0.
+            statistiche.append((tree.moves[figlio], visite_figlio, valore))
+        return statistiche
+
+    def _nuova_ricerca(self, stato, seme=None):
+        """
+        Prepara una nuova ricerca MCTS a partire dallo stato dato.
+
+        :param stato: Stato di gioco iniziale
+        :param seme: Seme del generatore casuale della ricerca (None per ricavarlo da random)
+        :return: L'istanza MCTS pronta per simulate
+        """
+        # Creazione del nodo radice per l'MCTS: i nodi memorizzano solo la mossa e
+        # rappresentano insiemi di informazione, comuni a tutte le determinizzazioni
+        root_node = Node(None)
+        root_node.player_number = 1 if stato.turno == 0 else 2  # Identifica il numero del giocatore di turno
+        root_node.discovery_factor = self.configurazione.esplorazione_radice  # Controlla il livello di esplorazione dell'algoritmo
+
+        # Inizializzazione dell'algoritmo MCTS, con l'albero memorizzato in array preallocati
+        mcts = ArrayMonteCarlo(root_node, stato, self.configurazione.capacita_albero, seme)
+
+        # I valori sono dal punto di vista dell'agente anche quando alla radice muove l'avversario
+        mcts.root_player_number = 1
+
+        # Imposta le funzioni personalizzate per trovare i figli e valutare i nodi
+        mcts.child_finder = self.child_finder
+        mcts.node_evaluator = self.node_evaluator
+
+        # Ogni simulazione parte da una diversa determinizzazione delle carte nascoste
+        mcts.determinizer = lambda montecarlo: montecarlo.state.determinizza(montecarlo.tree.random)
+
+        # Criteri di arresto anticipato della ricerca
+        mcts.stop_when_settled = self.configurazione.arresto_anticipato
+        mcts.confidence_delta = self.configurazione.confidenza
+
+        # Figli dei nodi aggiunti man mano che crescono le visite
+        mcts.widening_constant = self.configurazione.allargamento
+        mcts.widening_exponent = self.configurazione.allargamento_esponente
+
+        # Statistiche condivise tra i nodi che raggiungono lo stesso stato
+        if self.configurazione.trasposizioni:
+            mcts.transposition_table = TranspositionTable(self.configurazione.capacita_trasposizioni)
+            mcts.transposition_key = lambda montecarlo: montecarlo.state.chiave_trasposizione()
+
+        return mcts
+
+    def _registra_ricerca(self, iterazioni, inizio, risparmiate=0):
+        """Aggiorna le statistiche con le iterazioni e il tempo impiegati per l'ultima scelta"""
+        tempo = time.perf_counter() - inizio
+        self.ultima_ricerca = {'iterazioni': iterazioni, 'tempo': tempo, 'iterazioni_risparmiate': risparmiate}
+        self.mosse += 1
+        self.iterazioni_totali += iterazioni
+        self.tempo_totale += tempo
+        self.iterazioni_risparmiate_totali += risparmiate
+
+    def _riusa_albero(self, stato, risposta=True):
+        """
+        Ricava dalle carte sul tavolo e da quelle raccolte la mossa giocata dall'agente (con la
+        presa effettivamente fatta) e la risposta dell'avversario, poi riparte dal nodo dell'albero
+        precedente a cui portano. Il resto dell'albero viene scartato. Se l'albero viene da una
+        riflessione la sua radice è già il turno dell'avversario e si cerca solo la risposta.
+
+        :param stato: Stato di gioco iniziale della nuova scelta
+        :param risposta: False per fermarsi alla mossa dell'agente, quando lo stato è quello di
+            una riflessione con l'avversario di turno
+        :return: L'istanza MCTS con la nuova radice, o None se l'albero non è riutilizzabile
+        """
+        mcts, ultima_scelta = self.mcts, self._ultima_scelta
+        self.mcts = None
+        self._ultima_scelta = None
+        self.visite_ereditate = 0
+        self._da_riflessione = False
+
+        if mcts is None or ultima_scelta is None:
+            return None
+
+        tavolo, raccolte, raccolte_avversario, carta = ultima_scelta
+        if raccolte & ~stato.raccolte_giocatore or raccolte_avversario & ~stato.raccolte_avversario:
+            # Le carte raccolte sono diminuite: è iniziato un nuovo round
+            return None
+
+        if carta is None:
+            # Albero di una riflessione: alla radice muove l'avversario
+            nodo = mcts.root_node
+            tavolo_dopo = tavolo
+        else:
+            # Mossa dell'agente: le carte nuove tra le sue raccolte, tolta quella giocata, sono la presa
+            bit = 1 << carta
+            presa = stato.raccolte_giocatore & ~raccolte & ~bit
+            tavolo_dopo = tavolo & ~presa if presa else tavolo | bit
+            nodo = mcts.find_child(mcts.root_node, (carta, presa))
+
+        if not risposta:
+            if nodo is None or carta is None or nodo.player_number != 2:
+                return None
+            self.visite_ereditate = mcts.reroot(nodo, stato)
+            return mcts
+
+        # Mossa dell'avversario: una presa se le sue raccolte sono cresciute, altrimenti uno scarto
+        nuove_avversario = stato.raccolte_avversario & ~raccolte_avversario
+        if nuove_avversario:
+            carta_avversario = nuove_avversario & ~tavolo_dopo
+            presa_avversario = nuove_avversario & tavolo_dopo
+        else:
+            carta_avversario = stato.tavolo & ~tavolo_dopo
+            presa_avversario = 0
+
+        if Maschera.conta(carta_avversario) != 1:
+            return None
+
+        if nodo is not None:
+            nodo = mcts.find_child(nodo, (carta_avversario.bit_length() - 1, presa_avversario))
+        if nodo is None or nodo.player_number != 1:
+            return None
+
+        self.visite_ereditate = mcts.reroot(nodo, stato)
+        self.visite_ereditate_totali += self.visite_ereditate
+        self._da_riflessione = carta is None
+        return mcts
+
+    def rifletti(self, tavolo):
+        """
+        Mentre l'avversario sceglie la sua mossa, cerca in un thread in background a partire
+        dallo stato con l'avversario di turno, continuando il sottoalbero della mossa appena
+        giocata dall'agente se c'è. Alla scelta successiva scegli_mossa ferma la riflessione e
+        riparte dal nodo della risposta effettiva, le cui visite contano nel budget della
+        scelta: la ricerca è la stessa, ma in gran parte fatta mentre l'avversario pensava.
+
+        Non serve riflettere se la prossima mossa sarà obbligata o risolta in modo esatto, né
+        con le ricerche in più processi.
+
+        :param tavolo: Lo stato attuale del tavolo di gioco, con l'avversario di turno
+        """
+        self.ferma_riflessione()
+        self._aggiorna_ultimo_presa()
+        avversario = self.avversario
+
+        if self.processi or avversario is None or not avversario.carte_mano:
+            return
+        if self.configurazione.arresto_anticipato and len(self.giocatore.carte_mano) <= 1:
+            return
+
+        stato = ScopaGameState(
+            self.giocatore,
+            tavolo,
+            self.giocatore.carte_mano,
+            self.giocatore.carte_raccolte,
+            avversario.carte_raccolte,
+            num_carte_avversario=len(avversario.carte_mano),
+            scope_avversario=avversario.scope,
+            ultimo_presa=self.ultimo_presa,
+            configurazione=self.configurazione,
+            turno=1
+        )
+
+        # A mazzo finito, dopo la risposta dell'avversario il finale si risolve in modo esatto
+        if Maschera.conta(stato.non_viste) == len(avversario.carte_mano):
+            return
+
+        mcts = self._riusa_albero(stato, risposta=False)
+        if mcts is None:
+            mcts = self._nuova_ricerca(stato)
+
+        # Nessun arresto anticipato: la riflessione dura finché l'avversario non ha mosso (al più
+        # il tempo di riflessione della configurazione) e, ad albero pieno, continua ad
+        # aggiornare le statistiche dei nodi che ci sono
+        mcts.stop_when_settled = False
+        mcts.confidence_delta = None
+
+        self.mcts = mcts
+        self._ultima_scelta = (stato.tavolo, stato.raccolte_giocatore, stato.raccolte_avversario, None)
+        self._riflessione = threading.Thread(target=mcts.simulate,
+                                             args=(None, self.configurazione.tempo_riflessione),
+                                             daemon=True)
+        self._riflessione.start()
+
+    def ferma_riflessione(self):
+        """Ferma la riflessione in corso, se c'è, e ne ripristina i criteri di arresto della ricerca"""
+        if self._riflessione is None:
+            return
+
+        mcts = self.mcts
+        mcts.stop_requested = True
+        self._riflessione.join()
+        self._riflessione = None
+        mcts.stop_requested = False
+        mcts.stop_when_settled = self.configurazione.arresto_anticipato
+        mcts.confidence_delta = self.configurazione.confidenza
+
+        self.iterazioni_riflessione_totali += mcts.iterations
+        self._velocita_riflessione = mcts.iterations / mcts.elapsed if mcts.elapsed else 0.
+
+    def _risolvi_finale(self, tavolo, stato):
+        """
+        Sceglie la carta con il risolutore esatto dell'ultima mano.
+
+        :param tavolo: Lo stato attuale del tavolo di gioco
+        :param stato: Stato di gioco iniziale, con la mano dell'avversario ormai nota
+        :return: La carta da giocare scelta dall'agente
+        """
+        _, carta = self.risolutore_finale.scegli_carta(
+            (stato.mano, stato.non_viste),
+            (stato.raccolte_giocatore, stato.raccolte_avversario),
+            (stato.scope, stato.stato.scope[1]),
+            [c.indice for c in tavolo.carte],
+            0,
+            self.ultimo_presa
+        )
+        return Maschera.CARTE[carta]
 
     def child_finder(self, node, montecarlo):
         """
-        Genera tutti i possibili stati successivi (figli) a partire dal nodo corrente.
+        Aggiunge al nodo corrente i figli per le mosse legali nella determinizzazione corrente
+        che non sono ancora state aggiunte. In node.expansion_key si tiene la maschera delle
+        carte già espanse, così ogni carta viene espansa una volta sola. Con l'allargamento
+        progressivo (montecarlo.child_limit) aggiunge invece solo le prime mosse mancanti in
+        ordine di priorità, generate una alla volta. Con configurazione.simmetrie una mossa
+        equivalente per simmetria dei semi a una già aggiunta non viene aggiunta.
 
         :param node: Nodo corrente dell'albero di ricerca
         :param montecarlo: Istanza dell'algoritmo MCTS
         """
-        possible_moves = node.state.get_possible_moves()
-        for mossa in possible_moves:
-            nuovo_stato = node.state.move(mossa)
-            child = Node(nuovo_stato)
-            child.player_number = 3 - node.player_number  # Alterna il giocatore
+        stato = montecarlo.state  # Stato corrispondente al nodo corrente
+        simmetrie = self.configurazione.simmetrie
+
+        if montecarlo.child_limit is not None:
+            carte_nuove = 0
+            permutazioni = stato.simmetrie() if simmetrie else ()
+            presenti = {Simmetria.rappresentante(mossa, permutazioni) for mossa in node.child_moves}
+            mosse = []
+            for mossa in stato.mosse_per_priorita():
+                rappresentante = Simmetria.rappresentante(mossa, permutazioni)
+                if rappresentante not in presenti:
+                    presenti.add(rappresentante)
+                    mosse.append(mossa)
+                    if len(mosse) == montecarlo.child_limit:
+                        break
+        else:
+            carte_nuove = stato.stato.mani[stato.turno] & ~node.expansion_key
+            if not carte_nuove:
+                return
+            mosse = stato.get_possible_moves(carte_nuove)
+            permutazioni = stato.simmetrie() if simmetrie else ()
+
+            # Una carta non ancora espansa può avere già dei figli: quelli aggiunti dall'allargamento
+            # progressivo (ad esempio alla nuova radice di un albero riusato) o, con le simmetrie,
+            # quelli di una carta di cui una mossa equivalente era stata tolta. Non vanno ripetuti
+            presenti = set(node.child_moves)
+            if not permutazioni:
+                mosse = [mossa for mossa in mosse if mossa not in presenti]
+            else:
+                # Delle mosse equivalenti per simmetria dei semi se ne aggiunge una sola. Le carte
+                # con una mossa tolta perché equivalente non si segnano come espanse: in un'altra
+                # determinizzazione la mano di chi muove può non essere più simmetrica
+                rappresentanti = {Simmetria.rappresentante(mossa, permutazioni) for mossa in presenti}
+                nuove = []
+                for mossa in mosse:
+                    if mossa in presenti:
+                        continue
+                    rappresentante = Simmetria.rappresentante(mossa, permutazioni)
+                    if rappresentante in rappresentanti:
+                        carte_nuove &= ~(1 << mossa[0])
+                    else:
+                        rappresentanti.add(rappresentante)
+                        nuove.append(mossa)
+                mosse = nuove
+
+        for mossa in mosse:
+            stato.apply(mossa)
 
             # Valutazione della mossa tramite una funzione di policy
-            policy_value = self._calculate_policy_value(nuovo_stato, mossa)
-            child.policy_value = policy_value
+            policy_value = self._calculate_policy_value(stato, mossa)
 
             # Calcolo dinamico del discovery factor per la strategia di esplorazione
-            child.discovery_factor = self._calculate_discovery_factor(nuovo_stato)
+            discovery_factor = self._calculate_discovery_factor(stato)
 
-            # Aggiunge il nodo figlio all'albero di ricerca
-            node.add_child(child)
+            # Giocatore di turno dopo la mossa (1 l'agente, 2 l'avversario)
+            player_number = 1 if stato.turno == 0 else 2
+            stato.undo(mossa)
+
+            # Aggiunge il nodo figlio all'albero di ricerca; se l'albero è pieno le carte non si
+            # segnano come espanse, così le mosse mancanti si aggiungono a una visita successiva
+            if node.new_child(mossa, player_number, policy_value, discovery_factor) is None:
+                return
+
+        node.expansion_key |= carte_nuove
 
     def node_evaluator(self, node, montecarlo):
         """
@@ -79,7 +546,7 @@ class AgenteMonteCarlo:
         :param montecarlo: Istanza dell'algoritmo MCTS
         :return: Valutazione dello stato
         """
-        return node.state.evaluate_state()
+        return montecarlo.state.evaluate_state()
 
     def _calculate_policy_value(self, state, mossa):
         """
@@ -90,18 +557,19 @@ class AgenteMonteCarlo:
         :return: Valore della policy per la mossa (tra 0 e 1)
         """
         carta, prese = mossa
-        base_value = 0.3  # Valore base di ogni mossa
+        configurazione = self.configurazione
+        base_value = configurazione.policy_base  # Valore base di ogni mossa
 
         if prese:
-            base_value += 0.2  # Bonus per prese effettuate
+            base_value += configurazione.policy_presa  # Bonus per prese effettuate
 
             # Bonus per la raccolta di carte di seme Denari
-            if any(c.seme == 'Denari' for c in prese):
-                base_value += 0.15
+            if prese & Maschera.DENARI:
+                base_value += configurazione.policy_denari
 
             # Bonus aggiuntivo per la presa del settebello (7 di Denari)
-            if any(c.seme == 'Denari' and c.valore == 7 for c in prese):
-                base_value += 0.25
+            if prese & Maschera.SETTEBELLO:
+                base_value += configurazione.policy_settebello
 
         return min(base_value, 1.0)  # Limita il valore massimo a 1
 
@@ -110,21 +578,62 @@ class AgenteMonteCarlo:
         Calcola il fattore di esplorazione per il nodo attuale, basato sulla situazione di gioco.
 
         :param state: Stato corrente del gioco
-        :return: Fattore di esplorazione (tra 0 e 0.8)
+        :return: Fattore di esplorazione (tra 0 e il massimo della configurazione, di default 0.8)
         """
-        base_factor = 0.4  # Valore iniziale di esplorazione
+        configurazione = self.configurazione
+        base_factor = configurazione.esplorazione_base  # Valore iniziale di esplorazione
 
         # Incremento se il giocatore ha fatto almeno una Scopa
-        if state.giocatore.scope > 0:
-            base_factor += 0.15
+        if state.scope > 0:
+            base_factor += configurazione.esplorazione_scopa
 
         # Incremento se il giocatore ha raccolto molte carte di seme Denari
-        denari = sum(1 for c in state.carte_raccolte_giocatore if c.seme == 'Denari')
+        denari = Maschera.conta_denari(state.raccolte_giocatore)
         if denari >= 5:
-            base_factor += 0.1
+            base_factor += configurazione.esplorazione_denari
 
         # Incremento se siamo all'inizio del gioco (molte carte in mano)
-        if len(state.carte_mano) >= 2:
-            base_factor += 0.1
+        if Maschera.conta(state.mano) >= 2:
+            base_factor += configurazione.esplorazione_mano
+
+        return min(base_factor, configurazione.esplorazione_massima)  # Limita il valore massimo
+
+
+class StrategiaMonteCarlo:
+    """
+    Agente per GameEngine.Partita: sceglie le mosse con un AgenteMonteCarlo, creato di nuovo a
+    ogni round (riconosciuto dal tavolo nuovo) con i parametri dati.
+    """
+
+    def __init__(self, **parametri):
+        """
+        :param parametri: Argomenti di AgenteMonteCarlo (configurazione, processi e campi della configurazione)
+        """
+        self.parametri = parametri
+        self.agente = None
+        self._tavolo = None
+
+    def _agente(self, giocatore, avversario, tavolo):
+        if self.agente is None or tavolo is not self._tavolo:
+            self.ferma_riflessione()
+            self.agente = AgenteMonteCarlo(giocatore, avversario, **self.parametri)
+            self._tavolo = tavolo
+        return self.agente
+
+    def __call__(self, giocatore, avversario, tavolo):
+        return self._agente(giocatore, avversario, tavolo).scegli_mossa(tavolo)
+
+    def rifletti(self, giocatore, avversario, tavolo):
+        """
+        Fa riflettere l'agente mentre l'avversario sceglie la sua mossa (vedi AgenteMonteCarlo.rifletti).
+
+        :param giocatore: Il giocatore dell'agente
+        :param avversario: Il giocatore di turno
+        :param tavolo: Lo stato attuale del tavolo di gioco
+        """
+        self._agente(giocatore, avversario, tavolo).rifletti(tavolo)
 
-        return min(base_factor, 0.8)  # Limita il valore massimo a 0.8
+    def ferma_riflessione(self):
+        """Ferma la riflessione in corso, ad esempio a fine partita"""
+        if self.agente is not None:
+            self.agente.ferma_riflessione()
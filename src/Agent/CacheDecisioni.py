@@ -0,0 +1,144 @@
+import hashlib
+import json
+import sqlite3
+import struct
+
+from GameEngine import Simmetria
+
+_STATO = struct.Struct("<4Q4b")
+
+# Contatore dell'ultimo uso di una posizione, calcolato da SQLite nella stessa scrittura: così è
+# lo stesso per tutti i processi che usano il file
+_PROSSIMO_USO = "(SELECT COALESCE(MAX(uso), 0) + 1 FROM decisioni)"
+
+
+class CacheDecisioni:
+    """
+    Cache su disco (SQLite) delle statistiche della radice delle ricerche: per ogni posizione
+    visite e valore di ogni mossa, con cui una ricerca successiva dalla stessa posizione parte
+    invece che da un albero vuoto. La chiave è l'insieme di informazione del giocatore di turno in
+    forma canonica rispetto ai semi intercambiabili (vedi GameEngine.Simmetria), insieme alla
+    configurazione dell'agente: posizioni uguali a meno di uno scambio di semi condividono la voce.
+
+    Si salvano solo le posizioni in cui nessuno ha ancora raccolto carte, le aperture che si
+    ripetono da una partita all'altra. La cache tiene al più capacita posizioni, scartando quella
+    usata meno di recente. Lo stesso file si può usare da più processi.
+    """
+
+    # Cache aperte in questo processo, per percorso (vedi condivisa)
+    _aperte = {}
+
+    def __init__(self, percorso, capacita=100000):
+        """
+        :param percorso: File SQLite della cache, creato se non esiste
+        :param capacita: Numero massimo di posizioni tenute
+        """
+        self.percorso = percorso
+        self.capacita = capacita
+        self.connessione = sqlite3.connect(percorso, timeout=30, isolation_level=None)
+        self.connessione.execute("PRAGMA journal_mode=WAL")
+        self.connessione.execute("PRAGMA synchronous=NORMAL")
+        self.connessione.execute("CREATE TABLE IF NOT EXISTS decisioni "
+                                 "(chiave BLOB PRIMARY KEY, statistiche TEXT NOT NULL, uso INTEGER NOT NULL)")
+        self.connessione.execute("CREATE INDEX IF NOT EXISTS decisioni_uso ON decisioni (uso)")
+        self._posizioni = len(self)
+        self.richieste = 0
+        self.trovate = 0
+        self.scartate = 0
+
+    @classmethod
+    def condivisa(cls, percorso, capacita=100000):
+        """Restituisce la cache del percorso già aperta in questo processo, aprendola se serve."""
+        cache = cls._aperte.get(percorso)
+        if cache is None:
+            cache = cls._aperte[percorso] = cls(percorso, capacita)
+        return cache
+
+    @property
+    def mancate(self):
+        return self.richieste - self.trovate
+
+    @property
+    def frequenza(self):
+        """Frazione delle richieste trovate nella cache."""
+        return self.trovate / self.richieste if self.richieste else 0.
+
+    def statistiche(self):
+        return {'richieste': self.richieste, 'trovate': self.trovate, 'mancate': self.mancate,
+                'scartate': self.scartate, 'frequenza': self.frequenza}
+
+    @staticmethod
+    def da_salvare(stato):
+        """Se la posizione dello stato (uno ScopaGameState) va nella cache."""
+        return not (stato.raccolte_giocatore or stato.raccolte_avversario)
+
+    @staticmethod
+    def chiave(stato, configurazione):
+        """
+        Chiave della posizione dello stato, dal punto di vista del giocatore di turno, con la
+        configurazione data, e permutazione dei semi che porta lo stato nella forma canonica.
+
+        :return: Coppia (chiave, permutazione)
+        """
+        s = stato.stato
+        g = s.turno
+        maschere, permutazione = Simmetria.canonizza(s.mani[g], s.tavolo, s.raccolte[g], s.raccolte[1 - g])
+        ultimo_presa = -1 if s.ultimo_presa is None else int(s.ultimo_presa != g)
+        dati = _STATO.pack(*maschere, s.scope[g], s.scope[1 - g], stato.num_carte_avversario, ultimo_presa)
+        chiave = hashlib.blake2b(dati + configurazione.chiave().encode(), digest_size=16).digest()
+        return chiave, permutazione
+
+    def cerca(self, chiave, permutazione):
+        """
+        Cerca le statistiche della radice di una posizione.
+
+        :param chiave: Chiave della posizione (da chiave)
+        :param permutazione: Permutazione dei semi della posizione (da chiave)
+        :return: Lista di (mossa, visite, valore) nei semi dello stato, o None se la posizione non c'è
+        """
+        self.richieste += 1
+        riga = self.connessione.execute("SELECT statistiche FROM decisioni WHERE chiave = ?", (chiave,)).fetchone()
+        if riga is None:
+            return None
+        self.trovate += 1
+        self.connessione.execute(f"UPDATE decisioni SET uso = {_PROSSIMO_USO} WHERE chiave = ?", (chiave,))
+
+        inversa = Simmetria.inversa(permutazione)
+        return [(Simmetria.canonizza_mossa((carta, presa), inversa), visite, valore)
+                for carta, presa, visite, valore in json.loads(riga[0])]
+
+    def salva(self, chiave, permutazione, statistiche):
+        """
+        Salva le statistiche della radice di una posizione, scartando le posizioni usate meno di
+        recente se la cache è piena.
+
+        :param statistiche: Lista di (mossa, visite, valore) nei semi dello stato
+        """
+        canoniche = [(*Simmetria.canonizza_mossa(mossa, permutazione), visite, valore)
+                     for mossa, visite, valore in statistiche]
+        connessione = self.connessione
+        valori = (json.dumps(canoniche), chiave)
+        if connessione.execute(f"UPDATE decisioni SET statistiche = ?, uso = {_PROSSIMO_USO} WHERE chiave = ?",
+                               valori).rowcount:
+            return
+        connessione.execute(f"INSERT OR REPLACE INTO decisioni (statistiche, uso, chiave) VALUES (?, {_PROSSIMO_USO}, ?)",
+                            valori)
+        self._posizioni += 1
+        if self._posizioni <= self.capacita:
+            return
+
+        # Il conteggio tenuto qui non vede le posizioni aggiunte da altri processi: si rilegge
+        self._posizioni = len(self)
+        in_eccesso = self._posizioni - self.capacita
+        if in_eccesso > 0:
+            connessione.execute("DELETE FROM decisioni WHERE chiave IN "
+                                "(SELECT chiave FROM decisioni ORDER BY uso LIMIT ?)", (in_eccesso,))
+            self.scartate += in_eccesso
+            self._posizioni -= in_eccesso
+
+    def __len__(self):
+        return self.connessione.execute("SELECT COUNT(*) FROM decisioni").fetchone()[0]
+
+    def close(self):
+        CacheDecisioni._aperte.pop(self.percorso, None)
+        self.connessione.close()
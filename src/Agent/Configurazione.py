@@ -0,0 +1,101 @@
+import json
+from dataclasses import dataclass, asdict, fields, replace
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class ConfigurazioneAgente:
+    """
+    Parametri di AgenteMonteCarlo e di ScopaGameState: limiti della ricerca, esplorazione,
+    policy dei nodi e pesi delle euristiche. È immutabile, quindi la stessa configurazione si
+    può condividere tra agenti e processi e usare come chiave; per cambiarne un parametro si
+    crea una nuova configurazione con modifica.
+    """
+
+    # Limiti della ricerca: simulazioni, secondi e nodi dell'albero per mossa (None per nessun
+    # limite) e numero massimo di nodi dell'albero (memoria fissa per ricerca)
+    iterazioni: int = 1000
+    tempo_per_mossa: Optional[float] = None
+    nodi_per_mossa: Optional[int] = None
+    capacita_albero: int = 8192
+
+    # Arresto anticipato: nessuna ricerca con una sola carta in mano e stop appena le iterazioni
+    # rimaste non possono più cambiare la scelta; con una confidenza (ad esempio 0.05) anche
+    # quando la mossa più visitata è separata dalle altre con quel livello di confidenza
+    arresto_anticipato: bool = True
+    confidenza: Optional[float] = None
+
+    # Secondi massimi di riflessione durante il turno dell'avversario (AgenteMonteCarlo.rifletti)
+    tempo_riflessione: float = 60.
+
+    # Tabella delle trasposizioni: i nodi che raggiungono lo stesso stato con mosse in ordine
+    # diverso ne condividono le statistiche; al più capacita_trasposizioni stati, scartando
+    # quello usato meno di recente
+    trasposizioni: bool = False
+    capacita_trasposizioni: int = 65536
+
+    # Allargamento progressivo: sotto la radice un nodo visitato n volte ha al più
+    # max(1, allargamento * n ** allargamento_esponente) figli tra le mosse possibili, aggiunti
+    # in ordine di priorità (None per aggiungere subito tutte le mosse)
+    allargamento: Optional[float] = None
+    allargamento_esponente: float = 0.5
+
+    # Simmetria dei semi: Coppe, Bastoni e Spade sono intercambiabili (GameEngine.Simmetria), quindi
+    # tra le mosse equivalenti per uno scambio di questi semi se ne espande una sola e gli stati
+    # equivalenti condividono la chiave della tabella delle trasposizioni
+    simmetrie: bool = False
+
+    # Fattore di esplorazione della radice e incrementi per i nodi (_calculate_discovery_factor)
+    esplorazione_radice: float = 0.4
+    esplorazione_base: float = 0.4
+    esplorazione_scopa: float = 0.15
+    esplorazione_denari: float = 0.1
+    esplorazione_mano: float = 0.1
+    esplorazione_massima: float = 0.8
+
+    # Valore della policy dei nodi (_calculate_policy_value)
+    policy_base: float = 0.3
+    policy_presa: float = 0.2
+    policy_denari: float = 0.15
+    policy_settebello: float = 0.25
+
+    # Pesi della valutazione delle prese per l'ordinamento delle mosse (ScopaGameState._valuta_presa)
+    presa_settebello: int = 50
+    presa_denaro: int = 20
+    presa_scopa: int = 40
+    presa_primiera: int = 15
+    presa_carta: int = 10
+
+    # Pesi della valutazione degli scarti per l'ordinamento delle mosse (ScopaGameState._valuta_scarto):
+    # un denaro finché l'avversario ne ha meno di 6, un sette, un sei o un asso, una carta fino al 4
+    # (non di denari, se l'avversario ne ha meno di 6)
+    scarto_denaro: int = -30
+    scarto_sette: int = -25
+    scarto_sei_asso: int = -15
+    scarto_basso: int = 10
+
+    # Pesi della valutazione dello stato (ScopaGameState.evaluate_state)
+    stato_scopa: float = 15
+    stato_denaro: float = 5
+    stato_denaro_maggioranza: float = 8
+    stato_settebello: float = 20
+    stato_primiera: float = 0.5
+    stato_tavolo: float = 5
+    stato_normalizzazione: float = 150
+
+    def modifica(self, **parametri):
+        """Restituisce una nuova configurazione con i parametri dati cambiati."""
+        return replace(self, **parametri)
+
+    def differenze(self, altra=None):
+        """Parametri che differiscono da un'altra configurazione (di default quella predefinita)."""
+        altra = altra if altra is not None else CONFIGURAZIONE_PREDEFINITA
+        return {campo.name: getattr(self, campo.name) for campo in fields(self)
+                if getattr(self, campo.name) != getattr(altra, campo.name)}
+
+    def chiave(self):
+        """Rappresentazione testuale stabile della configurazione, da usare come chiave su disco."""
+        return json.dumps(asdict(self), sort_keys=True)
+
+
+CONFIGURAZIONE_PREDEFINITA = ConfigurazioneAgente()
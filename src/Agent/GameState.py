@@ -1,89 +1,261 @@
-from copy import deepcopy
+import heapq
+
+from Agent.Configurazione import CONFIGURAZIONE_PREDEFINITA
+from GameEngine import Maschera, Simmetria
+from GameEngine.Giocatore import Giocatore
+from GameEngine.Maschera import CARTE, VALORI
+from GameEngine.Prese import prese_tavolo
+from GameEngine.StatoCompatto import StatoCompatto
+from GameEngine.Tavolo import Tavolo
+
+# Valori per la primiera (nuovo sistema di punteggio)
+PRIMIERA_VALUES = {7: 21, 6: 18, 1: 16, 5: 15, 4: 14}
+
+# Miglior valore di primiera per ognuna delle 1024 maschere di un seme (bit i = carta di valore i + 1)
+PRIMIERA_SEME = tuple(
+    max([PRIMIERA_VALUES.get(v + 1, 0) for v in range(10) if maschera >> v & 1], default=0)
+    for maschera in range(1 << 10)
+)
+
 
 class ScopaGameState:
-    def __init__(self, giocatore, tavolo, carte_mano, carte_raccolte_giocatore, carte_raccolte_avversario):
+    def __init__(self, giocatore, tavolo, carte_mano, carte_raccolte_giocatore, carte_raccolte_avversario,
+                 num_carte_avversario=None, scope_avversario=0, ultimo_presa=None,
+                 configurazione=CONFIGURAZIONE_PREDEFINITA, turno=0):
         """
         Inizializza lo stato di gioco per la partita di Scopa.
 
+        Lo stato descrive il round dal punto di vista del giocatore (giocatore 0, di norma di
+        turno) contro l'avversario (giocatore 1) ed è mutabile: apply applica una mossa di chi
+        è di turno e undo la annulla, così la ricerca può percorrere l'albero senza copiare lo
+        stato a ogni nodo. La mano dell'avversario e l'ordine del mazzo non sono noti: restano
+        vuoti finché determinizza non li estrae dalle carte non viste.
+
         :param giocatore: Il giocatore corrente
         :param tavolo: Lo stato del tavolo (carte visibili)
         :param carte_mano: Le carte in mano al giocatore
         :param carte_raccolte_giocatore: Le carte già raccolte dal giocatore
         :param carte_raccolte_avversario: Le carte già raccolte dall'avversario
+        :param num_carte_avversario: Numero di carte in mano all'avversario (di default quante ne ha il giocatore)
+        :param scope_avversario: Scope già fatte dall'avversario
+        :param ultimo_presa: Ultimo ad aver fatto una presa (0 il giocatore, 1 l'avversario, None nessuno)
+        :param configurazione: ConfigurazioneAgente con i pesi di _valuta_presa e evaluate_state
+        :param turno: Chi deve muovere (1 per partire dal turno dell'avversario)
         """
         self.giocatore = giocatore
-        self.tavolo = deepcopy(tavolo)  # Copia profonda del tavolo per evitare modifiche indesiderate
-        self.carte_mano = deepcopy(carte_mano)  # Copia profonda delle carte in mano
-        self.carte_raccolte_giocatore = deepcopy(carte_raccolte_giocatore)  # Copia delle carte raccolte dal giocatore
-        self.carte_raccolte_avversario = deepcopy(carte_raccolte_avversario)  # Copia delle carte raccolte dall'avversario
+        self.configurazione = configurazione
+        self.stato = StatoCompatto(
+            mani=(Maschera.da_carte(carte_mano), 0),
+            raccolte=(Maschera.da_carte(carte_raccolte_giocatore), Maschera.da_carte(carte_raccolte_avversario)),
+            scope=(giocatore.scope, scope_avversario),
+            tavolo=tavolo.maschera,
+            turno=turno,
+            ultimo_presa=ultimo_presa
+        )
+
+        # Carte che il giocatore non vede: in mano all'avversario o ancora nel mazzo
+        self.non_viste = Maschera.TUTTE & ~(self.stato.mani[0] | self.stato.tavolo | self.stato.raccolte[0] |
+                                            self.stato.raccolte[1])
+        self._indici_non_viste = tuple(Maschera.indici(self.non_viste))
+        if num_carte_avversario is None:
+            num_carte_avversario = len(carte_mano)
+        self.num_carte_avversario = min(num_carte_avversario, Maschera.conta(self.non_viste))
+
         self.last_move = None  # Inizializza l'ultima mossa come None
+        self.giocate = 0  # Maschera delle carte giocate dal giocatore con apply
+        self._storia = []  # Istantanee dello stato prima di ogni mossa applicata, per undo
+
+    @classmethod
+    def da_stato_compatto(cls, stato, configurazione=CONFIGURAZIONE_PREDEFINITA):
+        """
+        Costruisce lo stato di gioco visto dal giocatore di turno in uno StatoCompatto completo
+        (ad esempio un round rigiocato da un registro di partite): come per l'agente, la mano
+        dell'avversario e il mazzo restano nascosti.
+        """
+        g = stato.turno
+        giocatore = Giocatore()
+        giocatore.carte_mano = stato.carte_mano(g)
+        giocatore.carte_raccolte = stato.carte_raccolte(g)
+        giocatore.scope = stato.scope[g]
+        tavolo = Tavolo()
+        tavolo.carte = stato.carte_tavolo()
+        ultimo_presa = None if stato.ultimo_presa is None else int(stato.ultimo_presa != g)
+        return cls(giocatore, tavolo, giocatore.carte_mano, giocatore.carte_raccolte, stato.carte_raccolte(1 - g),
+                   num_carte_avversario=Maschera.conta(stato.mani[1 - g]), scope_avversario=stato.scope[1 - g],
+                   ultimo_presa=ultimo_presa, configurazione=configurazione)
+
+    def determinizza(self, rng):
+        """
+        Estrae dalle carte non viste una mano plausibile per l'avversario e un ordine per il
+        mazzo. Va chiamata sullo stato iniziale, senza mosse applicate.
+
+        :param rng: Generatore casuale (random.Random) da usare per l'estrazione
+        """
+        non_viste = list(self._indici_non_viste)
+        rng.shuffle(non_viste)
+        mano_avversario = 0
+        for indice in non_viste[:self.num_carte_avversario]:
+            mano_avversario |= 1 << indice
+        self.stato.mani[1] = mano_avversario
+        self.stato.ordine_mazzo = tuple(non_viste[self.num_carte_avversario:])
+        self.stato.mazzo = self.non_viste & ~mano_avversario
+
+    @property
+    def turno(self):
+        """Giocatore di turno: 0 il giocatore, 1 l'avversario."""
+        return self.stato.turno
+
+    @property
+    def mano(self):
+        """Maschera delle carte in mano al giocatore."""
+        return self.stato.mani[0]
+
+    @property
+    def tavolo(self):
+        """Maschera delle carte sul tavolo."""
+        return self.stato.tavolo
+
+    @property
+    def raccolte_giocatore(self):
+        """Maschera delle carte raccolte dal giocatore."""
+        return self.stato.raccolte[0]
+
+    @property
+    def raccolte_avversario(self):
+        """Maschera delle carte raccolte dall'avversario."""
+        return self.stato.raccolte[1]
+
+    @property
+    def scope(self):
+        """Scope fatte dal giocatore."""
+        return self.stato.scope[0]
+
+    @property
+    def carte_mano(self):
+        """Le carte in mano al giocatore."""
+        return Maschera.carte(self.mano)
+
+    @property
+    def carte_tavolo(self):
+        """Le carte sul tavolo."""
+        return Maschera.carte(self.tavolo)
+
+    @property
+    def carte_raccolte_giocatore(self):
+        """Le carte raccolte dal giocatore."""
+        return Maschera.carte(self.raccolte_giocatore)
+
+    @property
+    def carte_raccolte_avversario(self):
+        """Le carte raccolte dall'avversario."""
+        return Maschera.carte(self.raccolte_avversario)
+
+    def is_legal(self, mossa):
+        """Verifica se la carta della mossa è in mano a chi è di turno"""
+        return (self.stato.mani[self.stato.turno] >> mossa[0]) & 1
 
-    def get_possible_moves(self):
-        """Restituisce tutte le mosse possibili ordinate per priorità"""
+    def get_possible_moves(self, carte=None):
+        """
+        Restituisce le mosse possibili di chi è di turno, ordinate per priorità. Le mosse sono
+        coppie (indice della carta giocata, maschera delle carte prese), con presa 0 per gli scarti.
+
+        :param carte: Maschera a cui limitare le carte giocate (di default tutta la mano)
+        """
+        # Ordina tutte le mosse in base alla valutazione della mossa
+        return sorted(self._genera_mosse(carte), key=self._valuta_mossa, reverse=True)
+
+    def mosse_per_priorita(self, carte=None):
+        """
+        Genera le mosse possibili di chi è di turno nello stesso ordine di get_possible_moves,
+        ma una alla volta: l'ordinamento completo si paga solo se si consumano tutte.
+
+        :param carte: Maschera a cui limitare le carte giocate (di default tutta la mano)
+        """
+        coda = [(-self._valuta_mossa(mossa), posizione, mossa)
+                for posizione, mossa in enumerate(self._genera_mosse(carte))]
+        heapq.heapify(coda)
+        while coda:
+            yield heapq.heappop(coda)[2]
+
+    def simmetrie(self):
+        """
+        Permutazioni dei semi intercambiabili che lasciano invariato lo stato visto da chi è di
+        turno (la sua mano, il tavolo e le carte raccolte): le mosse che una di esse scambia tra
+        loro sono equivalenti (vedi Simmetria.rappresentante).
+        """
+        stato = self.stato
+        return Simmetria.stabilizzatori(stato.mani[stato.turno], stato.tavolo, stato.raccolte[0], stato.raccolte[1])
+
+    def _genera_mosse(self, carte=None):
+        """Mosse possibili di chi è di turno, non ordinate"""
         mosse = []
+        mano = self.stato.mani[self.stato.turno]
+        if carte is not None:
+            mano &= carte
+        if not mano:
+            return mosse
+        prese_per_valore = prese_tavolo(self.tavolo)
 
         # Cicla su tutte le carte in mano per determinare le mosse possibili
-        for carta in self.carte_mano:
+        for carta in Maschera.indici(mano):
             # Cerca le prese possibili per ogni carta
-            prese_possibili = self.giocatore.cerca_prese_possibili(carta, self.tavolo.carte)
+            prese_possibili = prese_per_valore[VALORI[carta]]
 
             if prese_possibili:
-                # Ordina le prese possibili per valore strategico
-                prese_ordinate = sorted(prese_possibili, key=lambda x: self._valuta_presa(carta, x), reverse=True)
-                for presa in prese_ordinate:
-                    # Aggiunge la mossa (carta, presa) alla lista delle mosse
-                    mosse.append((carta, presa))
+                # Aggiunge le mosse (carta, presa) alla lista delle mosse
+                mosse.extend((carta, presa) for presa in prese_possibili)
             else:
-                # Se non ci sono prese, la mossa sarà uno scarto (carta, lista vuota)
-                mosse.append((carta, []))
+                # Se non ci sono prese, la mossa sarà uno scarto (carta, 0)
+                mosse.append((carta, 0))
 
-        # Ordina tutte le mosse in base alla valutazione della mossa
-        return sorted(mosse, key=lambda x: self._valuta_mossa(x), reverse=True)
+        return mosse
 
     def _valuta_presa(self, carta, presa):
         """Valuta il valore strategico di una presa"""
         score = 0
+        configurazione = self.configurazione
 
         # Valuta il settebello (sette di denari)
-        if any(c.seme == 'Denari' and c.valore == 7 for c in presa):
-            score += 50
+        if presa & Maschera.SETTEBELLO:
+            score += configurazione.presa_settebello
 
         # Valuta i denari raccolti
-        denari = sum(1 for c in presa if c.seme == 'Denari')
-        score += denari * 20
+        score += Maschera.conta_denari(presa) * configurazione.presa_denaro
 
         # Valuta la possibilità di scopa (tutte le carte sul tavolo sono prese)
-        if len(self.tavolo.carte) == len(presa):
-            score += 40
+        if self.tavolo == presa:
+            score += configurazione.presa_scopa
 
         # Valuta carte alte per la primiera
-        for c in presa:
-            if c.valore in [7, 6, 1]:
-                score += 15
+        for indice in Maschera.indici(presa):
+            if VALORI[indice] in [7, 6, 1]:
+                score += configurazione.presa_primiera
 
         # Bonus per prese multiple
-        score += len(presa) * 10
+        score += Maschera.conta(presa) * configurazione.presa_carta
 
         return score
 
     def _valuta_scarto(self, carta):
         """Valuta la priorità di scarto di una carta"""
         score = 0
+        carta = CARTE[carta]
+        configurazione = self.configurazione
 
-        # Conta carte di denari avversario
-        denari_avversario = sum(1 for c in self.carte_raccolte_avversario if c.seme == 'Denari')
+        # Conta carte di denari dell'avversario di chi è di turno
+        denari_avversario = Maschera.conta_denari(self.stato.raccolte[1 - self.stato.turno])
 
         # Penalizza lo scarto di carte strategiche
         if carta.seme == 'Denari' and denari_avversario <6:
-            score -= 30
+            score += configurazione.scarto_denaro
         if carta.valore == 7:
-            score -= 25
+            score += configurazione.scarto_sette
         if carta.valore in [6, 1]:
-            score -= 15
+            score += configurazione.scarto_sei_asso
 
         # Favorisce lo scarto di carte basse non denari, a meno che l'avversario abbia già 6 o più denari
-        if carta.valore <= 4 and (carta.seme != 'Denari' or sum( 1 for c in self.carte_raccolte_avversario if c.seme == 'Denari') >= 6):
-            score += 10
+        if carta.valore <= 4 and (carta.seme != 'Denari' or denari_avversario >= 6):
+            score += configurazione.scarto_basso
 
         return score
 
@@ -95,57 +267,91 @@ class ScopaGameState:
         else:  # Se è uno scarto
             return self._valuta_scarto(carta)
 
+    def apply(self, mossa):
+        """Applica la mossa di chi è di turno, salvando lo stato precedente per undo"""
+        self._storia.append((self.stato.istantanea(), self.last_move, self.giocate))
+        if self.stato.turno == 0:
+            self.giocate |= 1 << mossa[0]
+        self.stato.gioca(*mossa)
+        self.last_move = mossa  # Memorizza l'ultima mossa
+
+    def undo(self, mossa):
+        """Annulla l'ultima mossa applicata con apply"""
+        istantanea, self.last_move, self.giocate = self._storia.pop()
+        self.stato.ripristina(istantanea)
+
+    def chiave_trasposizione(self):
+        """
+        Chiave dello stato raggiunto con le mosse applicate, uguale per ogni ordine delle mosse
+        che porta allo stesso stato e per ogni determinizzazione: tavolo, carte raccolte, carte
+        giocate dal giocatore (quelle dell'avversario sono le altre uscite nel frattempo), scope,
+        turno e ultimo a prendere, impacchettati in un solo intero. Le carte nascoste non ne fanno
+        parte. Con configurazione.simmetrie le carte sono in forma canonica (GameEngine.Simmetria),
+        così anche gli stati uguali a meno di uno scambio dei semi intercambiabili hanno la stessa
+        chiave; altrimenti sono distinte per seme anche dove il seme non conta per il punteggio.
+        """
+        stato = self.stato
+        ultimo_presa = 0 if stato.ultimo_presa is None else stato.ultimo_presa + 1
+        chiave = stato.scope[0] << 160 | stato.scope[1] << 168 | stato.turno << 176 | ultimo_presa << 177
+        if not self.configurazione.simmetrie:
+            return chiave | stato.tavolo | stato.raccolte[0] << 40 | stato.raccolte[1] << 80 | self.giocate << 120
+
+        # Anche le carte non viste a inizio ricerca, le stesse per tutti gli stati, entrano nella
+        # chiave in forma canonica: gli stati equivalenti sono quelli che una permutazione che le
+        # lascia invariate porta l'uno nell'altro
+        (tavolo, raccolte_0, raccolte_1, giocate, non_viste), _ = Simmetria.canonizza(
+            stato.tavolo, stato.raccolte[0], stato.raccolte[1], self.giocate, self.non_viste)
+        return chiave | tavolo | raccolte_0 << 40 | raccolte_1 << 80 | giocate << 120 | non_viste << 179
+
+    def clone(self):
+        """Restituisce una copia indipendente dello stato, senza la storia delle mosse"""
+        nuovo_stato = ScopaGameState.__new__(ScopaGameState)
+        nuovo_stato.giocatore = self.giocatore
+        nuovo_stato.configurazione = self.configurazione
+        nuovo_stato.stato = self.stato.copia()
+        nuovo_stato.non_viste = self.non_viste
+        nuovo_stato._indici_non_viste = self._indici_non_viste
+        nuovo_stato.num_carte_avversario = self.num_carte_avversario
+        nuovo_stato.last_move = self.last_move
+        nuovo_stato.giocate = self.giocate
+        nuovo_stato._storia = []
+        return nuovo_stato
+
     def move(self, mossa):
         """Applica una mossa e restituisce un nuovo stato"""
-        carta, presa = mossa  # Estrai la carta e la presa dalla mossa
-        nuovo_stato = deepcopy(self)  # Crea una copia dello stato attuale
-
-        # Rimuovi la carta dalla mano
-        nuovo_stato.carte_mano.remove(carta)
-
-        if presa:
-            # Raccogli le carte prese e aggiornare lo stato del tavolo
-            for carta_presa in presa:
-                nuovo_stato.tavolo.carte.remove(carta_presa)
-                nuovo_stato.carte_raccolte_giocatore.append(carta_presa)
-            # Aggiungi la carta giocata alle carte raccolte dal giocatore
-            nuovo_stato.carte_raccolte_giocatore.append(carta)
-
-            # Verifica se è stata fatta una scopa
-            if len(nuovo_stato.tavolo.carte) == 0 and len(nuovo_stato.carte_mano) > 0:
-                nuovo_stato.giocatore.scope += 1
-        else:
-            # Se non ci sono prese, la carta va sul tavolo
-            nuovo_stato.tavolo.carte.append(carta)
-
-        nuovo_stato.last_move = mossa  # Memorizza l'ultima mossa
+        nuovo_stato = self.clone()
+        nuovo_stato.apply(mossa)
         return nuovo_stato
 
-    def evaluate_state(self):
-        """Valuta lo stato corrente con pesi di "stato"""
+    def _valuta_raccolte(self, giocatore):
+        """Valuta scope e carte raccolte di un giocatore (0 o 1) con pesi di "stato\""""
         punteggio = 0
+        raccolte = self.stato.raccolte[giocatore]
+        configurazione = self.configurazione
 
         # Scope (peso aumentato)
-        punteggio += self.giocatore.scope * 15
+        punteggio += self.stato.scope[giocatore] * configurazione.stato_scopa
 
         # Denari (peso aumentato e progressivo)
-        denari = sum(1 for carta in self.carte_raccolte_giocatore if carta.seme == 'Denari')
-        punteggio += denari * (8 if denari >= 5 else 5)
+        denari = Maschera.conta_denari(raccolte)
+        punteggio += denari * (configurazione.stato_denaro_maggioranza if denari >= 5 else configurazione.stato_denaro)
 
         # Settebello (peso aumentato)
-        if any(carta.seme == 'Denari' and carta.valore == 7 for carta in self.carte_raccolte_giocatore):
-            punteggio += 20
+        if Maschera.ha_settebello(raccolte):
+            punteggio += configurazione.stato_settebello
 
-        # Carte per primiera (nuovo sistema di punteggio)
-        primiera_values = {7: 21, 6: 18, 1: 16, 5: 15, 4: 14}
-        for seme in ['Bastoni', 'Coppe', 'Denari', 'Spade']:
-            carte_seme = [c for c in self.carte_raccolte_giocatore if c.seme == seme]
-            if carte_seme:
-                max_value = max(primiera_values.get(c.valore, 0) for c in carte_seme)
-                punteggio += max_value * 0.5
+        # Carte per primiera: la miglior carta di ogni seme, letta dalla tabella per seme
+        for posizione in range(4):
+            punteggio += PRIMIERA_SEME[(raccolte >> (10 * posizione)) & 1023] * configurazione.stato_primiera
+
+        return punteggio
+
+    def evaluate_state(self):
+        """Valuta lo stato corrente dal punto di vista del giocatore, rispetto all'avversario"""
+        punteggio = self._valuta_raccolte(0) - self._valuta_raccolte(1)
 
         # Bonus per controllo del tavolo (meno carte sul tavolo = meglio)
-        if len(self.tavolo.carte) < 3:
-            punteggio += 5
+        if Maschera.conta(self.tavolo) < 3:
+            punteggio += self.configurazione.stato_tavolo
 
-        return min(max(punteggio / 150, -1), 1)  # Normalizza il punteggio tra -1 e 1
+        return min(max(punteggio / self.configurazione.stato_normalizzazione, -1), 1)  # Normalizza il punteggio tra -1 e 1
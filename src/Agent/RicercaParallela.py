@@ -0,0 +1,70 @@
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+# Pool di processi condiviso tra agenti e mosse: i processi vengono creati una volta sola e
+# riutilizzati, così il costo di avvio non si paga a ogni turno
+_pool = None
+_processi_pool = 0
+
+
+def pool(processi):
+    """Restituisce il pool condiviso con il numero di processi richiesto, creandolo se serve."""
+    global _pool, _processi_pool
+    if _pool is None or _processi_pool != processi:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool = ProcessPoolExecutor(max_workers=processi)
+        _processi_pool = processi
+    return _pool
+
+
+def _ricerca(stato, seme, configurazione):
+    """
+    Eseguita in un processo del pool: una ricerca indipendente dallo stato dato.
+
+    :return: Coppia (iterazioni eseguite, lista di (mossa, visite, valore) per i figli della radice)
+    """
+    from Agent.AgenteMonteCarlo import AgenteMonteCarlo
+
+    agente = AgenteMonteCarlo(stato.giocatore, configurazione=configurazione)
+    mcts = agente._nuova_ricerca(stato, seme)
+
+    # L'arresto quando la scelta non può più cambiare vale per il singolo albero, non per
+    # la somma delle statistiche: ogni ricerca usa tutto il suo budget
+    mcts.stop_when_settled = False
+    iterazioni = mcts.simulate(configurazione.iterazioni, configurazione.tempo_per_mossa,
+                               configurazione.nodi_per_mossa)
+
+    tree = mcts.tree
+    return iterazioni, [(tree.moves[figlio], tree.visits[figlio], tree.win_value[figlio])
+                        for figlio in tree.children(0)]
+
+
+def cerca_in_parallelo(agente, stato, processi, rng=random):
+    """
+    Ricerca parallela alla radice: ogni processo esegue una ricerca indipendente, con un proprio
+    seme e quindi proprie determinizzazioni, con i limiti dell'agente. Visite e valori dei figli
+    della radice vengono poi sommati per mossa e si sceglie la mossa più visitata.
+
+    :param agente: L'agente che sceglie la mossa, dalla cui configurazione si leggono i limiti della ricerca
+    :param stato: Stato di gioco iniziale
+    :param processi: Numero di processi (e di ricerche indipendenti)
+    :param rng: Generatore da cui ricavare i semi delle ricerche
+    :return: Coppia (mossa scelta, iterazioni eseguite in totale)
+    """
+    semi = [rng.getrandbits(64) for _ in range(processi)]
+    risultati = [pool(processi).submit(_ricerca, stato, seme, agente.configurazione) for seme in semi]
+
+    iterazioni_totali = 0
+    statistiche = {}  # mossa -> [visite, valore]
+    for risultato in risultati:
+        iterazioni, figli = risultato.result()
+        iterazioni_totali += iterazioni
+        for mossa, visite, valore in figli:
+            somma = statistiche.setdefault(mossa, [0, 0.])
+            somma[0] += visite
+            somma[1] += valore
+
+    # A parità di visite vince il valore più alto, poi la prima mossa trovata
+    mossa = max(statistiche, key=lambda m: tuple(statistiche[m]))
+    return mossa, iterazioni_totali
@@ -0,0 +1,156 @@
+from GameEngine import Maschera
+from GameEngine.Maschera import VALORI
+from GameEngine.Prese import posizioni_prese
+from GameEngine.Punteggio import Punteggio
+
+# Tipo del valore salvato nella tabella delle trasposizioni
+ESATTO, LIMITE_INFERIORE, LIMITE_SUPERIORE = 0, 1, 2
+
+
+class _Raccolte:
+    """Le sole informazioni di un giocatore lette da Punteggio.calcola_punteggio_round."""
+
+    __slots__ = ('carte_raccolte', 'scope')
+
+    def __init__(self, raccolte, scope):
+        self.carte_raccolte = Maschera.carte(raccolte)
+        self.scope = scope
+
+
+class RisolutoreFinale:
+    """
+    Risolutore esatto dell'ultima mano di un round. Quando il mazzo è finito tutte le carte
+    sono note (quelle che non sono sul tavolo, in mano o raccolte sono in mano all'avversario),
+    quindi il resto del round si può risolvere con un minimax alpha-beta sulle al più 6 mosse
+    rimaste, con una tabella delle trasposizioni indicizzata sullo stato compatto.
+
+    Il giocatore 0 è quello che massimizza. Come nel motore di gioco, chi gioca sceglie solo la
+    carta e la presa è la più numerosa (a parità la somma più alta, poi la prima nell'ordine del
+    tavolo); ogni tavolo svuotato vale una scopa e a fine round le carte rimaste vanno all'ultimo
+    che ha preso. Il valore di uno stato è la differenza tra i punti del round dei due giocatori,
+    calcolati con Punteggio.calcola_punteggio_round.
+    """
+
+    def __init__(self):
+        self.punteggio = Punteggio()
+        self.tabella = {}  # Tabella delle trasposizioni: stato compatto -> (valore, tipo, carta)
+        self.nodi = 0  # Nodi visitati, per statistica
+
+    def scegli_carta(self, mani, raccolte, scope, tavolo, turno=0, ultimo_presa=None):
+        """
+        Risolve il finale e restituisce la carta migliore per il giocatore di turno.
+
+        :param mani: Maschere delle carte in mano ai due giocatori
+        :param raccolte: Maschere delle carte raccolte dai due giocatori
+        :param scope: Scope dei due giocatori
+        :param tavolo: Indici delle carte sul tavolo, nell'ordine del tavolo
+        :param turno: Giocatore (0 o 1) che deve muovere
+        :param ultimo_presa: Ultimo giocatore che ha fatto una presa (None se nessuno)
+        :return: Coppia (valore esatto per il giocatore 0, indice della carta da giocare)
+        """
+        stato = (mani[0], mani[1], raccolte[0], raccolte[1], scope[0], scope[1], tuple(tavolo), turno, ultimo_presa)
+        valore = self._alpha_beta(stato, float('-inf'), float('inf'), radice=True)
+        return valore, self.tabella[stato][2]
+
+    def _valuta_finale(self, raccolte_0, raccolte_1, scope_0, scope_1):
+        """Differenza tra i punti del round del giocatore 0 e del giocatore 1."""
+        giocatore = _Raccolte(raccolte_0, scope_0)
+        avversario = _Raccolte(raccolte_1, scope_1)
+        punti_0, _ = self.punteggio.calcola_punteggio_round(giocatore, avversario)
+        punti_1, _ = self.punteggio.calcola_punteggio_round(avversario, giocatore)
+        return punti_0 - punti_1
+
+    def _successori(self, stato):
+        """Stati successivi del giocatore di turno, con la carta giocata e le prese prima degli scarti."""
+        mano_0, mano_1, raccolte_0, raccolte_1, scope_0, scope_1, tavolo, turno, ultimo_presa = stato
+        mani = [mano_0, mano_1]
+        raccolte = [raccolte_0, raccolte_1]
+        scope = [scope_0, scope_1]
+        valori_tavolo = tuple(VALORI[i] for i in tavolo)
+        prese = []
+        scarti = []
+
+        for carta in Maschera.indici(mani[turno]):
+            nuove_mani = mani[:]
+            nuove_mani[turno] &= ~(1 << carta)
+            nuove_raccolte = raccolte[:]
+            nuove_scope = scope[:]
+            prese_possibili = posizioni_prese(VALORI[carta], valori_tavolo)
+
+            if prese_possibili:
+                # Stessa scelta della presa del motore di gioco (max restituisce la prima a pari merito)
+                presa = max(prese_possibili, key=lambda x: (len(x), sum(valori_tavolo[p] for p in x)))
+                nuovo_tavolo = tuple(c for p, c in enumerate(tavolo) if p not in presa)
+                nuove_raccolte[turno] |= (1 << carta) | sum(1 << tavolo[p] for p in presa)
+                if not nuovo_tavolo:
+                    nuove_scope[turno] += 1
+                nuovo_ultimo = turno
+                successori = prese
+            else:
+                nuovo_tavolo = tavolo + (carta,)
+                nuovo_ultimo = ultimo_presa
+                successori = scarti
+
+            successori.append((carta, (nuove_mani[0], nuove_mani[1], nuove_raccolte[0], nuove_raccolte[1],
+                                       nuove_scope[0], nuove_scope[1], nuovo_tavolo, 1 - turno, nuovo_ultimo)))
+
+        return prese + scarti
+
+    def _alpha_beta(self, stato, alpha, beta, radice=False):
+        self.nodi += 1
+        mano_0, mano_1, raccolte_0, raccolte_1, scope_0, scope_1, tavolo, turno, ultimo_presa = stato
+
+        if not (mano_0 or mano_1):
+            # Fine round: le carte rimaste sul tavolo vanno all'ultimo che ha preso
+            if ultimo_presa is not None and tavolo:
+                rimaste = sum(1 << c for c in tavolo)
+                if ultimo_presa == 0:
+                    raccolte_0 |= rimaste
+                else:
+                    raccolte_1 |= rimaste
+            return self._valuta_finale(raccolte_0, raccolte_1, scope_0, scope_1)
+
+        if not (mano_0, mano_1)[turno]:
+            # Il giocatore di turno non ha carte: passa la mano all'altro
+            return self._alpha_beta(stato[:7] + (1 - turno, ultimo_presa), alpha, beta)
+
+        # Alla radice si cerca sempre con la finestra piena, per avere anche la carta migliore esatta
+        voce = None if radice else self.tabella.get(stato)
+        if voce is not None:
+            valore, tipo, _ = voce
+            if tipo == ESATTO:
+                return valore
+            if tipo == LIMITE_INFERIORE:
+                alpha = max(alpha, valore)
+            else:
+                beta = min(beta, valore)
+            if alpha >= beta:
+                return valore
+
+        alpha_iniziale, beta_iniziale = alpha, beta
+        massimizza = turno == 0
+        miglior_valore = float('-inf') if massimizza else float('inf')
+        miglior_carta = None
+
+        for carta, successore in self._successori(stato):
+            valore = self._alpha_beta(successore, alpha, beta)
+            if massimizza:
+                if valore > miglior_valore:
+                    miglior_valore, miglior_carta = valore, carta
+                alpha = max(alpha, valore)
+            else:
+                if valore < miglior_valore:
+                    miglior_valore, miglior_carta = valore, carta
+                beta = min(beta, valore)
+            if alpha >= beta:
+                break
+
+        if miglior_valore <= alpha_iniziale:
+            tipo = LIMITE_SUPERIORE
+        elif miglior_valore >= beta_iniziale:
+            tipo = LIMITE_INFERIORE
+        else:
+            tipo = ESATTO
+        self.tabella[stato] = (miglior_valore, tipo, miglior_carta)
+
+        return miglior_valore
@@ -0,0 +1,270 @@
+import random
+
+from Agent.Configurazione import CONFIGURAZIONE_PREDEFINITA
+from GameEngine import Maschera
+from GameEngine.Maschera import VALORI
+from GameEngine.Prese import posizioni_prese
+from GameEngine.Punteggio import Punteggio
+
+BIT = tuple(1 << i for i in range(Maschera.NUM_CARTE))
+PLY_PER_ROUND = 36  # 40 carte meno le 4 iniziali sul tavolo
+PLY_PER_MANO = 6  # Ogni 6 mosse entrambe le mani sono vuote e si ridistribuisce
+
+# Maschere delle carte di ogni valore e delle carte di valore minore, per valore giocato 0-10
+CARTE_VALORE = tuple(sum(BIT[i] for i in range(Maschera.NUM_CARTE) if VALORI[i] == v) for v in range(11))
+CARTE_MINORI = tuple(sum(BIT[i] for i in range(Maschera.NUM_CARTE) if VALORI[i] < v) for v in range(11))
+
+
+def prese_carta(valore, tavolo):
+    """
+    Prese possibili giocando una carta di valore dato su un tavolo dato come maschera, come
+    maschere di bit e nello stesso ordine di GameEngine.Prese.prese_tavolo. Nei lotti i tavoli
+    sono troppo vari per la cache di prese_tavolo: qui si usa l'indice delle prese (vedi
+    GameEngine.Prese.indice_prese) dei soli valori delle carte di valore minore di quella
+    giocata, che si ripetono molto di più.
+    """
+    dirette = tavolo & CARTE_VALORE[valore]
+    if dirette:
+        prese = []
+        while dirette:
+            bit = dirette & -dirette
+            prese.append(bit)
+            dirette ^= bit
+        return prese
+
+    minori = tavolo & CARTE_MINORI[valore]
+    if minori.bit_count() < 2:
+        return []
+    indici = Maschera.indici(minori)
+    combinazioni = posizioni_prese(valore, tuple([VALORI[i] for i in indici]))
+    if not combinazioni:
+        return []
+    return [sum([BIT[indici[p]] for p in combinazione]) for combinazione in combinazioni]
+
+
+def _tabelle_byte(pesi):
+    """Tabelle per sommare un peso per carta su una maschera, un byte alla volta (5 tabelle da 256)."""
+    return tuple(
+        tuple(sum(pesi[8 * byte + b] for b in range(8) if valore >> b & 1 and 8 * byte + b < len(pesi))
+              for valore in range(256))
+        for byte in range(5)
+    )
+
+
+def politica_casuale(mano, tavolo, raccolte_avversario, rng):
+    """Sceglie una mossa a caso tra tutte le mosse (carta, presa) possibili, come random_rollout."""
+    mosse = []
+    for carta in Maschera.indici(mano):
+        prese = prese_carta(VALORI[carta], tavolo)
+        if prese:
+            mosse.extend((carta, presa) for presa in prese)
+        else:
+            mosse.append((carta, 0))
+    return mosse[int(rng.random() * len(mosse))]
+
+
+def crea_politica_avida(configurazione=CONFIGURAZIONE_PREDEFINITA):
+    """
+    Crea la politica che gioca la prima mossa di ScopaGameState.get_possible_moves, cioè quella
+    con la valutazione _valuta_mossa più alta (a parità la prima generata), con i pesi della
+    configurazione. Le valutazioni sono lette da tabelle per carta invece che ricalcolate.
+    """
+    c = configurazione
+    peso_presa = [c.presa_carta
+                  + (c.presa_denaro if Maschera.DENARI >> i & 1 else 0)
+                  + (c.presa_primiera if VALORI[i] in (7, 6, 1) else 0)
+                  + (c.presa_settebello if BIT[i] == Maschera.SETTEBELLO else 0)
+                  for i in range(Maschera.NUM_CARTE)]
+    tabelle_presa = _tabelle_byte(peso_presa)
+    presa_scopa = c.presa_scopa
+
+    # Valutazione degli scarti per ogni carta, con l'avversario sotto i 6 denari o no
+    scarto = []
+    for avversario_sei_denari in (False, True):
+        punteggi = []
+        for i in range(Maschera.NUM_CARTE):
+            denaro = bool(Maschera.DENARI >> i & 1)
+            punteggio = 0
+            if denaro and not avversario_sei_denari:
+                punteggio += c.scarto_denaro
+            if VALORI[i] == 7:
+                punteggio += c.scarto_sette
+            if VALORI[i] in (6, 1):
+                punteggio += c.scarto_sei_asso
+            if VALORI[i] <= 4 and (not denaro or avversario_sei_denari):
+                punteggio += c.scarto_basso
+            punteggi.append(punteggio)
+        scarto.append(tuple(punteggi))
+    denari = Maschera.DENARI
+    t0, t1, t2, t3, t4 = tabelle_presa
+
+    def politica_avida(mano, tavolo, raccolte_avversario, rng):
+        scarti = scarto[(raccolte_avversario & denari).bit_count() >= 6]
+        migliore = None
+        miglior_punteggio = None
+        while mano:
+            bit = mano & -mano
+            mano ^= bit
+            carta = bit.bit_length() - 1
+            prese = prese_carta(VALORI[carta], tavolo)
+            if prese:
+                for presa in prese:
+                    punteggio = (t0[presa & 255] + t1[presa >> 8 & 255] + t2[presa >> 16 & 255] +
+                                 t3[presa >> 24 & 255] + t4[presa >> 32])
+                    if presa == tavolo:
+                        punteggio += presa_scopa
+                    if migliore is None or punteggio > miglior_punteggio:
+                        migliore, miglior_punteggio = (carta, presa), punteggio
+            else:
+                punteggio = scarti[carta]
+                if migliore is None or punteggio > miglior_punteggio:
+                    migliore, miglior_punteggio = (carta, 0), punteggio
+        return migliore
+
+    return politica_avida
+
+
+def punteggi_round(raccolte, scope):
+    """
+    Punti del round di molte partite, calcolati con Punteggio.calcola_punteggio_round_lotto.
+
+    :param raccolte: Coppia di liste con le maschere delle carte raccolte dai due giocatori
+    :param scope: Coppia di liste con le scope dei due giocatori
+    :return: Coppia di liste con i punti del round dei due giocatori
+    """
+    punteggio = Punteggio()
+    return (punteggio.calcola_punteggio_round_lotto(raccolte[0], raccolte[1], scope[0])['totale'],
+            punteggio.calcola_punteggio_round_lotto(raccolte[1], raccolte[0], scope[1])['totale'])
+
+
+class SimulatoreLotto:
+    """
+    Simulatore di molti round di Scopa giocati in parallelo, a passo comune. Ogni round dura
+    sempre 36 mosse (18 per giocatore, 3 per mano), quindi tutti i round del lotto sono alla
+    stessa mossa e si ridistribuisce nello stesso momento: gioca_ply applica una mossa a tutti.
+
+    Lo stato è tenuto per colonne, in liste parallele indicizzate per round: mani, carte
+    raccolte e tavolo come maschere di bit a 40 bit (vedi GameEngine.Maschera), scope, giocatore
+    di turno, ultimo ad aver preso e ordine del mazzo (bytes di 40 indici). Le regole sono quelle
+    di StatoCompatto: ogni tavolo svuotato vale una scopa e a fine round le carte rimaste vanno
+    all'ultimo che ha preso.
+
+    Una politica è una funzione politica(mano, tavolo, raccolte_avversario, rng) che restituisce
+    la mossa (indice carta, maschera presa) del giocatore di turno, come le mosse di StatoCompatto.
+    """
+
+    def __init__(self, num_round, turni_iniziali=0, rng=random, ordini=None):
+        """
+        :param num_round: Numero di round del lotto
+        :param turni_iniziali: Giocatore che inizia, lo stesso per tutti i round o uno per round
+        :param rng: Generatore casuale per mescolare i mazzi e per le politiche
+        :param ordini: Ordini del mazzo già mescolati, uno per round (di default mescolati con rng)
+        """
+        self.num_round = num_round
+        self.rng = rng
+        if isinstance(turni_iniziali, int):
+            turni_iniziali = [turni_iniziali] * num_round
+        self.turni_iniziali = list(turni_iniziali)
+
+        if ordini is None:
+            ordini = []
+            mazzo = list(range(Maschera.NUM_CARTE))
+            for _ in range(num_round):
+                rng.shuffle(mazzo)
+                ordini.append(bytes(mazzo))
+        self.ordini = [bytes(ordine) for ordine in ordini]
+
+        self.inizia()
+
+    def inizia(self):
+        """Distribuisce le carte: 4 sul tavolo, poi 3 al giocatore 0 e 3 al giocatore 1."""
+        self.tavolo = [BIT[o[0]] | BIT[o[1]] | BIT[o[2]] | BIT[o[3]] for o in self.ordini]
+        self.mani = ([0] * self.num_round, [0] * self.num_round)
+        self.raccolte = ([0] * self.num_round, [0] * self.num_round)
+        self.scope = ([0] * self.num_round, [0] * self.num_round)
+        self.turno = self.turni_iniziali[:]
+        self.ultimo_presa = [-1] * self.num_round
+        self.carte_distribuite = 4
+        self.ply = 0
+        self._distribuisci()
+
+    def _distribuisci(self):
+        k = self.carte_distribuite
+        mani_0, mani_1 = self.mani
+        for i, o in enumerate(self.ordini):
+            mani_0[i] = BIT[o[k]] | BIT[o[k + 1]] | BIT[o[k + 2]]
+            mani_1[i] = BIT[o[k + 3]] | BIT[o[k + 4]] | BIT[o[k + 5]]
+        self.carte_distribuite += 6
+
+    @property
+    def terminato(self):
+        return self.ply == PLY_PER_ROUND
+
+    def gioca_ply(self, politiche):
+        """
+        Il giocatore di turno di ogni round gioca una mossa scelta dalla sua politica. Dopo la
+        mossa ridistribuisce quando le mani sono vuote e, a fine mazzo, assegna le carte rimaste.
+
+        :param politiche: Politiche dei giocatori 0 e 1
+        """
+        mani, raccolte, scope = self.mani, self.raccolte, self.scope
+        tavolo, turno, ultimo_presa = self.tavolo, self.turno, self.ultimo_presa
+        rng = self.rng
+
+        for i in range(self.num_round):
+            g = turno[i]
+            mano_g = mani[g]
+            carta, presa = politiche[g](mano_g[i], tavolo[i], raccolte[1 - g][i], rng)
+            bit = BIT[carta]
+            mano_g[i] ^= bit
+
+            if presa:
+                rimaste = tavolo[i] ^ presa
+                tavolo[i] = rimaste
+                raccolte[g][i] |= presa | bit
+                ultimo_presa[i] = g
+                if not rimaste:
+                    scope[g][i] += 1
+            else:
+                tavolo[i] |= bit
+
+            turno[i] = 1 - g
+
+        self.ply += 1
+        if self.ply % PLY_PER_MANO == 0:
+            if self.carte_distribuite < Maschera.NUM_CARTE:
+                self._distribuisci()
+            else:
+                for i in range(self.num_round):
+                    if ultimo_presa[i] >= 0:
+                        raccolte[ultimo_presa[i]][i] |= tavolo[i]
+                        tavolo[i] = 0
+
+    def punteggi(self):
+        """Punti dei round finiti, come coppia di liste (giocatore 0, giocatore 1)."""
+        return punteggi_round(self.raccolte, self.scope)
+
+    def gioca_round(self, politiche):
+        """Gioca tutte le mosse rimaste dei round e ne restituisce i punti."""
+        while not self.terminato:
+            self.gioca_ply(politiche)
+        return self.punteggi()
+
+
+def gioca_partite(num_partite, politiche, rng=random, punti_vittoria=11):
+    """
+    Gioca molte partite complete a lotti di round, fino ai punti di vittoria come GameEngine.Partita.
+    Nella partita p inizia il giocatore p % 2, in tutti i round.
+
+    :return: Coppia di liste con i punti finali dei due giocatori in ogni partita
+    """
+    totali = ([0] * num_partite, [0] * num_partite)
+    attive = list(range(num_partite))
+    while attive:
+        simulatore = SimulatoreLotto(len(attive), [p % 2 for p in attive], rng)
+        punti = simulatore.gioca_round(politiche)
+        for k, p in enumerate(attive):
+            totali[0][p] += punti[0][k]
+            totali[1][p] += punti[1][k]
+        attive = [p for p in attive if totali[0][p] < punti_vittoria and totali[1][p] < punti_vittoria]
+    return totali
@@ -1,2 +1,4 @@
-from .AgenteMonteCarlo import AgenteMonteCarlo
-from .GameState import ScopaGameState
\ No newline at end of file
+from .AgenteMonteCarlo import AgenteMonteCarlo, StrategiaMonteCarlo
+from .GameState import ScopaGameState
+from .Configurazione import ConfigurazioneAgente, CONFIGURAZIONE_PREDEFINITA
+from .CacheDecisioni import CacheDecisioni
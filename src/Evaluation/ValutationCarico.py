@@ -0,0 +1,115 @@
+import asyncio
+import os
+import random
+import tempfile
+import time
+from datetime import datetime
+
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from Agent.SimulatoreLotto import politica_casuale
+from GameEngine.StatoCompatto import StatoCompatto
+from Server.ClientMosse import ClientMosse, serializza_stato_compatto
+from Server.ServerMosse import ServerMosse, percentile
+
+
+async def gioca_sessione(client, sessione, num_round, tempo, rng, latenze):
+    """
+    Gioca i round di una sessione: le mosse del giocatore 0 le sceglie il server, quelle
+    dell'avversario una politica casuale locale, così il carico è tutto sul server.
+
+    :param latenze: Lista a cui aggiungere la latenza (secondi, vista dal client) di ogni mossa
+    """
+    for numero_round in range(num_round):
+        stato = StatoCompatto.nuovo_round(turno_iniziale=numero_round % 2, rng=rng)
+        while not stato.terminato:
+            if stato.turno == 0:
+                inizio = time.perf_counter()
+                carta, presa = await client.scegli_mossa(sessione, serializza_stato_compatto(stato), tempo=tempo)
+                latenze.append(time.perf_counter() - inizio)
+            else:
+                carta, presa = politica_casuale(stato.mani[1], stato.tavolo, stato.raccolte[0], rng)
+            stato.gioca(carta, presa)
+    await client.chiudi_sessione(sessione)
+
+
+async def genera_carico(indirizzo, sessioni, num_round, tempo, connessioni, seme):
+    """Gioca le sessioni in contemporanea, distribuite su alcune connessioni, e restituisce latenze e statistiche del server."""
+    client = [await ClientMosse(indirizzo).connetti() for _ in range(connessioni)]
+    latenze = []
+    inizio = time.perf_counter()
+    await asyncio.gather(*(gioca_sessione(client[i % connessioni], f"carico-{seme}-{i}", num_round, tempo,
+                                          random.Random(f"{seme}-{i}"), latenze)
+                           for i in range(sessioni)))
+    durata = time.perf_counter() - inizio
+    statistiche = await client[0].statistiche()
+    for c in client:
+        await c.chiudi()
+    return latenze, durata, statistiche
+
+
+def crea_report(latenze, durata, statistiche, sessioni, num_round, tempo, lavoratori):
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    report_path = f"reports/report_carico_{timestamp}.txt"
+    os.makedirs("reports", exist_ok=True)
+    latenze = sorted(latenze)
+
+    with open(report_path, "w") as f:
+        f.write("=== REPORT CARICO SERVER MOSSE ===\n\n")
+        f.write(f"Sessioni in contemporanea: {sessioni}, round per sessione: {num_round}\n")
+        f.write(f"Tempo per mossa richiesto: {tempo * 1000:.0f} ms, processi di lavoro: {lavoratori}\n")
+        f.write(f"Durata: {durata:.2f} secondi\n\n")
+
+        f.write(f"Mosse: {len(latenze)}\n")
+        f.write(f"Throughput: {len(latenze) / durata:.1f} mosse/s\n")
+        f.write("Latenza vista dal client (ms): "
+                f"p50 {percentile(latenze, 0.5) * 1000:.1f}, p90 {percentile(latenze, 0.9) * 1000:.1f}, "
+                f"p99 {percentile(latenze, 0.99) * 1000:.1f}, massima {latenze[-1] * 1000:.1f}\n\n")
+
+        f.write("=== STATISTICHE DEL SERVER ===\n")
+        for chiave, valore in statistiche.items():
+            f.write(f"{chiave}: {valore:.1f}\n" if isinstance(valore, float) else f"{chiave}: {valore}\n")
+
+    return report_path
+
+
+async def _main(sessioni, num_round, tempo, lavoratori, indirizzo, connessioni, seme):
+    server = None
+    if indirizzo is None:
+        # Nessun server indicato: ne avvia uno in questo processo su un socket temporaneo
+        indirizzo = os.path.join(tempfile.mkdtemp(), "mosse.sock")
+        server = ServerMosse(indirizzo, lavoratori)
+        await server.avvia()
+    try:
+        return await genera_carico(indirizzo, sessioni, num_round, tempo, connessioni, seme)
+    finally:
+        if server is not None:
+            await server.chiudi()
+
+
+def main(sessioni=16, num_round=1, tempo=0.05, lavoratori=None, indirizzo=None, connessioni=4, seme=0):
+    """
+    Misura throughput e latenze di ServerMosse con molte partite in contemporanea.
+
+    :param sessioni: Partite giocate in contemporanea
+    :param num_round: Round di ogni partita
+    :param tempo: Secondi per mossa richiesti al server
+    :param lavoratori: Processi di lavoro del server avviato dallo script (di default uno per core)
+    :param indirizzo: Indirizzo di un server già avviato (None per avviarne uno)
+    :param connessioni: Connessioni al server su cui distribuire le sessioni
+    :param seme: Seme delle smazzate e delle mosse dell'avversario
+    """
+    lavoratori = lavoratori or os.cpu_count()
+    latenze, durata, statistiche = asyncio.run(_main(sessioni, num_round, tempo, lavoratori, indirizzo,
+                                                     connessioni, seme))
+    report_path = crea_report(latenze, durata, statistiche, sessioni, num_round, tempo, lavoratori)
+    print(f"Report creato: {report_path}")
+
+
+if __name__ == "__main__":
+    sessioni = int(input("Inserisci il numero di partite in contemporanea: "))
+    tempo = float(input("Inserisci il tempo per mossa in secondi: "))
+    lavoratori = input("Inserisci il numero di processi di lavoro (invio per usare tutti i core): ")
+    main(sessioni=sessioni, tempo=tempo, lavoratori=int(lavoratori) if lavoratori else None)
@@ -1,6 +1,12 @@
+import json
 import os
+import random
 import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 from datetime import datetime
+from functools import partial
 
 import sys
 import os
@@ -9,79 +15,12 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 
 
-from GameEngine.Mazzo import Mazzo
-from GameEngine.Tavolo import Tavolo
-from GameEngine.Giocatore import Giocatore
-from GameEngine.Punteggio import Punteggio
-from Agent.AgenteMonteCarlo import AgenteMonteCarlo
-
-
-def gioca_round_ai(giocatori, punteggi, turno_iniziale):
-    mazzo = Mazzo()
-    tavolo = Tavolo()
-    ultimo_giocatore_presa = None
-
-    # Setup AI agents
-    giocatori[0].agente_ia = AgenteMonteCarlo(giocatori[0])
-    giocatori[1].agente_ia = AgenteMonteCarlo(giocatori[1])
-
-    # Initial distribution
-    for _ in range(4):  # Table cards
-        if mazzo.carte:
-            carta = mazzo.carte[0]
-            tavolo.aggiungi_carta_da_mazzo(carta, mazzo)
-
-    for giocatore in giocatori:  # Player cards
-        for _ in range(3):
-            if mazzo.carte:
-                carta = mazzo.carte[0]
-                giocatore.aggiungi_mano(carta, mazzo)
-
-    # Game round loop
-    turno = turno_iniziale  # Inizia dal giocatore giusto
-    while True:
-        if all(len(g.carte_mano) == 0 for g in giocatori):
-            if len(mazzo.carte) > 0:
-                for giocatore in giocatori:
-                    for _ in range(3):
-                        if mazzo.carte:
-                            carta = mazzo.carte[0]
-                            giocatore.aggiungi_mano(carta, mazzo)
-            else:
-                if ultimo_giocatore_presa is not None and tavolo.carte:
-                    for carta in tavolo.carte[:]:
-                        giocatori[ultimo_giocatore_presa].carte_raccolte.append(carta)
-                        tavolo.elimina_carta(carta)
-                break
-
-        giocatore_corrente = giocatori[turno % 2]
-
-        if len(giocatore_corrente.carte_mano) > 0:
-            carta_da_giocare = giocatore_corrente.agente_ia.scegli_mossa(tavolo)
-            prese_possibili = giocatore_corrente.cerca_prese_possibili(carta_da_giocare, tavolo.carte)
-
-            if prese_possibili:
-                miglior_presa = max(prese_possibili, key=lambda x: (len(x), sum(c.valore for c in x)))
-                giocatore_corrente.raccogli_carte(carta_da_giocare, miglior_presa, tavolo)
-                ultimo_giocatore_presa = turno % 2
-            else:
-                tavolo.aggiungi_carta_da_giocatore(carta_da_giocare)
-
-            giocatore_corrente.carte_mano.remove(carta_da_giocare)
-
-        turno += 1
-
-    punti_g1, dettagli_g1 = punteggi[0].calcola_punteggio_round(giocatori[0], giocatori[1])
-    punti_g2, dettagli_g2 = punteggi[1].calcola_punteggio_round(giocatori[1], giocatori[0])
+from GameEngine.Partita import Partita
+from GameEngine.RegistroPartite import LettoreRegistro, RegistratorePartita, ScrittoreRegistro
+from Agent.AgenteMonteCarlo import StrategiaMonteCarlo
 
-    punteggi[0].aggiungi_punteggio(punti_g1)
-    punteggi[1].aggiungi_punteggio(punti_g2)
 
-    return dettagli_g1, dettagli_g2, turno
-
-
-
-def crea_report(num_partite, statistiche, tempi, punteggi_partite):
+def crea_report(num_partite, statistiche, tempi, percorso_partite):
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     report_path = f"reports/report_{timestamp}.txt"
     os.makedirs("reports", exist_ok=True)
@@ -91,7 +30,8 @@ def crea_report(num_partite, statistiche, tempi, punteggi_partite):
 
         # Tempo di esecuzione
         f.write(f"Tempo totale di esecuzione: {tempi['totale']:.2f} secondi\n")
-        f.write(f"Tempo medio per partita: {tempi['medio']:.2f} secondi\n\n")
+        f.write(f"Tempo medio per partita: {tempi['medio']:.2f} secondi\n")
+        f.write(f"Processi: {statistiche['processi']}, seme: {statistiche['seme']}\n\n")
 
         # Statistiche generali
         f.write(f"Numero totale partite: {num_partite}\n")
@@ -101,73 +41,222 @@ def crea_report(num_partite, statistiche, tempi, punteggi_partite):
         f.write(f"Punteggio medio Agente 1: {statistiche['media_punti_g1']:.2f}\n")
         f.write(f"Punteggio medio Agente 2: {statistiche['media_punti_g2']:.2f}\n")
         f.write(f"Scope totali Agente 1: {statistiche['scope_g1']}\n")
-        f.write(f"Scope totali Agente 2: {statistiche['scope_g2']}\n\n")
-
-        # Dettagli per ogni partita
+        f.write(f"Scope totali Agente 2: {statistiche['scope_g2']}\n")
+        f.write(f"Visite ereditate tra le mosse Agente 1: {statistiche['visite_ereditate_g1']}\n")
+        f.write(f"Visite ereditate tra le mosse Agente 2: {statistiche['visite_ereditate_g2']}\n")
+        for agente in (1, 2):
+            mosse = max(statistiche[f'mosse_g{agente}'], 1)
+            f.write(f"Latenza media per mossa Agente {agente}: {statistiche[f'tempo_ricerca_g{agente}'] / mosse * 1000:.1f} ms "
+                    f"({statistiche[f'iterazioni_g{agente}'] / mosse:.0f} iterazioni per mossa)\n")
+            f.write(f"Iterazioni risparmiate dall'arresto anticipato Agente {agente}: "
+                    f"{statistiche[f'iterazioni_risparmiate_g{agente}']}\n")
+        f.write("\n")
+
+        # Dettagli per ogni partita, letti uno alla volta dal file delle partite (che le contiene
+        # nell'ordine in cui sono state giocate)
         f.write("=== DETTAGLI PARTITE ===\n")
-        for i, (punteggio_g1, punteggio_g2, tempo_partita) in enumerate(punteggi_partite, 1):
-            f.write(f"Partita {i}:\n")
-            f.write(f"Punteggio Agente 1: {punteggio_g1}\n")
-            f.write(f"Punteggio Agente 2: {punteggio_g2}\n")
-            f.write(f"Tempo partita: {tempo_partita:.2f} secondi\n\n")
+        for risultato in leggi_partite(percorso_partite):
+            if risultato['partita'] >= num_partite:
+                continue
+            f.write(f"Partita {risultato['partita'] + 1}:\n")
+            f.write(f"Punteggio Agente 1: {risultato['punti_g1']}\n")
+            f.write(f"Punteggio Agente 2: {risultato['punti_g2']}\n")
+            f.write(f"Tempo partita: {risultato['tempo']:.2f} secondi\n\n")
 
     return report_path
 
 
-def main(num_partite=100):
+def gioca_partita(partita, seme, parametri=({}, {}), registra=False):
+    """
+    Gioca una partita completa tra i due agenti, con il generatore casuale inizializzato dal seme
+    della partita: lo stesso seme dà la stessa partita in qualunque processo venga giocata.
+
+    :param partita: Numero della partita, da cui dipende chi inizia
+    :param seme: Seme della partita
+    :param parametri: Argomenti di AgenteMonteCarlo per i due agenti (di default quelli predefiniti)
+    :param registra: Se True il risultato contiene anche, in 'registro', il record binario della
+        partita da aggiungere al registro delle partite (vedi GameEngine.RegistroPartite)
+    :return: Dizionario con punteggi finali, round, tempo e contatori da sommare alle statistiche
+    """
+    start_time_game = time.time()
+
+    # La partita mescola con un generatore suo; le ricerche degli agenti usano quello globale,
+    # che il processo di valutazione reinizializza per ogni partita
+    random.seed(seme)
+
+    strategie = [StrategiaMonteCarlo(**parametri[0]), StrategiaMonteCarlo(**parametri[1])]
+
+    # Alterna chi inizia la partita (0 per Agente 1, 1 per Agente 2)
+    partita_ai = Partita(strategie, seme, turno_iniziale=partita % 2)
+
+    contatori = defaultdict(int)
+
+    def conta_round(evento, dettagli=None, **dati):
+        # A fine round si sommano le statistiche degli agenti, che vengono ricreati a ogni round
+        if evento != 'fine_round':
+            return
+        contatori['scope_g1'] += dettagli[0]['scope']
+        contatori['scope_g2'] += dettagli[1]['scope']
+        for strategia, agente in zip(strategie, ('g1', 'g2')):
+            contatori[f'visite_ereditate_{agente}'] += strategia.agente.visite_ereditate_totali
+            contatori[f'mosse_{agente}'] += strategia.agente.mosse
+            contatori[f'iterazioni_{agente}'] += strategia.agente.iterazioni_totali
+            contatori[f'tempo_ricerca_{agente}'] += strategia.agente.tempo_totale
+            contatori[f'iterazioni_risparmiate_{agente}'] += strategia.agente.iterazioni_risparmiate_totali
+
+    partita_ai.iscrivi(conta_round)
+    registratore = RegistratorePartita(partita_ai, partita) if registra else None
+    partita_ai.gioca()
+
+    risultato = {
+        'partita': partita,
+        'seme': seme,
+        'punti_g1': partita_ai.punteggi[0].punteggio_totale,
+        'punti_g2': partita_ai.punteggi[1].punteggio_totale,
+        'round': partita_ai.round,
+        'tempo': time.time() - start_time_game,
+        'contatori': dict(contatori)
+    }
+    if registratore is not None:
+        risultato['registro'] = registratore.codifica()
+    return risultato
+
+
+def leggi_partite(percorso_partite):
+    """
+    Legge uno alla volta i record delle partite dal file JSONL. Una riga finale incompleta,
+    lasciata da un'interruzione durante la scrittura, viene ignorata.
+    """
+    if not os.path.exists(percorso_partite):
+        return
+    with open(percorso_partite) as f:
+        for riga in f:
+            if not riga.endswith("\n"):
+                break
+            yield json.loads(riga)
+
+
+def tronca_riga_incompleta(percorso_partite):
+    """Elimina dal file delle partite un'eventuale ultima riga incompleta, prima di riprendere a scriverci."""
+    if not os.path.exists(percorso_partite):
+        return
+    with open(percorso_partite, "rb+") as f:
+        contenuto = f.read()
+        if contenuto and not contenuto.endswith(b"\n"):
+            f.truncate(contenuto.rfind(b"\n") + 1)
+
+
+def aggiorna_statistiche(statistiche, risultato):
+    """Aggiunge alle statistiche il risultato di una partita."""
+    for chiave, valore in risultato['contatori'].items():
+        statistiche[chiave] += valore
+
+    statistiche['partite'] += 1
+    statistiche['totale_round'] += risultato['round']
+    statistiche['totale_punti_g1'] += risultato['punti_g1']
+    statistiche['totale_punti_g2'] += risultato['punti_g2']
+    statistiche['tempo_partite'] += risultato['tempo']
+
+    if risultato['punti_g1'] > risultato['punti_g2']:
+        statistiche['vittorie_g1'] += 1
+    else:
+        statistiche['vittorie_g2'] += 1
+
+
+def main(num_partite=100, processi=1, seme=None, percorso_partite=None, dimensione_blocco=20,
+         percorso_registro=None):
+    """
+    Gioca num_partite partite tra due agenti e crea il report. Le partite vengono distribuite tra
+    processi processi; ognuna ha un seme ricavato dal seme principale, quindi i risultati sono
+    gli stessi qualunque sia il numero di processi.
+
+    Ogni partita finita viene aggiunta come record JSON al file delle partite, scritto su disco
+    ogni dimensione_blocco partite. Se il file esiste già, le partite che contiene vengono
+    contate nelle statistiche e non rigiocate, così una valutazione interrotta riprende da dove
+    si era fermata (con lo stesso seme, che viene letto dal file se non è indicato).
+
+    Con percorso_registro le partite vengono anche aggiunte, mazzi e mosse compresi, al registro
+    binario indicato (vedi GameEngine.RegistroPartite), che si può poi rigiocare mossa per mossa.
+    """
     start_time_total = time.time()
 
+    if percorso_partite is not None and seme is None:
+        seme = next((r['seme_principale'] for r in leggi_partite(percorso_partite)), None)
+    if seme is None:
+        seme = random.randrange(2 ** 32)
+    if percorso_partite is None:
+        percorso_partite = f"reports/partite_{seme}.jsonl"
+    os.makedirs(os.path.dirname(percorso_partite) or ".", exist_ok=True)
+    print(f"Partite salvate in {percorso_partite} (seme {seme})")
+
+    generatore_semi = random.Random(seme)
+    semi_partite = [generatore_semi.getrandbits(64) for _ in range(num_partite)]
+
     statistiche = {
+        'partite': 0,
         'vittorie_g1': 0,
         'vittorie_g2': 0,
         'totale_round': 0,
         'totale_punti_g1': 0,
         'totale_punti_g2': 0,
+        'tempo_partite': 0.,
         'scope_g1': 0,
-        'scope_g2': 0
+        'scope_g2': 0,
+        'visite_ereditate_g1': 0,
+        'visite_ereditate_g2': 0,
+        'mosse_g1': 0,
+        'mosse_g2': 0,
+        'iterazioni_g1': 0,
+        'iterazioni_g2': 0,
+        'tempo_ricerca_g1': 0.,
+        'tempo_ricerca_g2': 0.,
+        'iterazioni_risparmiate_g1': 0,
+        'iterazioni_risparmiate_g2': 0,
+        'seme': seme,
+        'processi': processi
     }
 
-    punteggi_partite = []
-    tempi_partite = []
-
-    for partita in range(num_partite):
-        start_time_game = time.time()
-
-        giocatori = [Giocatore(), Giocatore()]
-        punteggi = [Punteggio(), Punteggio()]
-
-        # Alterna chi inizia la partita (0 per Agente 1, 1 per Agente 2)
-        turno_iniziale = partita % 2
-
-        round_num = 0
-
-        while True:
-            dettagli_g1, dettagli_g2, num_turni = gioca_round_ai(giocatori, punteggi, turno_iniziale)
-            round_num += 1
-
-            statistiche['scope_g1'] += dettagli_g1['scope']
-            statistiche['scope_g2'] += dettagli_g2['scope']
-
-            if punteggi[0].punteggio_totale >= 11 or punteggi[1].punteggio_totale >= 11:
-                statistiche['totale_round'] += round_num
-                statistiche['totale_punti_g1'] += punteggi[0].punteggio_totale
-                statistiche['totale_punti_g2'] += punteggi[1].punteggio_totale
-
-                tempo_partita = time.time() - start_time_game
-                tempi_partite.append(tempo_partita)
-                punteggi_partite.append((punteggi[0].punteggio_totale, punteggi[1].punteggio_totale, tempo_partita))
-
-                if punteggi[0].punteggio_totale > punteggi[1].punteggio_totale:
-                    statistiche['vittorie_g1'] += 1
-                else:
-                    statistiche['vittorie_g2'] += 1
-                break
-
-            for giocatore in giocatori:
-                giocatore.carte_mano = []
-                giocatore.carte_raccolte = []
-                giocatore.scope = 0
-
+    # Ripresa: le partite già nel file entrano nelle statistiche e non vengono rigiocate
+    tronca_riga_incompleta(percorso_partite)
+    giocate = set()
+    for risultato in leggi_partite(percorso_partite):
+        if risultato['seme_principale'] != seme:
+            raise ValueError(f"Il file {percorso_partite} è stato scritto con il seme {risultato['seme_principale']}")
+        if risultato['partita'] < num_partite and risultato['partita'] not in giocate:
+            giocate.add(risultato['partita'])
+            aggiorna_statistiche(statistiche, risultato)
+
+    da_giocare = [partita for partita in range(num_partite) if partita not in giocate]
+    semi_da_giocare = [semi_partite[partita] for partita in da_giocare]
+
+    # Partite già nel registro, che in ripresa non vanno aggiunte di nuovo
+    registrate = set()
+    if percorso_registro is not None:
+        os.makedirs(os.path.dirname(percorso_registro) or ".", exist_ok=True)
+    if percorso_registro is not None and os.path.exists(percorso_registro):
+        with LettoreRegistro(percorso_registro) as lettore:
+            registrate = set(lettore.numeri())
+
+    with open(percorso_partite, "a") as file_partite, \
+            ScrittoreRegistro(percorso_registro) if percorso_registro is not None else nullcontext() as registro:
+        with ProcessPoolExecutor(max_workers=processi) if processi > 1 else nullcontext() as executor:
+            mappa = executor.map if executor is not None else map
+            gioca = partial(gioca_partita, registra=registro is not None)
+
+            # I risultati arrivano nell'ordine delle partite, qualunque processo le abbia giocate
+            for risultato in mappa(gioca, da_giocare, semi_da_giocare):
+                record = risultato.pop('registro', None)
+                if record is not None and risultato['partita'] not in registrate:
+                    registro.aggiungi(record)
+                risultato['seme_principale'] = seme
+                file_partite.write(json.dumps(risultato) + "\n")
+                aggiorna_statistiche(statistiche, risultato)
+
+                if statistiche['partite'] % dimensione_blocco == 0:
+                    file_partite.flush()
+                    os.fsync(file_partite.fileno())
+                    if registro is not None:
+                        registro.flush()
 
     tempo_totale = time.time() - start_time_total
 
@@ -177,13 +266,17 @@ def main(num_partite=100):
 
     tempi = {
         'totale': tempo_totale,
-        'medio': tempo_totale / num_partite
+        'medio': statistiche['tempo_partite'] / num_partite
     }
 
-    report_path = crea_report(num_partite, statistiche, tempi, punteggi_partite)
+    report_path = crea_report(num_partite, statistiche, tempi, percorso_partite)
     print(f"Report creato: {report_path}")
 
 
 if __name__ == "__main__":
     num_partite = int(input("Inserisci il numero di partite da simulare: "))
-    main(num_partite)
\ No newline at end of file
+    processi = input("Inserisci il numero di processi (invio per usare tutti i core): ")
+    seme = input("Inserisci il seme (invio per uno casuale; lo stesso seme riprende una valutazione interrotta): ")
+    registro = input("Inserisci il file in cui registrare le partite (invio per non registrarle): ")
+    main(num_partite, int(processi) if processi else os.cpu_count(), int(seme) if seme else None,
+         percorso_registro=registro or None)
\ No newline at end of file
@@ -0,0 +1,84 @@
+import os
+import random
+from datetime import datetime
+
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from GameEngine.Mazzo import Mazzo
+from GameEngine.Tavolo import Tavolo
+from GameEngine.Giocatore import Giocatore
+from Agent.AgenteMonteCarlo import AgenteMonteCarlo
+
+
+def crea_posizioni(num_posizioni, seme):
+    """Crea posizioni di inizio round riproducibili: tavolo e mani dei due giocatori."""
+    rng_globale = random.getstate()
+    random.seed(seme)
+    posizioni = []
+    for _ in range(num_posizioni):
+        mazzo = Mazzo()
+        tavolo = Tavolo()
+        giocatori = [Giocatore(), Giocatore()]
+        for _ in range(4):
+            tavolo.aggiungi_carta_da_mazzo(mazzo.carte[0], mazzo)
+        for giocatore in giocatori:
+            for _ in range(3):
+                giocatore.aggiungi_mano(mazzo.carte[0], mazzo)
+        posizioni.append((tavolo, giocatori))
+    random.setstate(rng_globale)
+    return posizioni
+
+
+def misura(processi, posizioni, tempo_per_mossa):
+    """Sceglie una mossa per ogni posizione con il numero di processi dato e misura le iterazioni al secondo."""
+    iterazioni = 0
+    tempo = 0.
+    for tavolo, giocatori in posizioni:
+        agente = AgenteMonteCarlo(giocatori[0], giocatori[1], iterazioni=None, tempo_per_mossa=tempo_per_mossa,
+                                  processi=processi)
+        agente.scegli_mossa(tavolo)
+        iterazioni += agente.ultima_ricerca['iterazioni']
+        tempo += agente.ultima_ricerca['tempo']
+    return iterazioni, tempo
+
+
+def crea_report(risultati, tempo_per_mossa, num_posizioni):
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    report_path = f"reports/report_parallelo_{timestamp}.txt"
+    os.makedirs("reports", exist_ok=True)
+
+    with open(report_path, "w") as f:
+        f.write("=== REPORT SCALABILITÀ RICERCA PARALLELA ===\n\n")
+        f.write(f"Core disponibili: {os.cpu_count()}\n")
+        f.write(f"Posizioni: {num_posizioni}, tempo per mossa: {tempo_per_mossa * 1000:.0f} ms\n\n")
+        f.write("Processi  Iterazioni/s  Latenza media (ms)  Speedup\n")
+
+        iterazioni_al_secondo_base = risultati[0][1] / risultati[0][2]
+        for processi, iterazioni, tempo in risultati:
+            iterazioni_al_secondo = iterazioni / tempo
+            f.write(f"{processi:<9} {iterazioni_al_secondo:>12.0f}  {tempo / num_posizioni * 1000:>18.1f}  "
+                    f"{iterazioni_al_secondo / iterazioni_al_secondo_base:>7.2f}\n")
+
+    return report_path
+
+
+def main(max_processi=None, num_posizioni=20, tempo_per_mossa=0.1, seme=0):
+    max_processi = max_processi or os.cpu_count()
+    posizioni = crea_posizioni(num_posizioni, seme)
+
+    risultati = []
+    for processi in range(1, max_processi + 1):
+        # Una mossa di riscaldamento avvia i processi del pool, che poi vengono riutilizzati
+        misura(processi, posizioni[:1], tempo_per_mossa)
+        iterazioni, tempo = misura(processi, posizioni, tempo_per_mossa)
+        risultati.append((processi, iterazioni, tempo))
+
+    report_path = crea_report(risultati, tempo_per_mossa, num_posizioni)
+    print(f"Report creato: {report_path}")
+
+
+if __name__ == "__main__":
+    max_processi = int(input("Inserisci il numero massimo di processi da misurare: "))
+    main(max_processi)
@@ -0,0 +1,211 @@
+import math
+import os
+import random
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from statistics import NormalDist
+
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from Evaluation.ValutationGame import gioca_partita
+
+
+def punteggio_atteso(elo):
+    """Punteggio atteso (vittoria 1, pareggio 0.5, sconfitta 0) con una differenza Elo data."""
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+def differenza_elo(punteggio):
+    """Differenza Elo corrispondente a un punteggio medio (inverso di punteggio_atteso)."""
+    punteggio = min(max(punteggio, 1e-6), 1 - 1e-6)
+    return -400 * math.log10(1 / punteggio - 1)
+
+
+class TestSequenziale:
+    """
+    Test sequenziale del rapporto di probabilità (SPRT) sul punteggio dell'Agente 1 contro
+    l'Agente 2. L'ipotesi H0 è che l'Agente 1 sia più forte di elo0 punti Elo, H1 che lo sia di
+    elo1; dopo ogni partita si aggiorna il logaritmo del rapporto di verosimiglianza e il test si
+    ferma appena esce dai limiti dati da alpha e beta. I pareggi valgono mezza vittoria e mezza
+    sconfitta.
+    """
+
+    def __init__(self, elo0=0, elo1=50, alpha=0.05, beta=0.05):
+        """
+        :param elo0: Differenza Elo dell'ipotesi H0
+        :param elo1: Differenza Elo dell'ipotesi H1 (maggiore di elo0)
+        :param alpha: Probabilità di accettare H1 quando è vera H0
+        :param beta: Probabilità di accettare H0 quando è vera H1
+        """
+        self.elo0, self.elo1 = elo0, elo1
+        self.alpha, self.beta = alpha, beta
+        self.p0, self.p1 = punteggio_atteso(elo0), punteggio_atteso(elo1)
+        self.limite_inferiore = math.log(beta / (1 - alpha))
+        self.limite_superiore = math.log((1 - beta) / alpha)
+
+        self.vittorie = 0
+        self.pareggi = 0
+        self.sconfitte = 0
+        self.llr = 0.
+        self._somma_quadrati = 0.
+
+    @property
+    def partite(self):
+        return self.vittorie + self.pareggi + self.sconfitte
+
+    @property
+    def punteggio(self):
+        """Punteggio medio dell'Agente 1."""
+        return (self.vittorie + self.pareggi / 2) / max(self.partite, 1)
+
+    def aggiorna(self, risultato):
+        """
+        Aggiunge il risultato di una partita dal punto di vista dell'Agente 1.
+
+        :param risultato: 1 per una vittoria, 0.5 per un pareggio, 0 per una sconfitta
+        """
+        if risultato == 1:
+            self.vittorie += 1
+        elif risultato == 0:
+            self.sconfitte += 1
+        else:
+            self.pareggi += 1
+        self._somma_quadrati += risultato ** 2
+        self.llr += risultato * math.log(self.p1 / self.p0) + (1 - risultato) * math.log((1 - self.p1) / (1 - self.p0))
+
+    @property
+    def decisione(self):
+        """'H1' o 'H0' quando il test ha deciso, altrimenti None."""
+        if self.llr >= self.limite_superiore:
+            return 'H1'
+        if self.llr <= self.limite_inferiore:
+            return 'H0'
+        return None
+
+    def intervallo_punteggio(self, confidenza=0.95):
+        """Intervallo di confidenza (approssimazione normale) sul punteggio medio dell'Agente 1."""
+        n = max(self.partite, 1)
+        varianza = max(self._somma_quadrati / n - self.punteggio ** 2, 0)
+        raggio = NormalDist().inv_cdf((1 + confidenza) / 2) * math.sqrt(varianza / n)
+        return self.punteggio - raggio, self.punteggio + raggio
+
+    def partite_campione_fisso(self):
+        """
+        Partite che servirebbero a un test con numero di partite fissato per distinguere H0 da H1
+        con gli stessi alpha e beta (approssimazione normale).
+        """
+        z_alpha = NormalDist().inv_cdf(1 - self.alpha)
+        z_beta = NormalDist().inv_cdf(1 - self.beta)
+        dispersione = z_alpha * math.sqrt(self.p0 * (1 - self.p0)) + z_beta * math.sqrt(self.p1 * (1 - self.p1))
+        return math.ceil((dispersione / (self.p1 - self.p0)) ** 2)
+
+
+def gioca_partite(semi_partite, parametri, processi):
+    """
+    Gioca le partite nell'ordine e ne restituisce i risultati uno alla volta. Con più processi
+    tiene in corso al più una partita per processo, così quando il test decide se ne sprecano poche.
+    """
+    if processi <= 1:
+        for partita, seme in enumerate(semi_partite):
+            yield gioca_partita(partita, seme, parametri)
+        return
+
+    executor = ProcessPoolExecutor(max_workers=processi)
+    try:
+        in_corso = deque()
+        for partita, seme in enumerate(semi_partite):
+            in_corso.append(executor.submit(gioca_partita, partita, seme, parametri))
+            if len(in_corso) >= processi:
+                yield in_corso.popleft().result()
+        while in_corso:
+            yield in_corso.popleft().result()
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def crea_report(test, parametri, andamento, tempo_totale, seme, partite_massime):
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    report_path = f"reports/report_sprt_{timestamp}.txt"
+    os.makedirs("reports", exist_ok=True)
+
+    decisione = {
+        'H1': f"Agente 1 più forte di almeno {test.elo1} Elo (H1)",
+        'H0': f"Agente 1 non più forte di {test.elo0} Elo (H0)",
+        None: f"nessuna decisione entro {partite_massime} partite"
+    }[test.decisione]
+    partite_fisse = test.partite_campione_fisso()
+    punteggio_min, punteggio_max = test.intervallo_punteggio()
+
+    with open(report_path, "w") as f:
+        f.write("=== REPORT SPRT AGENTE MONTE CARLO ===\n\n")
+        f.write(f"Agente 1: {parametri[0] or 'parametri predefiniti'}\n")
+        f.write(f"Agente 2: {parametri[1] or 'parametri predefiniti'}\n")
+        f.write(f"Ipotesi: H0 Elo = {test.elo0}, H1 Elo = {test.elo1}, alpha = {test.alpha}, beta = {test.beta}\n")
+        f.write(f"Seme: {seme}\n\n")
+
+        f.write(f"Decisione: {decisione}\n")
+        f.write(f"LLR finale: {test.llr:.3f} (limiti {test.limite_inferiore:.3f}, {test.limite_superiore:.3f})\n")
+        f.write(f"Partite giocate: {test.partite}\n")
+        f.write(f"Partite di un test a campione fisso equivalente: {partite_fisse} "
+                f"({test.partite / partite_fisse * 100:.1f}% usate)\n")
+        f.write(f"Vittorie/pareggi/sconfitte Agente 1: {test.vittorie}/{test.pareggi}/{test.sconfitte}\n")
+        f.write(f"Punteggio medio Agente 1: {test.punteggio:.3f} (IC 95%: {punteggio_min:.3f} - {punteggio_max:.3f})\n")
+        f.write(f"Differenza Elo: {differenza_elo(test.punteggio):+.1f} "
+                f"(IC 95%: {differenza_elo(punteggio_min):+.1f} - {differenza_elo(punteggio_max):+.1f})\n")
+        f.write(f"Tempo totale di esecuzione: {tempo_totale:.2f} secondi\n\n")
+
+        f.write("=== ANDAMENTO ===\n")
+        for partita, (punti_g1, punti_g2, llr) in enumerate(andamento):
+            f.write(f"Partita {partita + 1}: {punti_g1}-{punti_g2}, LLR {llr:.3f}\n")
+
+    return report_path
+
+
+def main(parametri=({}, {}), elo0=0, elo1=50, alpha=0.05, beta=0.05, partite_massime=None, processi=1, seme=None):
+    """
+    Confronta due configurazioni di AgenteMonteCarlo con un SPRT, fermandosi appena il test
+    decide. Come in ValutationGame chi inizia la partita si alterna e ogni partita ha un seme
+    ricavato dal seme principale, quindi i risultati non dipendono dal numero di processi.
+
+    :param parametri: Argomenti di AgenteMonteCarlo per l'Agente 1 e l'Agente 2
+    :param partite_massime: Limite alle partite giocate (di default tre volte quelle del test a campione fisso)
+    """
+    start_time_total = time.time()
+    test = TestSequenziale(elo0, elo1, alpha, beta)
+    if partite_massime is None:
+        partite_massime = 3 * test.partite_campione_fisso()
+    if seme is None:
+        seme = random.randrange(2 ** 32)
+
+    generatore_semi = random.Random(seme)
+    semi_partite = [generatore_semi.getrandbits(64) for _ in range(partite_massime)]
+
+    andamento = []
+    partite = gioca_partite(semi_partite, parametri, processi)
+    for risultato in partite:
+        if risultato['punti_g1'] == risultato['punti_g2']:
+            test.aggiorna(0.5)
+        else:
+            test.aggiorna(1 if risultato['punti_g1'] > risultato['punti_g2'] else 0)
+        andamento.append((risultato['punti_g1'], risultato['punti_g2'], test.llr))
+
+        if test.decisione is not None:
+            break
+    partite.close()
+
+    report_path = crea_report(test, parametri, andamento, time.time() - start_time_total, seme, partite_massime)
+    print(f"Report creato: {report_path}")
+
+
+if __name__ == "__main__":
+    iterazioni_1 = int(input("Inserisci le iterazioni per mossa dell'Agente 1: "))
+    iterazioni_2 = int(input("Inserisci le iterazioni per mossa dell'Agente 2: "))
+    elo1 = input("Inserisci la differenza Elo da rilevare (invio per 50): ")
+    processi = input("Inserisci il numero di processi (invio per usare tutti i core): ")
+    main(({'iterazioni': iterazioni_1}, {'iterazioni': iterazioni_2}),
+         elo1=int(elo1) if elo1 else 50,
+         processi=int(processi) if processi else os.cpu_count())
@@ -0,0 +1,188 @@
+import hashlib
+import itertools
+import json
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from Agent.Configurazione import CONFIGURAZIONE_PREDEFINITA
+from Evaluation.ValutationGame import gioca_partita
+
+# Griglia di esempio: a ogni campo della configurazione i valori da provare
+GRIGLIA_PREDEFINITA = {
+    'iterazioni': [100, 300, 1000],
+    'esplorazione_radice': [0.2, 0.4],
+}
+
+
+def crea_configurazioni(griglia):
+    """Tutte le configurazioni del prodotto cartesiano della griglia, a partire da quella predefinita."""
+    campi = list(griglia)
+    return [CONFIGURAZIONE_PREDEFINITA.modifica(**dict(zip(campi, valori)))
+            for valori in itertools.product(*(griglia[campo] for campo in campi))]
+
+
+def chiave_coppia(configurazione_1, configurazione_2, semi_partite):
+    """Nome del file della cache per una coppia di configurazioni e i semi delle sue partite."""
+    testo = json.dumps([configurazione_1.chiave(), configurazione_2.chiave(), semi_partite])
+    return hashlib.sha1(testo.encode()).hexdigest()
+
+
+def gioca_partita_sweep(configurazioni, partita, seme):
+    """Gioca una partita tra due configurazioni e ne restituisce punti, mosse e tempo di ricerca."""
+    risultato = gioca_partita(partita, seme, ({'configurazione': configurazioni[0]},
+                                              {'configurazione': configurazioni[1]}))
+    contatori = risultato['contatori']
+    return {
+        'punti': (risultato['punti_g1'], risultato['punti_g2']),
+        'mosse': (contatori.get('mosse_g1', 0), contatori.get('mosse_g2', 0)),
+        'tempo_ricerca': (contatori.get('tempo_ricerca_g1', 0.), contatori.get('tempo_ricerca_g2', 0.))
+    }
+
+
+def gioca_torneo(configurazioni, semi_partite, processi, cartella_cache):
+    """
+    Torneo all'italiana: ogni coppia di configurazioni gioca una partita per seme, alternando chi
+    inizia. Le partite di tutte le coppie sono distribuite tra i processi; appena una coppia ha
+    finito le sue partite, i risultati vengono salvati nella cartella della cache e le coppie già
+    salvate non vengono rigiocate.
+
+    :return: Dizionario (i, j) -> lista dei risultati delle partite tra le configurazioni i e j
+    """
+    os.makedirs(cartella_cache, exist_ok=True)
+    coppie = list(itertools.combinations(range(len(configurazioni)), 2))
+    risultati = {}
+    percorsi = {}
+
+    for i, j in coppie:
+        percorsi[i, j] = os.path.join(cartella_cache, chiave_coppia(configurazioni[i], configurazioni[j], semi_partite) + ".json")
+        if os.path.exists(percorsi[i, j]):
+            with open(percorsi[i, j]) as f:
+                risultati[i, j] = json.load(f)
+
+    da_giocare = [coppia for coppia in coppie if coppia not in risultati]
+    print(f"Coppie: {len(coppie)}, già in cache: {len(coppie) - len(da_giocare)}")
+    if not da_giocare:
+        return risultati
+
+    with ProcessPoolExecutor(max_workers=processi) as executor:
+        partite = {coppia: [executor.submit(gioca_partita_sweep, (configurazioni[coppia[0]], configurazioni[coppia[1]]),
+                                            partita, seme)
+                            for partita, seme in enumerate(semi_partite)]
+                   for coppia in da_giocare}
+
+        # Le coppie vengono salvate nell'ordine in cui sono state distribuite, cioè all'incirca in
+        # quello in cui finiscono
+        for coppia in da_giocare:
+            risultati[coppia] = [futuro.result() for futuro in partite[coppia]]
+            temporaneo = percorsi[coppia] + ".tmp"
+            with open(temporaneo, "w") as f:
+                json.dump(risultati[coppia], f)
+            os.replace(temporaneo, percorsi[coppia])
+
+    return risultati
+
+
+def stima_elo(num_configurazioni, risultati, iterazioni=200):
+    """
+    Stima l'Elo di ogni configurazione dai risultati del torneo con il modello di Bradley-Terry
+    (pareggi come mezze vittorie, più un pareggio fittizio per coppia perché la stima resti finita
+    anche con una coppia sempre vinta). Gli Elo sono centrati sulla media.
+    """
+    vittorie = [[0.] * num_configurazioni for _ in range(num_configurazioni)]
+    for (i, j), partite in risultati.items():
+        vittorie[i][j] += 0.5
+        vittorie[j][i] += 0.5
+        for partita in partite:
+            punti_i, punti_j = partita['punti']
+            esito = 1 if punti_i > punti_j else 0 if punti_i < punti_j else 0.5
+            vittorie[i][j] += esito
+            vittorie[j][i] += 1 - esito
+
+    forza = [1.] * num_configurazioni
+    for _ in range(iterazioni):
+        for i in range(num_configurazioni):
+            denominatore = sum((vittorie[i][j] + vittorie[j][i]) / (forza[i] + forza[j])
+                               for j in range(num_configurazioni) if j != i)
+            if denominatore:
+                forza[i] = sum(vittorie[i]) / denominatore
+        media = sum(math.log(f) for f in forza) / num_configurazioni
+        forza = [f / math.exp(media) for f in forza]
+
+    return [400 * math.log10(f) for f in forza]
+
+
+def crea_report(configurazioni, risultati, tempo_totale, semi_partite, seme):
+    num_configurazioni = len(configurazioni)
+    elo = stima_elo(num_configurazioni, risultati)
+
+    # Punteggio medio, partite, mosse e tempo di ricerca di ogni configurazione
+    punteggio = [0.] * num_configurazioni
+    partite = [0] * num_configurazioni
+    mosse = [0] * num_configurazioni
+    tempo_ricerca = [0.] * num_configurazioni
+    for (i, j), risultati_coppia in risultati.items():
+        for partita in risultati_coppia:
+            punti_i, punti_j = partita['punti']
+            esito = 1 if punti_i > punti_j else 0 if punti_i < punti_j else 0.5
+            for k, indice in enumerate((i, j)):
+                punteggio[indice] += esito if k == 0 else 1 - esito
+                partite[indice] += 1
+                mosse[indice] += partita['mosse'][k]
+                tempo_ricerca[indice] += partita['tempo_ricerca'][k]
+
+    # Forza per secondo di CPU: Elo sopra la configurazione più debole diviso per i secondi di
+    # ricerca spesi in media in una partita
+    elo_minimo = min(elo)
+    classifica = sorted(range(num_configurazioni), key=lambda i: elo[i], reverse=True)
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    report_path = f"reports/report_sweep_{timestamp}.txt"
+    os.makedirs("reports", exist_ok=True)
+
+    with open(report_path, "w") as f:
+        f.write("=== REPORT SWEEP CONFIGURAZIONI AGENTE MONTE CARLO ===\n\n")
+        f.write(f"Tempo totale di esecuzione: {tempo_totale:.2f} secondi\n")
+        f.write(f"Configurazioni: {num_configurazioni}, partite per coppia: {len(semi_partite)}, seme: {seme}\n\n")
+
+        f.write("Pos  Elo     Punteggio  CPU ms/mossa  Elo/CPU-s  Configurazione\n")
+        for posizione, i in enumerate(classifica):
+            tempo_per_partita = tempo_ricerca[i] / max(partite[i], 1)
+            efficienza = (elo[i] - elo_minimo) / tempo_per_partita if tempo_per_partita else 0.
+            f.write(f"{posizione + 1:<4} {elo[i]:>+6.0f}  {punteggio[i] / max(partite[i], 1) * 100:>8.1f}%  "
+                    f"{tempo_ricerca[i] / max(mosse[i], 1) * 1000:>12.1f}  {efficienza:>9.1f}  "
+                    f"{configurazioni[i].differenze() or 'predefinita'}\n")
+
+    return report_path
+
+
+def main(griglia=GRIGLIA_PREDEFINITA, partite_per_coppia=20, processi=None, seme=0, cartella_cache="reports/sweep"):
+    """
+    Confronta tutte le configurazioni della griglia in un torneo all'italiana e crea una
+    classifica per Elo, con la forza per secondo di CPU di ricerca. Tutte le coppie giocano le
+    stesse smazzate (gli stessi semi), così i confronti sono più precisi e le coppie già giocate
+    in uno sweep precedente con lo stesso seme vengono lette dalla cache.
+    """
+    start_time_total = time.time()
+    configurazioni = crea_configurazioni(griglia)
+
+    generatore_semi = random.Random(seme)
+    semi_partite = [generatore_semi.getrandbits(64) for _ in range(partite_per_coppia)]
+
+    risultati = gioca_torneo(configurazioni, semi_partite, processi or os.cpu_count(), cartella_cache)
+
+    report_path = crea_report(configurazioni, risultati, time.time() - start_time_total, semi_partite, seme)
+    print(f"Report creato: {report_path}")
+
+
+if __name__ == "__main__":
+    partite_per_coppia = int(input("Inserisci il numero di partite per coppia di configurazioni: "))
+    processi = input("Inserisci il numero di processi (invio per usare tutti i core): ")
+    main(partite_per_coppia=partite_per_coppia, processi=int(processi) if processi else None)
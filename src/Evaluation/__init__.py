@@ -1 +1 @@
-from .ValutationGame import ValutationGame
\ No newline at end of file
+from .ValutationGame import gioca_partita
@@ -6,6 +6,23 @@ class Carta:
         'S': 'Spade'
     }
 
+    # Le 40 carte sono singleton: ogni coppia (seme, valore) ha un'unica istanza,
+    # con un indice 0-39 (seme nell'ordine di Seme, poi valore) usato dalle maschere di bit
+    _istanze = {}
+
+    def __new__(cls, seme, valore):
+        chiave = (seme, int(valore))
+        carta = cls._istanze.get(chiave)
+        if carta is None:
+            semi = list(cls.Seme.values())
+            if seme not in semi or not 1 <= chiave[1] <= 10:
+                raise ValueError("Carta non valida.")
+            carta = super().__new__(cls)
+            carta.indice = semi.index(seme) * 10 + chiave[1] - 1
+            carta.bit = 1 << carta.indice
+            cls._istanze[chiave] = carta
+        return carta
+
     def __init__(self, seme, valore):
         self.seme = seme
         # Assicuriamoci che il valore sia un intero
@@ -25,6 +42,18 @@ class Carta:
         # Usa una combinazione di seme e valore per creare un hash unico
         return hash((self.valore, self.seme))
 
+    def __copy__(self):
+        """Le carte sono singleton: la copia è la carta stessa."""
+        return self
+
+    def __deepcopy__(self, memo):
+        """Le carte sono singleton: anche la copia profonda è la carta stessa."""
+        return self
+
+    def __reduce__(self):
+        """Ricostruisce la carta passando da __new__, così resta un singleton anche dopo pickle."""
+        return Carta, (self.seme, self.valore)
+
     @classmethod
     def da_sigla(cls, sigla):
         """Crea una carta a partire da una sigla come '1C'."""
@@ -37,3 +66,9 @@ class Carta:
             return cls(seme, valore)
         else:
             raise ValueError("Sigla non valida.")
+
+    @classmethod
+    def da_indice(cls, indice):
+        """Restituisce la carta con l'indice (0-39) dato."""
+        semi = list(cls.Seme.values())
+        return cls(semi[indice // 10], indice % 10 + 1)
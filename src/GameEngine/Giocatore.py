@@ -3,12 +3,24 @@ import time
 from GameEngine.Carta import Carta
 from GameEngine.Mazzo import Mazzo
 from GameEngine.Tavolo import Tavolo
+from GameEngine import Maschera
+from GameEngine.Prese import posizioni_prese
 class Giocatore:
     def __init__(self):
         self.carte_mano = []
         self.carte_raccolte = []
         self.scope = 0
 
+    @property
+    def maschera_mano(self):
+        """Carte in mano come maschera di bit (vedi GameEngine.Maschera)."""
+        return Maschera.da_carte(self.carte_mano)
+
+    @property
+    def maschera_raccolte(self):
+        """Carte raccolte come maschera di bit (vedi GameEngine.Maschera)."""
+        return Maschera.da_carte(self.carte_raccolte)
+
     def clear_screen(self):
         """Pulisce lo schermo del terminale."""
         if os.name == 'nt':  # Per Windows
@@ -44,26 +56,13 @@ class Giocatore:
 
     def cerca_prese_possibili(self, carta_giocata, carte_tavolo):
         """Cerca tutte le possibili prese con una carta"""
-        prese_possibili = []
-
-        # Cerca le prese dirette (stesso valore)
-        prese_dirette = [carta for carta in carte_tavolo if carta.valore == carta_giocata.valore]
-
-        # Aggiungi ogni presa diretta come una combinazione separata
-        for carta in prese_dirette:
-            prese_possibili.append([carta])
-
-        # Cerca le combinazioni di somme solo se non ci sono prese dirette
-        if not prese_dirette:
-            tutte_combinazioni = []
-            self.trova_combinazioni(carta_giocata.valore, carte_tavolo, [], tutte_combinazioni)
-
-            # Filtra le combinazioni per evitare duplicati
-            for combo in tutte_combinazioni:
-                if combo not in prese_possibili and len(combo) > 1:
-                    prese_possibili.append(combo)
-
-        return prese_possibili
+        # Le prese dirette (stesso valore) hanno la precedenza sulle combinazioni di somme;
+        # l'indice delle prese per i valori sul tavolo è precalcolato e condiviso tra le chiamate
+        valori_tavolo = tuple(carta.valore for carta in carte_tavolo)
+        return [
+            [carte_tavolo[posizione] for posizione in presa]
+            for presa in posizioni_prese(carta_giocata.valore, valori_tavolo)
+        ]
 
     def mostra_combinazioni(self, carta_giocata, combinazioni):
         """Mostra tutte le combinazioni possibili in modo chiaro"""
@@ -96,7 +95,7 @@ class Giocatore:
                 print("\n⚠️  Input non valido. Inserisci un numero.")
 
     def raccogli_carte(self, carta_giocata, carte_prese, tavolo):
-        """Raccoglie le carte dal tavolo"""
+        """Raccoglie le carte dal tavolo e restituisce True se la presa è una scopa"""
         # Prima rimuoviamo le carte dal tavolo
         for carta in carte_prese:
             tavolo.elimina_carta(carta)
@@ -108,32 +107,11 @@ class Giocatore:
         # La scopa viene assegnata solo se il tavolo è vuoto e non è l'ultima mano
         if len(tavolo.carte) == 0 and len(self.carte_mano) > 0:
             self.scope += 1
-            print("\n🌟 SCOPA! 🌟")
-            time.sleep(1.5)
-
-    def gioca_mano(self, tavolo):
-        """Permette al giocatore di scegliere una carta e gestisce la raccolta"""
-        if not self.carte_mano:
-            return False
-
-        # Se è presente un agente IA, usa l'IA per giocare
-        if hasattr(self, 'agente_ia'):
-            carta_da_giocare = self.agente_ia.scegli_mossa(tavolo)
-            prese_possibili = self.cerca_prese_possibili(carta_da_giocare, tavolo.carte)
-
-            if prese_possibili:
-                # Scegli automaticamente la miglior presa
-                miglior_presa = max(prese_possibili, key=lambda x: (len(x), sum(c.valore for c in x)))
-                self.raccogli_carte(carta_da_giocare, miglior_presa, tavolo)
-                print(
-                    f"\n🤖 IA ha giocato {carta_da_giocare} e raccolto: {' + '.join(str(carta) for carta in miglior_presa)}")
-            else:
-                tavolo.aggiungi_carta_da_giocatore(carta_da_giocare)
-                print(f"\n🤖 IA ha lasciato {carta_da_giocare} sul tavolo")
-
-            self.carte_mano.remove(carta_da_giocare)
-            return bool(prese_possibili)
+            return True
+        return False
 
+    def scegli_mossa(self, tavolo):
+        """Chiede da tastiera la carta da giocare e, se le prese possibili sono più di una, quale fare"""
         while True:  # Continua a chiedere input finché non è valido
             try:
                 scelta = input(f"\nScegli una carta da giocare (1-{len(self.carte_mano)}): ")
@@ -148,26 +126,14 @@ class Giocatore:
 
                 carta_da_giocare = self.carte_mano[scelta - 1]
                 prese_possibili = self.cerca_prese_possibili(carta_da_giocare, tavolo.carte)
-                ha_fatto_presa = False
-
-                if prese_possibili:
-                    if len(prese_possibili) == 1:
-                        self.raccogli_carte(carta_da_giocare, prese_possibili[0], tavolo)
-                        print(f"\n✅ Presa automatica: {' + '.join(str(carta) for carta in prese_possibili[0])}")
-                        ha_fatto_presa = True
-                    else:
-                        self.mostra_combinazioni(carta_da_giocare, prese_possibili)
-                        scelta_presa = self.get_valid_choice(len(prese_possibili))
-                        self.raccogli_carte(carta_da_giocare, prese_possibili[scelta_presa - 1], tavolo)
-                        print("\n✅ Carte raccolte con successo!")
-                        ha_fatto_presa = True
-                else:
-                    tavolo.aggiungi_carta_da_giocatore(carta_da_giocare)
-                    print("\n📌 Nessuna presa possibile, carta lasciata sul tavolo")
-
-                self.carte_mano.remove(carta_da_giocare)
-                time.sleep(1.5)
-                return ha_fatto_presa
+
+                if len(prese_possibili) > 1:
+                    self.mostra_combinazioni(carta_da_giocare, prese_possibili)
+                    scelta_presa = self.get_valid_choice(len(prese_possibili))
+                    return carta_da_giocare, prese_possibili[scelta_presa - 1]
+
+                # Con una sola presa possibile (o nessuna) la mossa è decisa dalla carta
+                return carta_da_giocare
 
             except ValueError:
                 print("⚠️  Input non valido. Inserisci un numero.")
@@ -0,0 +1,56 @@
+from GameEngine.Carta import Carta
+
+# Insiemi di carte come interi a 40 bit: il bit i corrisponde alla carta con indice i
+NUM_CARTE = 40
+TUTTE = (1 << NUM_CARTE) - 1
+
+CARTE = tuple(Carta.da_indice(i) for i in range(NUM_CARTE))  # Carta per indice
+VALORI = tuple(carta.valore for carta in CARTE)  # Valore per indice
+
+# Maschera delle dieci carte di ogni seme
+SEMI = {seme: sum(carta.bit for carta in CARTE if carta.seme == seme) for seme in Carta.Seme.values()}
+DENARI = SEMI['Denari']
+SETTEBELLO = Carta('Denari', 7).bit
+
+
+def da_carte(carte):
+    """Converte una lista di carte nella maschera corrispondente."""
+    maschera = 0
+    for carta in carte:
+        maschera |= carta.bit
+    return maschera
+
+
+def indici(maschera):
+    """Restituisce gli indici delle carte nella maschera, in ordine crescente."""
+    risultato = []
+    while maschera:
+        bit = maschera & -maschera
+        risultato.append(bit.bit_length() - 1)
+        maschera ^= bit
+    return risultato
+
+
+def carte(maschera):
+    """Converte una maschera nella lista delle carte, in ordine di indice."""
+    return [CARTE[i] for i in indici(maschera)]
+
+
+def conta(maschera):
+    """Numero di carte nella maschera."""
+    return maschera.bit_count()
+
+
+def conta_denari(maschera):
+    """Numero di carte di denari nella maschera."""
+    return (maschera & DENARI).bit_count()
+
+
+def ha_settebello(maschera):
+    """Verifica se la maschera contiene il settebello."""
+    return bool(maschera & SETTEBELLO)
+
+
+def somma_valori(maschera):
+    """Somma dei valori delle carte nella maschera."""
+    return sum(VALORI[i] for i in indici(maschera))
@@ -1,10 +1,11 @@
 from GameEngine.Carta import Carta
+from GameEngine import Maschera
 import random
 
 class Mazzo:
-    def __init__(self):
+    def __init__(self, rng=random):
         self.carte=self.crea_mazzo()
-        self.mescola()
+        self.mescola(rng)
 
     def crea_mazzo(self):
         semi=Carta.Seme
@@ -18,8 +19,14 @@ class Mazzo:
         except ValueError:
             print("La carta non è presente sul tavolo.")
 
-    def mescola(self):
-        random.shuffle(self.carte)
+    @property
+    def maschera(self):
+        """Carte nel mazzo come maschera di bit (vedi GameEngine.Maschera)."""
+        return Maschera.da_carte(self.carte)
+
+    def mescola(self, rng=random):
+        """Mescola il mazzo con il generatore dato (di default quello globale di random)."""
+        rng.shuffle(self.carte)
 
     def stampa_mazzo(self):
         for carta in self.carte:
@@ -0,0 +1,162 @@
+import random
+
+from GameEngine.Giocatore import Giocatore
+from GameEngine.Mazzo import Mazzo
+from GameEngine.Punteggio import Punteggio
+from GameEngine.Tavolo import Tavolo
+
+
+def miglior_presa(prese_possibili):
+    """Presa scelta automaticamente: la più numerosa, a parità quella con la somma più alta."""
+    return max(prese_possibili, key=lambda x: (len(x), sum(c.valore for c in x)))
+
+
+class Partita:
+    """
+    Partita di Scopa tra due agenti, senza input né output: il motore distribuisce le carte,
+    chiede a ogni agente la carta da giocare, applica prese e scope e calcola i punteggi.
+    Chi vuole mostrare la partita (l'interfaccia di Main.py) si iscrive ai suoi eventi.
+
+    Un agente è una funzione agente(giocatore, avversario, tavolo) che restituisce la carta da
+    giocare, oppure una coppia (carta, presa) per scegliere anche quale presa fare; se restituisce
+    solo la carta la presa è scelta con miglior_presa.
+
+    Gli eventi sono notificati come osservatore(evento, **dati):
+        'inizio_round' (numero), 'distribuzione' (iniziale), 'turno' (giocatore),
+        'mossa' (giocatore, carta, presa, scopa), 'carte_rimaste' (giocatore),
+        'fine_round' (numero, dettagli), 'fine_partita' (vincitore)
+    dove giocatore è l'indice (0 o 1) in partita.giocatori.
+    """
+
+    def __init__(self, agenti, seme=None, turno_iniziale=0, punti_vittoria=11):
+        """
+        :param agenti: Le due funzioni che scelgono le mosse dei giocatori
+        :param seme: Seme del generatore con cui la partita mescola i mazzi (None per usare il
+            generatore globale di random)
+        :param turno_iniziale: Giocatore (0 o 1) che inizia ogni round
+        :param punti_vittoria: Punti con cui si vince la partita
+        """
+        self.agenti = agenti
+        self.seme = seme
+        # Generatore proprio della partita: gli agenti e chi gioca la partita non lo condividono
+        self.random = random.Random(seme) if seme is not None else random
+        self.turno_iniziale = turno_iniziale
+        self.punti_vittoria = punti_vittoria
+        self.giocatori = [Giocatore(), Giocatore()]
+        self.punteggi = [Punteggio(), Punteggio()]
+        self.mazzo = None
+        self.tavolo = None
+        self.round = 0
+        self.osservatori = []
+
+    def iscrivi(self, osservatore):
+        """Aggiunge una funzione da chiamare a ogni evento della partita."""
+        self.osservatori.append(osservatore)
+
+    def _notifica(self, evento, **dati):
+        for osservatore in self.osservatori:
+            osservatore(evento, **dati)
+
+    def _distribuisci(self, iniziale=False):
+        """Distribuisce 3 carte a ogni giocatore e, a inizio round, 4 sul tavolo."""
+        if iniziale:
+            for _ in range(4):
+                if self.mazzo.carte:
+                    self.tavolo.aggiungi_carta_da_mazzo(self.mazzo.carte[0], self.mazzo)
+        for giocatore in self.giocatori:
+            for _ in range(3):
+                if self.mazzo.carte:
+                    giocatore.aggiungi_mano(self.mazzo.carte[0], self.mazzo)
+        self._notifica('distribuzione', iniziale=iniziale)
+
+    def gioca_mossa(self, indice):
+        """
+        Chiede all'agente del giocatore la sua mossa e la applica.
+
+        :param indice: Indice (0 o 1) del giocatore di turno
+        :return: True se il giocatore ha fatto una presa
+        """
+        giocatore = self.giocatori[indice]
+        mossa = self.agenti[indice](giocatore, self.giocatori[1 - indice], self.tavolo)
+        carta, presa = mossa if isinstance(mossa, tuple) else (mossa, None)
+
+        prese_possibili = giocatore.cerca_prese_possibili(carta, self.tavolo.carte)
+        scopa = False
+        if prese_possibili:
+            if presa is None:
+                presa = miglior_presa(prese_possibili)
+            scopa = giocatore.raccogli_carte(carta, presa, self.tavolo)
+        else:
+            presa = []
+            self.tavolo.aggiungi_carta_da_giocatore(carta)
+
+        giocatore.carte_mano.remove(carta)
+        self._notifica('mossa', giocatore=indice, carta=carta, presa=presa, scopa=scopa)
+        return bool(prese_possibili)
+
+    def gioca_round(self):
+        """
+        Gioca un round completo e aggiunge i punti del round ai punteggi dei giocatori.
+
+        :return: Dettagli dei punteggi del round dei due giocatori e numero di turni giocati
+        """
+        self.round += 1
+        self.mazzo = Mazzo(self.random)
+        self.tavolo = Tavolo()
+        ultimo_giocatore_presa = None
+        self._notifica('inizio_round', numero=self.round)
+
+        self._distribuisci(iniziale=True)
+
+        turno = self.turno_iniziale
+        while True:
+            if all(len(g.carte_mano) == 0 for g in self.giocatori):
+                if len(self.mazzo.carte) > 0:
+                    self._distribuisci()
+                else:
+                    # Le carte rimaste sul tavolo vanno all'ultimo giocatore che ha fatto una presa
+                    if ultimo_giocatore_presa is not None and self.tavolo.carte:
+                        self._notifica('carte_rimaste', giocatore=ultimo_giocatore_presa)
+                        for carta in self.tavolo.carte[:]:
+                            self.giocatori[ultimo_giocatore_presa].carte_raccolte.append(carta)
+                            self.tavolo.elimina_carta(carta)
+                    break
+
+            indice = turno % 2
+            if len(self.giocatori[indice].carte_mano) > 0:
+                self._notifica('turno', giocatore=indice)
+                if self.gioca_mossa(indice):
+                    ultimo_giocatore_presa = indice
+
+            turno += 1
+
+        punti_g1, dettagli_g1 = self.punteggi[0].calcola_punteggio_round(self.giocatori[0], self.giocatori[1])
+        punti_g2, dettagli_g2 = self.punteggi[1].calcola_punteggio_round(self.giocatori[1], self.giocatori[0])
+
+        self.punteggi[0].aggiungi_punteggio(punti_g1)
+        self.punteggi[1].aggiungi_punteggio(punti_g2)
+
+        self._notifica('fine_round', numero=self.round, dettagli=(dettagli_g1, dettagli_g2))
+        return dettagli_g1, dettagli_g2, turno
+
+    def gioca(self):
+        """
+        Gioca round finché un giocatore raggiunge i punti di vittoria; se li raggiungono entrambi
+        vince chi ha più punti (a parità il secondo giocatore).
+
+        :return: Indice (0 o 1) del vincitore
+        """
+        while True:
+            self.gioca_round()
+
+            if any(p.punteggio_totale >= self.punti_vittoria for p in self.punteggi):
+                break
+
+            for giocatore in self.giocatori:
+                giocatore.carte_mano = []
+                giocatore.carte_raccolte = []
+                giocatore.scope = 0
+
+        vincitore = 0 if self.punteggi[0].punteggio_totale > self.punteggi[1].punteggio_totale else 1
+        self._notifica('fine_partita', vincitore=vincitore)
+        return vincitore
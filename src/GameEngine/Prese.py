@@ -0,0 +1,58 @@
+from functools import lru_cache
+
+from GameEngine import Maschera
+from GameEngine.Maschera import VALORI
+
+
+@lru_cache(maxsize=8192)
+def indice_prese(valori):
+    """
+    Indice delle prese per una sequenza di valori sul tavolo.
+
+    Per ogni valore giocato (1-10) restituisce le prese come tuple di posizioni nella
+    sequenza: le prese dirette (stesso valore) se ce ne sono, altrimenti tutte le
+    combinazioni di almeno due carte che sommano al valore. L'ordine è quello della
+    ricerca ricorsiva di Giocatore.trova_combinazioni.
+
+    :param valori: Tupla dei valori delle carte sul tavolo, nell'ordine del tavolo
+    :return: Tupla di 11 elementi, indicizzata per valore giocato
+    """
+    combinazioni = [[] for _ in range(11)]
+
+    # Visita in profondità con somme limitate a 10: ogni combinazione viene generata una volta sola
+    pila = [(0, 0, ())]
+    while pila:
+        inizio, somma, posizioni = pila.pop()
+        for posizione in range(len(valori) - 1, inizio - 1, -1):
+            nuova_somma = somma + valori[posizione]
+            if nuova_somma <= 10:
+                pila.append((posizione + 1, nuova_somma, posizioni + (posizione,)))
+        if len(posizioni) > 1:
+            combinazioni[somma].append(posizioni)
+
+    prese = [()]
+    for valore in range(1, 11):
+        dirette = tuple((posizione,) for posizione, v in enumerate(valori) if v == valore)
+        prese.append(dirette if dirette else tuple(combinazioni[valore]))
+    return tuple(prese)
+
+
+def posizioni_prese(valore, valori):
+    """Prese possibili giocando una carta di valore dato, come tuple di posizioni sul tavolo."""
+    return indice_prese(valori)[valore]
+
+
+@lru_cache(maxsize=65536)
+def prese_tavolo(tavolo):
+    """
+    Prese possibili su un tavolo dato come maschera, come maschere di bit.
+
+    :param tavolo: Maschera delle carte sul tavolo
+    :return: Tupla di 11 elementi, indicizzata per valore giocato
+    """
+    sul_tavolo = Maschera.indici(tavolo)
+    bit = [1 << i for i in sul_tavolo]
+    return tuple(
+        tuple(sum(bit[posizione] for posizione in presa) for presa in prese)
+        for prese in indice_prese(tuple(VALORI[i] for i in sul_tavolo))
+    )
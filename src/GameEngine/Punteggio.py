@@ -1,3 +1,6 @@
+from GameEngine import Maschera
+
+
 class Punteggio:
     def __init__(self):
         self.punteggio_totale = 0
@@ -109,6 +112,67 @@ class Punteggio:
             'totale': punteggio_round
         }
 
+    def calcola_punteggio_round_lotto(self, raccolte_giocatore, raccolte_avversario, scope_giocatore):
+        """
+        Calcola i punteggi di molti round finiti in una volta, con gli stessi risultati di
+        calcola_punteggio_round (che resta il riferimento). Le carte raccolte di ogni round sono
+        una maschera di bit (bit i = carta con indice i) oppure una sequenza di 40 conteggi 0/1
+        indicizzata per carta; denari e settebello si contano con le maschere di GameEngine.Maschera
+        e la primiera con la tabella PRIMIERA_SEME.
+
+        :param raccolte_giocatore: Carte raccolte dal giocatore in ogni round
+        :param raccolte_avversario: Carte raccolte dall'avversario in ogni round
+        :param scope_giocatore: Scope del giocatore in ogni round
+        :return: Dizionario con una lista per categoria, con le chiavi numeriche dei dettagli di
+            calcola_punteggio_round
+        """
+        categorie = ('carte_lungo', 'carte_giocatore', 'carte_avversario', 'denari', 'denari_avversario',
+                     'settebello', 'scope', 'primiera', 'punteggio_primiera', 'punteggio_primiera_avv', 'totale')
+        risultato = {categoria: [] for categoria in categorie}
+        liste = [risultato[categoria] for categoria in categorie]
+        denari, settebello, primiera_seme = Maschera.DENARI, Maschera.SETTEBELLO, PRIMIERA_SEME
+
+        for raccolte, raccolte_avv, scope in zip(raccolte_giocatore, raccolte_avversario, scope_giocatore):
+            if hasattr(raccolte, '__len__'):
+                raccolte = self._maschera_da_conteggi(raccolte)
+            if hasattr(raccolte_avv, '__len__'):
+                raccolte_avv = self._maschera_da_conteggi(raccolte_avv)
+
+            carte, carte_avv = raccolte.bit_count(), raccolte_avv.bit_count()
+            denari_g, denari_avv = (raccolte & denari).bit_count(), (raccolte_avv & denari).bit_count()
+            primiera = (primiera_seme[raccolte & 1023] + primiera_seme[raccolte >> 10 & 1023] +
+                        primiera_seme[raccolte >> 20 & 1023] + primiera_seme[raccolte >> 30])
+            primiera_avv = (primiera_seme[raccolte_avv & 1023] + primiera_seme[raccolte_avv >> 10 & 1023] +
+                            primiera_seme[raccolte_avv >> 20 & 1023] + primiera_seme[raccolte_avv >> 30])
+
+            carte_lungo = 1 if carte > carte_avv else 0
+            punto_denari = 1 if denari_g > denari_avv else 0
+            punto_settebello = 1 if raccolte & settebello else 0
+            punto_primiera = 1 if primiera > primiera_avv else 0
+            totale = carte_lungo + punto_denari + punto_settebello + scope + punto_primiera
+
+            for lista, valore in zip(liste, (carte_lungo, carte, carte_avv, denari_g, denari_avv, punto_settebello,
+                                             scope, punto_primiera, primiera, primiera_avv, totale)):
+                lista.append(valore)
+
+        return risultato
+
+    @staticmethod
+    def _maschera_da_conteggi(conteggi):
+        """Converte una sequenza di 40 conteggi 0/1 per carta nella maschera di bit corrispondente."""
+        maschera = 0
+        for indice, conteggio in enumerate(conteggi):
+            if conteggio:
+                maschera |= 1 << indice
+        return maschera
+
     def aggiungi_punteggio(self, punti):
         """Aggiunge punti al punteggio totale"""
         self.punteggio_totale += punti
+
+
+# Miglior valore di primiera per ognuna delle 1024 maschere di un seme, per
+# calcola_punteggio_round_lotto (le carte di un seme hanno indici consecutivi, dal valore 1 al 10)
+PRIMIERA_SEME = tuple(max([Punteggio().calcola_valore_primiera(v + 1) for v in range(10) if maschera >> v & 1],
+                          default=0)
+                      for maschera in range(1 << 10))
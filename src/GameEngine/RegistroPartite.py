@@ -0,0 +1,338 @@
+import mmap
+import os
+import struct
+
+from GameEngine import Maschera
+from GameEngine.StatoCompatto import StatoCompatto
+
+# Formato binario delle partite registrate, un byte per carta (il suo indice 0-39).
+#
+# Il file inizia con INTESTAZIONE ed è seguito dai record delle partite, ognuno preceduto dalla
+# sua lunghezza (uint32). Un record contiene:
+#   - numero della partita (uint32), seme (uint64), flag (bit 0: seme presente), giocatore che
+#     inizia i round, numero di round e punti finali dei due giocatori (un byte ciascuno);
+#   - per ogni round: i 40 byte dell'ordine del mazzo all'inizio del round, il numero di mosse,
+#     le mosse e i dettagli del punteggio (carte, denari, settebello, scope e punteggio di
+#     primiera dei due giocatori, un byte ciascuno; gli altri dettagli se ne ricavano).
+# Una mossa è un byte: nei 6 bit bassi la carta giocata, nei 2 alti la presa, come posizione
+# tra le prese possibili di StatoCompatto.prese_possibili (0 nessuna presa, 1 e 2 la prima e
+# la seconda, 3 la terza o una successiva, seguito da un byte con quante posizioni la separano
+# dalla terza). La presa si decodifica quindi rigiocando il round, cosa che il lettore fa
+# comunque per ricostruire gli stati.
+#
+# Accanto al file c'è l'indice (stesso percorso con ESTENSIONE_INDICE): l'offset di ogni record
+# come uint64, per leggere la partita N senza scorrere le precedenti.
+INTESTAZIONE = b"SCPR\x01"
+ESTENSIONE_INDICE = ".idx"
+
+_LUNGHEZZA = struct.Struct("<I")
+_OFFSET = struct.Struct("<Q")
+_PARTITA = struct.Struct("<IQBBBBB")
+_DETTAGLI = struct.Struct("<10B")
+
+
+def _dettagli_da_byte(valori):
+    """Ricostruisce i dettagli del punteggio dei due giocatori (come in calcola_punteggio_round)."""
+    dettagli = []
+    for g, a in ((valori[:5], valori[5:]), (valori[5:], valori[:5])):
+        carte, denari, settebello, scope, primiera = g
+        carte_avv, denari_avv, _, _, primiera_avv = a
+        punti = {
+            'carte_lungo': 1 if carte > carte_avv else 0,
+            'carte_giocatore': carte,
+            'carte_avversario': carte_avv,
+            'denari': denari,
+            'denari_avversario': denari_avv,
+            'settebello': settebello,
+            'scope': scope,
+            'primiera': 1 if primiera > primiera_avv else 0,
+            'punteggio_primiera': primiera,
+            'punteggio_primiera_avv': primiera_avv,
+        }
+        punti['totale'] = (punti['carte_lungo'] + (1 if denari > denari_avv else 0) + settebello + scope +
+                           punti['primiera'])
+        dettagli.append(punti)
+    return tuple(dettagli)
+
+
+def codifica_round(ordine_mazzo, turno_iniziale, mosse, dettagli):
+    """
+    Codifica un round nel formato del registro, rigiocandolo per trovare la posizione di ogni presa.
+
+    :param ordine_mazzo: Indici delle 40 carte nell'ordine del mazzo a inizio round
+    :param turno_iniziale: Giocatore (0 o 1) che inizia il round
+    :param mosse: Mosse del round come coppie (indice carta, maschera presa)
+    :param dettagli: Dettagli del punteggio dei due giocatori (da calcola_punteggio_round)
+    """
+    dati = bytearray(ordine_mazzo)
+    dati.append(len(mosse))
+    stato = StatoCompatto.da_ordine_mazzo(ordine_mazzo, turno_iniziale)
+    for carta, presa in mosse:
+        prese = stato.prese_possibili(carta)
+        if presa not in prese and (presa or prese):
+            raise ValueError(f"Mossa non valida nel round registrato: carta {carta}, presa {presa:#x}")
+        posizione = prese.index(presa) + 1 if presa else 0
+        if posizione < 3:
+            dati.append(carta | posizione << 6)
+        else:
+            dati += bytes((carta | 3 << 6, posizione - 3))
+        stato.gioca(carta, presa)
+
+    dati += _DETTAGLI.pack(*(d[chiave] for d in dettagli for chiave in
+                             ('carte_giocatore', 'denari', 'settebello', 'scope', 'punteggio_primiera')))
+    return bytes(dati)
+
+
+class RegistratorePartita:
+    """
+    Osservatore di una Partita (vedi Partita.iscrivi) che ne raccoglie ordine del mazzo, mosse e
+    punteggi di ogni round; a partita finita codifica restituisce il record da scrivere.
+    """
+
+    def __init__(self, partita, numero=0):
+        """
+        :param partita: La Partita da registrare, a cui il registratore si iscrive
+        :param numero: Numero della partita, salvato nel record
+        """
+        self.partita = partita
+        self.numero = numero
+        self.round = []  # (ordine del mazzo, mosse, dettagli) per round
+        partita.iscrivi(self)
+
+    def __call__(self, evento, **dati):
+        if evento == 'inizio_round':
+            self.round.append(([carta.indice for carta in self.partita.mazzo.carte], [], None))
+        elif evento == 'mossa':
+            self.round[-1][1].append((dati['carta'].indice, Maschera.da_carte(dati['presa'])))
+        elif evento == 'fine_round':
+            ordine, mosse, _ = self.round[-1]
+            self.round[-1] = (ordine, mosse, dati['dettagli'])
+
+    def codifica(self):
+        """Restituisce il record della partita, da passare a ScrittoreRegistro.aggiungi."""
+        partita = self.partita
+        seme = partita.seme
+        dati = bytearray(_PARTITA.pack(self.numero, seme or 0, int(seme is not None), partita.turno_iniziale,
+                                       len(self.round), partita.punteggi[0].punteggio_totale,
+                                       partita.punteggi[1].punteggio_totale))
+        for ordine, mosse, dettagli in self.round:
+            dati += codifica_round(ordine, partita.turno_iniziale, mosse, dettagli)
+        return bytes(dati)
+
+
+def _fine_record(dati, offset):
+    """Fine del record che inizia a offset, o None se il record non è completo."""
+    if offset + _LUNGHEZZA.size > len(dati):
+        return None
+    fine = offset + _LUNGHEZZA.size + _LUNGHEZZA.unpack_from(dati, offset)[0]
+    return fine if fine <= len(dati) else None
+
+
+class ScrittoreRegistro:
+    """
+    Scrive i record delle partite in coda al file del registro e al suo indice. Aprendo un
+    registro esistente, un ultimo record incompleto lasciato da un'interruzione viene eliminato
+    e i record completi mancanti dall'indice vi vengono aggiunti.
+    """
+
+    def __init__(self, percorso):
+        self.percorso = percorso
+        self.file = open(percorso, "ab+")
+        self.file.seek(0)
+        if self.file.read(len(INTESTAZIONE)) != INTESTAZIONE:
+            if self.file.tell():
+                self.file.close()
+                raise ValueError(f"{percorso} non è un registro di partite")
+            self.file.write(INTESTAZIONE)
+            self.file.flush()
+            offset = []
+        else:
+            with open(percorso + ESTENSIONE_INDICE, "ab+") as f:
+                f.seek(0)
+                indice = f.read()
+            offset = [o for (o,) in _OFFSET.iter_unpack(indice[:len(indice) - len(indice) % _OFFSET.size])]
+
+        # Si controllano solo la coda dell'indice e i record scritti dopo l'ultimo indicizzato
+        with mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) as dati:
+            while offset and _fine_record(dati, offset[-1]) is None:
+                offset.pop()
+            fine = _fine_record(dati, offset[-1]) if offset else len(INTESTAZIONE)
+            while (successiva := _fine_record(dati, fine)) is not None:
+                offset.append(fine)
+                fine = successiva
+        self.file.truncate(fine)
+
+        self.file_indice = open(percorso + ESTENSIONE_INDICE, "wb")
+        self.file_indice.write(b"".join(_OFFSET.pack(o) for o in offset))
+        self.partite = len(offset)
+
+    def aggiungi(self, record):
+        """Aggiunge il record di una partita (vedi RegistratorePartita.codifica) e ne restituisce la posizione."""
+        offset = self.file.seek(0, os.SEEK_END)
+        self.file.write(_LUNGHEZZA.pack(len(record)) + record)
+        self.file_indice.write(_OFFSET.pack(offset))
+        self.partite += 1
+        return self.partite - 1
+
+    def flush(self):
+        """Porta su disco i record scritti finora."""
+        for f in (self.file, self.file_indice):
+            f.flush()
+            os.fsync(f.fileno())
+
+    def close(self):
+        self.file.close()
+        self.file_indice.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *eccezione):
+        self.close()
+
+
+class RoundRegistrato:
+    """Un round letto dal registro: ordine del mazzo, mosse (indice carta, maschera presa) e dettagli del punteggio."""
+
+    def __init__(self, ordine_mazzo, turno_iniziale, mosse, dettagli):
+        self.ordine_mazzo = ordine_mazzo
+        self.turno_iniziale = turno_iniziale
+        self.mosse = mosse
+        self.dettagli = dettagli
+
+    def stato(self, mosse=None):
+        """
+        Ricostruisce lo StatoCompatto del round dopo le prime mosse.
+
+        :param mosse: Numero di mosse da rigiocare (None per tutte, cioè il round finito)
+        """
+        stato = StatoCompatto.da_ordine_mazzo(self.ordine_mazzo, self.turno_iniziale)
+        for carta, presa in self.mosse[:mosse]:
+            stato.gioca(carta, presa)
+        return stato
+
+
+def _decodifica_round(dati, offset, turno_iniziale):
+    """Decodifica il round che inizia a offset e restituisce il RoundRegistrato e la fine del round."""
+    ordine_mazzo = tuple(dati[offset:offset + Maschera.NUM_CARTE])
+    offset += Maschera.NUM_CARTE
+    num_mosse = dati[offset]
+    offset += 1
+    stato = StatoCompatto.da_ordine_mazzo(ordine_mazzo, turno_iniziale)
+    mosse = []
+    for _ in range(num_mosse):
+        carta, posizione = dati[offset] & 63, dati[offset] >> 6
+        offset += 1
+        if posizione == 3:
+            posizione += dati[offset]
+            offset += 1
+        presa = stato.prese_possibili(carta)[posizione - 1] if posizione else 0
+        stato.gioca(carta, presa)
+        mosse.append((carta, presa))
+    dettagli = _dettagli_da_byte(_DETTAGLI.unpack_from(dati, offset))
+    return RoundRegistrato(ordine_mazzo, turno_iniziale, mosse, dettagli), offset + _DETTAGLI.size
+
+
+class RecordPartita:
+    """Una partita letta dal registro, con i suoi round (numerati da 0) e i punti finali."""
+
+    def __init__(self, numero, seme, turno_iniziale, punti, round):
+        self.numero = numero
+        self.seme = seme
+        self.turno_iniziale = turno_iniziale
+        self.punti = punti
+        self.round = round
+
+    @property
+    def vincitore(self):
+        """Vincitore come in Partita.gioca: a parità di punti il secondo giocatore."""
+        return 0 if self.punti[0] > self.punti[1] else 1
+
+    def stato(self, numero_round, mosse=None):
+        """StatoCompatto del round numero_round (da 0) dopo le prime mosse (None per tutte)."""
+        return self.round[numero_round].stato(mosse)
+
+    def stato_gioco(self, numero_round, mosse, configurazione=None):
+        """
+        ScopaGameState del round numero_round (da 0) dopo le prime mosse, dal punto di vista del
+        giocatore di turno, come lo costruirebbe l'agente in quel momento: la mano
+        dell'avversario e il mazzo restano nascosti.
+        """
+        from Agent.GameState import ScopaGameState
+        from Agent.Configurazione import CONFIGURAZIONE_PREDEFINITA
+        return ScopaGameState.da_stato_compatto(self.stato(numero_round, mosse),
+                                                configurazione or CONFIGURAZIONE_PREDEFINITA)
+
+
+class LettoreRegistro:
+    """
+    Legge un registro di partite mappandolo in memoria: la partita N si decodifica direttamente
+    dal suo offset nell'indice. Se l'indice manca viene ricostruito scorrendo il file.
+    """
+
+    def __init__(self, percorso):
+        self.percorso = percorso
+        with open(percorso, "rb") as f:
+            self.dati = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.dati[:len(INTESTAZIONE)] != INTESTAZIONE:
+            self.dati.close()
+            raise ValueError(f"{percorso} non è un registro di partite")
+
+        self.indice = None
+        percorso_indice = percorso + ESTENSIONE_INDICE
+        if os.path.exists(percorso_indice) and os.path.getsize(percorso_indice) >= _OFFSET.size:
+            with open(percorso_indice, "rb") as f:
+                self.indice = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self.partite = len(self.indice) // _OFFSET.size
+            # Record indicizzati ma non ancora (completamente) nel file non si contano
+            while self.partite and _fine_record(self.dati, self._offset(self.partite - 1)) is None:
+                self.partite -= 1
+        else:
+            self.offset = []
+            fine = len(INTESTAZIONE)
+            while (successiva := _fine_record(self.dati, fine)) is not None:
+                self.offset.append(fine)
+                fine = successiva
+            self.partite = len(self.offset)
+
+    def _offset(self, n):
+        if self.indice is None:
+            return self.offset[n]
+        return _OFFSET.unpack_from(self.indice, n * _OFFSET.size)[0]
+
+    def __len__(self):
+        return self.partite
+
+    def __getitem__(self, n):
+        """Decodifica la partita in posizione n (in ordine di scrittura) e restituisce il RecordPartita."""
+        if n < 0:
+            n += self.partite
+        if not 0 <= n < self.partite:
+            raise IndexError("Partita non presente nel registro")
+        offset = self._offset(n) + _LUNGHEZZA.size
+        numero, seme, flag, turno_iniziale, num_round, punti_g1, punti_g2 = _PARTITA.unpack_from(self.dati, offset)
+        offset += _PARTITA.size
+        round = []
+        for _ in range(num_round):
+            round_registrato, offset = _decodifica_round(self.dati, offset, turno_iniziale)
+            round.append(round_registrato)
+        return RecordPartita(numero, seme if flag & 1 else None, turno_iniziale, (punti_g1, punti_g2), round)
+
+    def __iter__(self):
+        for n in range(self.partite):
+            yield self[n]
+
+    def numeri(self):
+        """Numeri delle partite registrate, senza decodificarle."""
+        return [_PARTITA.unpack_from(self.dati, self._offset(n) + _LUNGHEZZA.size)[0] for n in range(self.partite)]
+
+    def close(self):
+        self.dati.close()
+        if self.indice is not None:
+            self.indice.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *eccezione):
+        self.close()
@@ -0,0 +1,84 @@
+import itertools
+
+# Coppe, Bastoni e Spade sono intercambiabili: il punteggio guarda solo ai denari (e al
+# settebello) e, per la primiera, alla miglior carta di ogni seme, qualunque esso sia. Scambiando
+# tra loro questi tre semi in tutte le carte di uno stato si ottiene quindi uno stato equivalente.
+# Una permutazione è una tupla con, per ogni seme (nell'ordine di Carta.Seme), il seme in cui va;
+# i denari restano sempre al loro posto.
+SEMI_LIBERI = (0, 1, 3)
+IDENTITA = (0, 1, 2, 3)
+
+
+def permutazione_canonica(*maschere):
+    """
+    Permutazione che porta le maschere date nella loro forma canonica: i tre semi liberi sono
+    ordinati in base alle loro carte in ciascuna maschera, nell'ordine delle maschere, così tutti
+    gli stati equivalenti hanno la stessa forma canonica. Due semi con le stesse carte in tutte
+    le maschere sono indistinguibili e il loro ordine non conta.
+    """
+    ordinati = sorted(SEMI_LIBERI, key=lambda seme: tuple(m >> 10 * seme & 1023 for m in maschere), reverse=True)
+    permutazione = list(IDENTITA)
+    for destinazione, seme in zip(SEMI_LIBERI, ordinati):
+        permutazione[seme] = destinazione
+    return tuple(permutazione)
+
+
+def permuta(maschera, permutazione):
+    """Maschera con i semi spostati secondo la permutazione."""
+    risultato = 0
+    for seme, destinazione in enumerate(permutazione):
+        risultato |= (maschera >> 10 * seme & 1023) << 10 * destinazione
+    return risultato
+
+
+def permuta_carta(indice, permutazione):
+    """Indice della carta con il seme spostato secondo la permutazione."""
+    return permutazione[indice // 10] * 10 + indice % 10
+
+
+def inversa(permutazione):
+    """Permutazione che riporta i semi al loro posto."""
+    risultato = [0] * len(permutazione)
+    for seme, destinazione in enumerate(permutazione):
+        risultato[destinazione] = seme
+    return tuple(risultato)
+
+
+def canonizza(*maschere):
+    """Restituisce le maschere in forma canonica e la permutazione usata (vedi permutazione_canonica)."""
+    permutazione = permutazione_canonica(*maschere)
+    return tuple(permuta(m, permutazione) for m in maschere), permutazione
+
+
+def canonizza_mossa(mossa, permutazione):
+    """Mossa (indice carta, maschera presa) con i semi spostati secondo la permutazione."""
+    carta, presa = mossa
+    return permuta_carta(carta, permutazione), permuta(presa, permutazione)
+
+
+def stabilizzatori(*maschere):
+    """
+    Permutazioni dei semi liberi, diverse dall'identità, che lasciano invariate tutte le maschere
+    date: con esse lo stato descritto dalle maschere resta lo stesso. Di solito non ce ne sono.
+    """
+    chiavi = [tuple(m >> 10 * seme & 1023 for m in maschere) for seme in SEMI_LIBERI]
+    if chiavi[0] != chiavi[1] and chiavi[0] != chiavi[2] and chiavi[1] != chiavi[2]:
+        return ()
+    risultato = []
+    for immagini in itertools.permutations(range(len(SEMI_LIBERI))):
+        if all(chiavi[i] == chiavi[j] for i, j in enumerate(immagini)) and immagini != (0, 1, 2):
+            permutazione = list(IDENTITA)
+            for i, j in enumerate(immagini):
+                permutazione[SEMI_LIBERI[i]] = SEMI_LIBERI[j]
+            risultato.append(tuple(permutazione))
+    return tuple(risultato)
+
+
+def rappresentante(mossa, permutazioni):
+    """
+    Rappresentante delle mosse equivalenti a quella data per le permutazioni (da stabilizzatori):
+    la minima tra la mossa e le sue immagini, uguale per tutte le mosse equivalenti.
+    """
+    if not permutazioni:
+        return mossa
+    return min(mossa, *(canonizza_mossa(mossa, permutazione) for permutazione in permutazioni))
@@ -0,0 +1,180 @@
+import random
+
+from GameEngine import Maschera
+from GameEngine.Maschera import VALORI, CARTE
+from GameEngine.Prese import prese_tavolo
+
+
+class StatoCompatto:
+    """
+    Stato completo di un round di Scopa tra due giocatori, con mani, tavolo, mazzo e
+    carte raccolte rappresentati come maschere di bit a 40 bit (vedi GameEngine.Maschera).
+    Copiare lo stato significa copiare pochi interi; l'ordine di pesca del mazzo è una
+    tupla immutabile condivisa tra le copie.
+    """
+
+    __slots__ = ('mani', 'raccolte', 'scope', 'tavolo', 'mazzo', 'ordine_mazzo', 'turno', 'ultimo_presa')
+
+    def __init__(self, mani=(0, 0), raccolte=(0, 0), scope=(0, 0), tavolo=0, ordine_mazzo=(), turno=0,
+                 ultimo_presa=None):
+        """
+        :param mani: Maschere delle carte in mano ai due giocatori
+        :param raccolte: Maschere delle carte raccolte dai due giocatori
+        :param scope: Numero di scope dei due giocatori
+        :param tavolo: Maschera delle carte sul tavolo
+        :param ordine_mazzo: Indici delle carte ancora nel mazzo, nell'ordine di pesca
+        :param turno: Giocatore (0 o 1) che deve muovere
+        :param ultimo_presa: Ultimo giocatore che ha fatto una presa (None se nessuno)
+        """
+        self.mani = list(mani)
+        self.raccolte = list(raccolte)
+        self.scope = list(scope)
+        self.tavolo = tavolo
+        self.ordine_mazzo = tuple(ordine_mazzo)
+        self.mazzo = sum(1 << i for i in self.ordine_mazzo)
+        self.turno = turno
+        self.ultimo_presa = ultimo_presa
+
+    @classmethod
+    def nuovo_round(cls, turno_iniziale=0, rng=random):
+        """Mescola un mazzo nuovo e distribuisce 4 carte sul tavolo e 3 a ciascun giocatore."""
+        ordine = list(range(Maschera.NUM_CARTE))
+        rng.shuffle(ordine)
+        return cls.da_ordine_mazzo(ordine, turno_iniziale)
+
+    @classmethod
+    def da_ordine_mazzo(cls, ordine, turno_iniziale=0):
+        """Inizia un round dal mazzo con l'ordine di pesca dato, distribuendo come nuovo_round."""
+        stato = cls(ordine_mazzo=ordine, turno=turno_iniziale)
+        for _ in range(4):
+            stato.tavolo |= stato._pesca()
+        stato.distribuisci()
+        return stato
+
+    @classmethod
+    def da_partita(cls, giocatori, tavolo, mazzo=None, turno=0, ultimo_presa=None):
+        """Costruisce lo stato compatto a partire dagli oggetti Giocatore, Tavolo e Mazzo."""
+        return cls(
+            mani=[g.maschera_mano for g in giocatori],
+            raccolte=[g.maschera_raccolte for g in giocatori],
+            scope=[g.scope for g in giocatori],
+            tavolo=tavolo.maschera,
+            ordine_mazzo=[carta.indice for carta in mazzo.carte] if mazzo is not None else (),
+            turno=turno,
+            ultimo_presa=ultimo_presa
+        )
+
+    def copia(self):
+        """Restituisce una copia indipendente dello stato."""
+        nuovo = StatoCompatto.__new__(StatoCompatto)
+        nuovo.mani = self.mani[:]
+        nuovo.raccolte = self.raccolte[:]
+        nuovo.scope = self.scope[:]
+        nuovo.tavolo = self.tavolo
+        nuovo.mazzo = self.mazzo
+        nuovo.ordine_mazzo = self.ordine_mazzo
+        nuovo.turno = self.turno
+        nuovo.ultimo_presa = self.ultimo_presa
+        return nuovo
+
+    def istantanea(self):
+        """Restituisce una tupla immutabile con tutto lo stato, da passare a ripristina."""
+        return (tuple(self.mani), tuple(self.raccolte), tuple(self.scope), self.tavolo, self.mazzo,
+                self.ordine_mazzo, self.turno, self.ultimo_presa)
+
+    def ripristina(self, istantanea):
+        """Riporta lo stato a un'istantanea presa con istantanea."""
+        mani, raccolte, scope, self.tavolo, self.mazzo, self.ordine_mazzo, self.turno, self.ultimo_presa = istantanea
+        self.mani = list(mani)
+        self.raccolte = list(raccolte)
+        self.scope = list(scope)
+
+    def _pesca(self):
+        """Toglie la prima carta dal mazzo e ne restituisce il bit."""
+        bit = 1 << self.ordine_mazzo[0]
+        self.ordine_mazzo = self.ordine_mazzo[1:]
+        self.mazzo &= ~bit
+        return bit
+
+    def distribuisci(self, num_carte=3):
+        """Distribuisce le carte ai giocatori, prima al giocatore 0 e poi al giocatore 1."""
+        for g in (0, 1):
+            for _ in range(num_carte):
+                if self.ordine_mazzo:
+                    self.mani[g] |= self._pesca()
+
+    @property
+    def terminato(self):
+        """Il round è finito quando mani e mazzo sono vuoti."""
+        return not (self.mani[0] or self.mani[1] or self.mazzo)
+
+    def prese_possibili(self, indice):
+        """
+        Restituisce le prese possibili (come maschere) giocando la carta con l'indice dato.
+        Le prese dirette (stesso valore) hanno la precedenza sulle combinazioni di somme.
+        """
+        return prese_tavolo(self.tavolo)[VALORI[indice]]
+
+    def mosse(self):
+        """Restituisce le mosse (indice carta, maschera presa) del giocatore di turno."""
+        mosse = []
+        prese_per_valore = prese_tavolo(self.tavolo)
+        for indice in Maschera.indici(self.mani[self.turno]):
+            prese = prese_per_valore[VALORI[indice]]
+            if prese:
+                mosse.extend((indice, presa) for presa in prese)
+            else:
+                mosse.append((indice, 0))
+        return mosse
+
+    def gioca(self, indice, presa=0):
+        """
+        Il giocatore di turno gioca la carta con l'indice dato, prendendo le carte in presa
+        (0 per lasciarla sul tavolo). Passa poi il turno, ridistribuisce quando entrambe le
+        mani sono vuote e, a fine mazzo, assegna le carte rimaste all'ultimo che ha preso.
+
+        :return: True se la mossa è stata una scopa
+        """
+        g = self.turno
+        bit = 1 << indice
+        self.mani[g] &= ~bit
+        scopa = False
+
+        if presa:
+            self.tavolo &= ~presa
+            self.raccolte[g] |= presa | bit
+            self.ultimo_presa = g
+            # Come in Giocatore.raccogli_carte, il controllo sulla mano avviene prima di
+            # togliere la carta giocata, quindi ogni tavolo svuotato vale una scopa
+            if not self.tavolo:
+                self.scope[g] += 1
+                scopa = True
+        else:
+            self.tavolo |= bit
+
+        self.turno = 1 - g
+
+        if not (self.mani[0] or self.mani[1]):
+            if self.mazzo:
+                self.distribuisci()
+            elif self.ultimo_presa is not None and self.tavolo:
+                self.raccolte[self.ultimo_presa] |= self.tavolo
+                self.tavolo = 0
+
+        return scopa
+
+    def carte_mano(self, giocatore):
+        """Carte in mano al giocatore, in ordine di indice."""
+        return Maschera.carte(self.mani[giocatore])
+
+    def carte_raccolte(self, giocatore):
+        """Carte raccolte dal giocatore, in ordine di indice."""
+        return Maschera.carte(self.raccolte[giocatore])
+
+    def carte_tavolo(self):
+        """Carte sul tavolo, in ordine di indice."""
+        return Maschera.carte(self.tavolo)
+
+    def carte_mazzo(self):
+        """Carte ancora nel mazzo, nell'ordine di pesca."""
+        return [CARTE[i] for i in self.ordine_mazzo]
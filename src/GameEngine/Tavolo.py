@@ -1,3 +1,5 @@
+from GameEngine import Maschera
+
 class Tavolo:
 
     def __init__(self):
@@ -17,6 +19,11 @@ class Tavolo:
         except ValueError:
             print("La carta non è presente sul tavolo.")
 
+    @property
+    def maschera(self):
+        """Carte sul tavolo come maschera di bit (vedi GameEngine.Maschera)."""
+        return Maschera.da_carte(self.carte)
+
 
 
     def stampa_carte(self):
@@ -2,4 +2,6 @@ from .Carta import Carta
 from .Giocatore import Giocatore
 from  .Mazzo import Mazzo
 from .Punteggio import Punteggio
-from .Tavolo import Tavolo
\ No newline at end of file
+from .Tavolo import Tavolo
+from .StatoCompatto import StatoCompatto
+from .Partita import Partita
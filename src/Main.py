@@ -1,11 +1,8 @@
-from GameEngine.Mazzo import Mazzo
-from GameEngine.Tavolo import Tavolo
-from GameEngine.Giocatore import Giocatore
-from GameEngine.Punteggio import Punteggio
+from GameEngine.Partita import Partita
 from GameEngine.Carta import Carta
 import os
 import time
-from Agent.AgenteMonteCarlo import AgenteMonteCarlo
+from Agent.AgenteMonteCarlo import StrategiaMonteCarlo
 
 def clear_screen():
     """Pulisce lo schermo del terminale in modo cross-platform."""
@@ -33,25 +30,15 @@ def print_separator():
     print("\n" + "═" * 50 + "\n")
 
 
-def distribuisci_carte(mazzo, tavolo, giocatori, num_carte):
-    """Distribuisce le carte ai giocatori e sul tavolo."""
-    # Prima distribuisci le carte sul tavolo solo all'inizio della partita
-    if tavolo.carte == [] and all(len(g.carte_raccolte) == 0 for g in giocatori):  # Controlla se è l'inizio della partita
+def mostra_distribuzione(iniziale, num_carte):
+    """Mostra la distribuzione delle carte, una al secondo."""
+    if iniziale:
         print("\n🎴 Distribuisco le carte sul tavolo...")
-        for _ in range(4):
-            if mazzo.carte:
-                carta = mazzo.carte[0]
-                tavolo.aggiungi_carta_da_mazzo(carta, mazzo)
-                time.sleep(1)
-
-    # Poi distribuisci ai giocatori
-    print("🎴 Distribuisco le carte ai giocatori...")
-    for giocatore in giocatori:
-        for _ in range(num_carte):
-            if mazzo.carte:
-                carta = mazzo.carte[0]
-                giocatore.aggiungi_mano(carta, mazzo)
-                time.sleep(1)
+        time.sleep(4)
+        print("🎴 Distribuisco le carte ai giocatori...")
+    else:
+        print("\n🎴 Distribuisco nuove carte...")
+    time.sleep(num_carte)
 
 
 def mostra_stato_gioco(giocatore_num, tavolo, giocatore_attivo, giocatore_inattivo):
@@ -226,135 +213,80 @@ def mostra_punteggio_totale(punteggio_g1, punteggio_g2):
     print(f"Giocatore 2: {punteggio_g2.punteggio_totale} punti")
 
 
-def gioca_round(giocatori, punteggi):
-    """Gestisce un singolo round di gioco"""
-    mazzo = Mazzo()
-    tavolo = Tavolo()
-    ultimo_giocatore_presa = None
-    primo_giro = True  # Flag per tracciare se siamo al primo giro
-
-    # Aggiungi l'AgenteMonteCarlo al secondo giocatore
-    giocatori[1].agente_ia = AgenteMonteCarlo(giocatori[1])
-
-    # Distribuzione iniziale
-    distribuisci_carte(mazzo, tavolo, giocatori, 3)
-
-    # Ciclo di gioco del round
-    turno = 0
-    while True:
-        # Controlla se è necessario ridistribuire le carte
-        if all(len(g.carte_mano) == 0 for g in giocatori):
-            if len(mazzo.carte) > 0:
-                print("\n🎴 Distribuisco nuove carte...")
-                # Distribuisci solo ai giocatori, non sul tavolo
-                for giocatore in giocatori:
-                    for _ in range(3):
-                        if mazzo.carte:
-                            carta = mazzo.carte[0]
-                            giocatore.aggiungi_mano(carta, mazzo)
-                            time.sleep(1)
-            else:
-                # Assegna le carte rimanenti all'ultimo giocatore che ha fatto presa
-                if ultimo_giocatore_presa is not None and tavolo.carte:
-                    print(f"\nLe carte rimanenti vanno al Giocatore {ultimo_giocatore_presa + 1}")
-                    for carta in tavolo.carte[:]:
-                        giocatori[ultimo_giocatore_presa].carte_raccolte.append(carta)
-                        tavolo.elimina_carta(carta)
-                break
-
-        giocatore_corrente = giocatori[turno % 2]
-        giocatore_inattivo = giocatori[(turno + 1) % 2]
-        giocatore_num = (turno % 2) + 1
-
-        # Mostra lo stato del gioco
-        mostra_stato_gioco(giocatore_num, tavolo, giocatore_corrente, giocatore_inattivo)
-
-        # Gestione del turno
-        if len(giocatore_corrente.carte_mano) > 0:
-            # Per il giocatore 1, mantieni il comportamento originale
-            if turno % 2 == 0:
-                ha_fatto_presa = giocatore_corrente.gioca_mano(tavolo)
-            else:
-                # Per il giocatore 2 (IA), usa l'AgenteMonteCarlo
-                carta_da_giocare = giocatore_corrente.agente_ia.scegli_mossa(tavolo)
-                prese_possibili = giocatore_corrente.cerca_prese_possibili(carta_da_giocare, tavolo.carte)
-
-                if prese_possibili:
-                    # Scegli automaticamente la miglior presa
-                    miglior_presa = max(prese_possibili, key=lambda x: (len(x), sum(c.valore for c in x)))
-                    giocatore_corrente.raccogli_carte(carta_da_giocare, miglior_presa, tavolo)
-
-                    # Stampa le mosse dell'IA per il giocatore 1
-                    print(f"\n🤖 IA ha giocato {carta_da_giocare}")
-                    print(f"🤖 Carte prese: {' + '.join(str(carta) for carta in miglior_presa)}")
+def mostra_evento(partita, evento, **dati):
+    """Mostra all'utente un evento della partita (vedi GameEngine.Partita)"""
+    giocatori = partita.giocatori
 
-                    ha_fatto_presa = True
-                else:
-                    tavolo.aggiungi_carta_da_giocatore(carta_da_giocare)
-                    print(f"\n🤖 IA ha lasciato {carta_da_giocare} sul tavolo")
-                    ha_fatto_presa = False
+    if evento == 'inizio_round':
+        if dati['numero'] > 1:
+            input("\nPremi Enter per iniziare il prossimo round...")
+        print(f"\n🎮 Round {dati['numero']}")
+        print_separator()
 
-                giocatore_corrente.carte_mano.remove(carta_da_giocare)
+    elif evento == 'distribuzione':
+        mostra_distribuzione(dati['iniziale'], sum(len(g.carte_mano) for g in giocatori))
 
-                # Pausa per permettere al giocatore 1 di leggere le mosse dell'IA
-                input("\nPremi Enter per continuare...")
+    elif evento == 'turno':
+        indice = dati['giocatore']
+        mostra_stato_gioco(indice + 1, partita.tavolo, giocatori[indice], giocatori[1 - indice])
 
-            if ha_fatto_presa:
-                ultimo_giocatore_presa = turno % 2
+    elif evento == 'mossa':
+        carta, presa = dati['carta'], dati['presa']
+        if dati['scopa']:
+            print("\n🌟 SCOPA! 🌟")
+            time.sleep(1.5)
 
-        turno += 1
+        if dati['giocatore'] == 0:
+            if presa:
+                print(f"\n✅ Carte raccolte: {' + '.join(str(c) for c in presa)}")
+            else:
+                print("\n📌 Nessuna presa possibile, carta lasciata sul tavolo")
+            time.sleep(1.5)
+        else:
+            # Stampa le mosse dell'IA e aspetta che il giocatore 1 le abbia lette
+            if presa:
+                print(f"\n🤖 IA ha giocato {carta}")
+                print(f"🤖 Carte prese: {' + '.join(str(c) for c in presa)}")
+            else:
+                print(f"\n🤖 IA ha lasciato {carta} sul tavolo")
+            input("\nPremi Enter per continuare...")
 
-    # Resto del codice rimane invariato
-    punti_g1, dettagli_g1 = punteggi[0].calcola_punteggio_round(giocatori[0], giocatori[1])
-    punti_g2, dettagli_g2 = punteggi[1].calcola_punteggio_round(giocatori[1], giocatori[0])
+    elif evento == 'carte_rimaste':
+        print(f"\nLe carte rimanenti vanno al Giocatore {dati['giocatore'] + 1}")
 
-    punteggi[0].aggiungi_punteggio(punti_g1)
-    punteggi[1].aggiungi_punteggio(punti_g2)
+    elif evento == 'fine_round':
+        dettagli_g1, dettagli_g2 = dati['dettagli']
+        clear_screen()
+        print_banner()
+        print(f"\n🎯 Fine del Round {dati['numero']}!")
+        mostra_punteggio_round(dettagli_g1, dettagli_g2, giocatori)
+        mostra_punteggio_totale(partita.punteggi[0], partita.punteggi[1])
 
-    return dettagli_g1, dettagli_g2
+    elif evento == 'fine_partita':
+        print("\n🏆 PARTITA CONCLUSA! 🏆")
+        print(f"Vince il Giocatore {dati['vincitore'] + 1}!")
 
 
 def main():
     clear_screen()
     print_banner()
 
-    # Inizializzazione dei giocatori e punteggi
-    giocatori = [Giocatore(), Giocatore()]
-    punteggi = [Punteggio(), Punteggio()]
-
-    round_num = 1
-    while True:
-        print(f"\n🎮 Round {round_num}")
-        print_separator()
-
-        # Gioca il round
-        dettagli_g1, dettagli_g2 = gioca_round(giocatori, punteggi)
-
-        # Mostra i punteggi del round
-        clear_screen()
-        print_banner()
-        print(f"\n🎯 Fine del Round {round_num}!")
-        mostra_punteggio_round(dettagli_g1, dettagli_g2, giocatori)
-        mostra_punteggio_totale(punteggi[0], punteggi[1])
-
-        # Controlla se qualcuno ha raggiunto o superato 11 punti
-        if punteggi[0].punteggio_totale >= 11 or punteggi[1].punteggio_totale >= 11:
-            print("\n🏆 PARTITA CONCLUSA! 🏆")
-            # Se entrambi hanno superato 11 punti, vince chi ha il punteggio più alto
-            if punteggi[0].punteggio_totale > punteggi[1].punteggio_totale:
-                print("Vince il Giocatore 1!")
-            else:
-                print("Vince il Giocatore 2!")
-            break
+    # Il giocatore 1 sceglie da tastiera; il giocatore 2 è l'AgenteMonteCarlo, con un tempo fisso
+    # di ricerca per mossa così l'attesa non dipende da quante carte ci sono sul tavolo
+    ia = StrategiaMonteCarlo(iterazioni=None, tempo_per_mossa=0.5)
 
-        # Prepara il prossimo round
-        round_num += 1
-        for giocatore in giocatori:
-            giocatore.carte_mano = []
-            giocatore.carte_raccolte = []
-            giocatore.scope = 0
+    def scegli_mossa_giocatore(giocatore, avversario, tavolo):
+        # Mentre il giocatore sceglie, l'IA riflette già sulle sue possibili mosse, così la sua
+        # risposta arriva quasi subito
+        ia.rifletti(avversario, giocatore, tavolo)
+        return giocatore.scegli_mossa(tavolo)
 
-        input("\nPremi Enter per iniziare il prossimo round...")
+    partita = Partita([scegli_mossa_giocatore, ia])
+    partita.iscrivi(lambda evento, **dati: mostra_evento(partita, evento, **dati))
+    try:
+        partita.gioca()
+    finally:
+        ia.ferma_riflessione()
 
     print_separator()
     input("\nPremi Enter per uscire...")
@@ -1,2 +1,3 @@
 from .montecarlo import MonteCarlo
-from .node import Node
\ No newline at end of file
+from .node import Node
+from .arraytree import ArrayMonteCarlo, ArrayTree, ArrayNode, TranspositionTable
\ No newline at end of file
@@ -0,0 +1,792 @@
+import random
+import time
+from array import array
+from collections import OrderedDict
+from math import log, sqrt
+
+# Tree store with preallocated contiguous arrays: node i is described by the i-th item of
+# every array. The children of a node form a linked list (first_child, next_sibling), so a
+# node can gain children at any time, e.g. when a new determinization makes available a move
+# that had never been seen before
+
+class ArrayTree:
+
+	# Arrays holding one item per node, copied as they are when a subtree is moved to another tree
+	node_fields = ('visits', 'win_value', 'policy_value', 'has_policy', 'discovery_factor', 'weight', 'exploit',
+		'explore', 'availability', 'tie_break', 'player_number', 'child_count', 'expanded', 'terminal',
+		'terminal_value', 'has_terminal_value', 'expansion_key', 'moves', 'state_keys')
+
+	def __init__(self, capacity = 8192, seed = None):
+		self.capacity = capacity
+		self.size = 0
+		self.full = False
+		# Without an explicit seed the generator is seeded from the global one, so a search is
+		# reproducible whenever the global random module is
+		self.random = random.Random(random.getrandbits(64) if seed is None else seed)
+
+		self.visits = array('l', [0]) * capacity
+		self.win_value = array('d', [0.]) * capacity
+		self.policy_value = array('d', [0.]) * capacity
+		self.has_policy = array('b', [0]) * capacity
+		self.discovery_factor = array('d', [0.]) * capacity
+		# discovery_factor * (policy_value or 1), the constant part of the exploration term
+		self.weight = array('d', [0.]) * capacity
+		# win_value / visits and weight / sqrt(visits), the per-child terms of the UCB score
+		self.exploit = array('d', [0.]) * capacity
+		self.explore = array('d', [0.]) * capacity
+		# Number of times the parent was visited while the move of this node was available
+		self.availability = array('l', [0]) * capacity
+		self.tie_break = array('d', [0.]) * capacity
+		self.player_number = array('b', [0]) * capacity
+		self.parent = array('l', [-1]) * capacity
+		self.first_child = array('l', [-1]) * capacity
+		self.last_child = array('l', [-1]) * capacity
+		self.next_sibling = array('l', [-1]) * capacity
+		self.child_count = array('l', [0]) * capacity
+		self.expanded = array('b', [0]) * capacity
+		self.terminal = array('b', [0]) * capacity
+		# Value of a node without children, backpropagated again each time it is selected
+		self.terminal_value = array('d', [0.]) * capacity
+		self.has_terminal_value = array('b', [0]) * capacity
+		# Opaque value owned by child_finder, e.g. the moves it has already added to the node
+		self.expansion_key = array('q', [0]) * capacity
+		self.moves = [None] * capacity
+		# Transposition key of the state reached at the node and the TranspositionTable entry
+		# whose statistics the node shares, if any
+		self.state_keys = [None] * capacity
+		self.shared = [None] * capacity
+
+	def add_node(self, parent, move, player_number = None, policy_value = None, discovery_factor = 0.35):
+		if self.size == self.capacity:
+			self.full = True
+			return -1
+
+		index = self.size
+		self.size += 1
+
+		self.visits[index] = 0
+		self.win_value[index] = 0.
+		self.policy_value[index] = policy_value or 0.
+		self.has_policy[index] = policy_value is not None
+		self.discovery_factor[index] = discovery_factor
+		self.weight[index] = discovery_factor * (policy_value or 1)
+		self.exploit[index] = 0.
+		self.explore[index] = self.weight[index]
+		self.availability[index] = 0
+		self.tie_break[index] = self.random.random()
+		self.player_number[index] = player_number or 0
+		self.parent[index] = parent
+		self.first_child[index] = -1
+		self.last_child[index] = -1
+		self.next_sibling[index] = -1
+		self.child_count[index] = 0
+		self.expanded[index] = 0
+		self.terminal[index] = 0
+		self.has_terminal_value[index] = 0
+		self.expansion_key[index] = 0
+		self.moves[index] = move
+		self.state_keys[index] = None
+		self.shared[index] = None
+
+		if parent >= 0:
+			if self.child_count[parent]:
+				self.next_sibling[self.last_child[parent]] = index
+			else:
+				self.first_child[parent] = index
+			self.last_child[parent] = index
+			self.child_count[parent] += 1
+
+		return index
+
+	def children(self, index):
+		children = []
+		child = self.first_child[index]
+		next_sibling = self.next_sibling
+
+		while child >= 0:
+			children.append(child)
+			child = next_sibling[child]
+
+		return children
+
+	def truncate(self, index, size):
+		# Drops every node from size onwards, which must all be descendants of index, and
+		# forgets the children of index
+		self.size = size
+		self.first_child[index] = -1
+		self.last_child[index] = -1
+		self.child_count[index] = 0
+		self.expansion_key[index] = 0
+
+	def remove_children(self, index):
+		# Only valid for the most recently allocated children, which sit at the end of the arrays
+		if self.child_count[index]:
+			self.truncate(index, self.first_child[index])
+
+	def keep_only_child(self, index, child):
+		# Unlinks the siblings of child, their slots are reclaimed when the rollout is truncated
+		self.first_child[index] = child
+		self.last_child[index] = child
+		self.next_sibling[child] = -1
+		self.child_count[index] = 1
+		return child
+
+	def copy_subtree(self, index, tree):
+		# Copies the subtree rooted at index into the empty tree, where it becomes the root.
+		# Nodes are renumbered in breadth-first order, so sibling lists stay in the same order
+		order = [index]
+		position = 0
+
+		while position < len(order):
+			order.extend(self.children(order[position]))
+			position += 1
+
+		new_index = {old: new for new, old in enumerate(order)}
+		new_index[-1] = -1
+
+		for name in self.node_fields:
+			source = getattr(self, name)
+			target = getattr(tree, name)
+
+			for new, old in enumerate(order):
+				target[new] = source[old]
+
+		for new, old in enumerate(order):
+			tree.parent[new] = new_index[self.parent[old]] if new else -1
+			tree.first_child[new] = new_index[self.first_child[old]]
+			tree.last_child[new] = new_index[self.last_child[old]]
+			tree.next_sibling[new] = new_index[self.next_sibling[old]] if new else -1
+
+		tree.size = len(order)
+
+	def update_win_value(self, index, value):
+		win_value = self.win_value
+		visits = self.visits
+		shared = self.shared
+
+		while index >= 0:
+			entry = shared[index]
+
+			if entry is None:
+				win_value[index] += value
+				visits[index] += 1
+				self.exploit[index] = win_value[index] / visits[index]
+				self.explore[index] = self.weight[index] / sqrt(visits[index])
+			else:
+				# A transposed node: the shared statistics change for every node reaching the
+				# same state, while the ancestors updated are only those of the path taken
+				entry[0] += 1
+				entry[1] += value
+				self.set_statistics(entry[2], entry[0], entry[1])
+
+			index = self.parent[index]
+
+	def set_statistics(self, indices, visits, win_value):
+		for index in indices:
+			self.visits[index] = visits
+			self.win_value[index] = win_value
+			self.exploit[index] = win_value / visits if visits else 0.
+			self.explore[index] = self.weight[index] / sqrt(visits) if visits else self.weight[index]
+
+	def is_scorable(self, index):
+		return self.visits[index] or self.has_policy[index]
+
+	def get_preferred_child(self, index, root_player_number):
+		first = self.first_child[index]
+
+		if self.child_count[index] == 1:
+			return first
+
+		# The per-child terms of the UCB score are kept up to date by update_win_value, so
+		# scoring the children is one multiply-add per child with the parent's log
+		# computed a single time
+		exploit = self.exploit
+		explore = self.explore
+		tie_break = self.tie_break
+		next_sibling = self.next_sibling
+		sqrt_log_visits = sqrt(log(self.visits[index] or 1))
+		win_multiplier = 1. if self.player_number[index] == root_player_number else -1.
+
+		best_child = first
+		best_score = float('-inf')
+		child = first
+
+		while child >= 0:
+			score = win_multiplier * exploit[child] + explore[child] * sqrt_log_visits
+
+			# Ties go to the child with the highest tie_break key, drawn from the seeded generator
+			if score > best_score or (score == best_score and tie_break[child] > tie_break[best_child]):
+				best_score = score
+				best_child = child
+
+			child = next_sibling[child]
+
+		return best_child
+
+	def get_preferred_available_child(self, index, root_player_number, is_available):
+		# Information-set selection: only the children whose move is available in the current
+		# determinization compete, and the exploration term uses how many times each of them was
+		# available instead of the visits of the parent. Returns the chosen child (-1 if none is
+		# available), the available children never visited, which must be expanded first, and
+		# the number of available children
+		visits = self.visits
+		exploit = self.exploit
+		explore = self.explore
+		availability = self.availability
+		tie_break = self.tie_break
+		next_sibling = self.next_sibling
+		moves = self.moves
+		win_multiplier = 1. if self.player_number[index] == root_player_number else -1.
+
+		best_child = -1
+		best_score = float('-inf')
+		unvisited = []
+		available = 0
+		child = self.first_child[index]
+
+		while child >= 0:
+			if is_available(moves[child]):
+				availability[child] += 1
+				available += 1
+
+				if not visits[child]:
+					unvisited.append(child)
+				else:
+					score = win_multiplier * exploit[child] + explore[child] * sqrt(log(availability[child]))
+
+					if score > best_score or (score == best_score and tie_break[child] > tie_break[best_child]):
+						best_score = score
+						best_child = child
+
+			child = next_sibling[child]
+
+		return best_child, unvisited, available
+
+# Transposition table for an ArrayTree: nodes reaching the same state along different move
+# orders share one entry, whose visits and win value are mirrored into every node of the group,
+# so selection anywhere in the tree sees the statistics gathered through all the paths. The
+# subtrees stay separate, but their nodes are transpositions of each other too and share in
+# turn. The table holds at most capacity entries and evicts the least recently hit one; the
+# nodes of an evicted entry keep their statistics and go on updating them on their own
+
+class TranspositionTable:
+
+	def __init__(self, capacity = 65536):
+		self.capacity = capacity
+		self.entries = OrderedDict()
+		self.lookups = 0
+		self.hits = 0
+		self.evictions = 0
+
+	def reset_counters(self):
+		self.lookups = 0
+		self.hits = 0
+		self.evictions = 0
+
+	@property
+	def hit_rate(self):
+		return self.hits / self.lookups if self.lookups else 0.
+
+	def register(self, tree, index, key):
+		# Called the first time the node is visited, with the key of the state it reaches
+		tree.state_keys[index] = key
+		self.lookups += 1
+		entry = self.entries.get(key)
+
+		if entry is None:
+			if len(self.entries) >= self.capacity:
+				self.evict(tree)
+
+			entry = [tree.visits[index], tree.win_value[index], [index]]
+			self.entries[key] = entry
+		else:
+			self.hits += 1
+			self.entries.move_to_end(key)
+			entry[2].append(index)
+			tree.set_statistics((index,), entry[0], entry[1])
+
+		tree.shared[index] = entry
+
+	def evict(self, tree):
+		key, entry = self.entries.popitem(last = False)
+		self.evictions += 1
+
+		for index in entry[2]:
+			tree.shared[index] = None
+
+	def rebuild(self, tree):
+		# Regroups the nodes of a tree whose indices changed, e.g. after a reroot. A group takes
+		# the statistics of its most visited node
+		self.entries.clear()
+		groups = {}
+
+		for index in range(tree.size):
+			key = tree.state_keys[index]
+
+			if key is not None:
+				groups.setdefault(key, []).append(index)
+
+		for key, indices in groups.items():
+			if len(self.entries) >= self.capacity:
+				break
+
+			best = max(indices, key = lambda index: tree.visits[index])
+			entry = [tree.visits[best], tree.win_value[best], indices]
+			tree.set_statistics(indices, entry[0], entry[1])
+			self.entries[key] = entry
+
+			for index in indices:
+				tree.shared[index] = entry
+
+# Lightweight handle exposing a node of an ArrayTree with the attributes of Node, so
+# child_finder and node_evaluator callbacks work unchanged on both tree stores
+
+class ArrayNode:
+
+	__slots__ = ('tree', 'index')
+
+	def __init__(self, tree, index):
+		self.tree = tree
+		self.index = index
+
+	def __eq__(self, other):
+		return isinstance(other, ArrayNode) and self.tree is other.tree and self.index == other.index
+
+	def __hash__(self):
+		return hash((id(self.tree), self.index))
+
+	@property
+	def state(self):
+		return None
+
+	@property
+	def move(self):
+		return self.tree.moves[self.index]
+
+	@property
+	def visits(self):
+		return self.tree.visits[self.index]
+
+	@property
+	def win_value(self):
+		return self.tree.win_value[self.index]
+
+	@property
+	def policy_value(self):
+		return self.tree.policy_value[self.index] if self.tree.has_policy[self.index] else None
+
+	@property
+	def discovery_factor(self):
+		return self.tree.discovery_factor[self.index]
+
+	@property
+	def player_number(self):
+		return self.tree.player_number[self.index]
+
+	@property
+	def expanded(self):
+		return bool(self.tree.expanded[self.index])
+
+	@property
+	def expansion_key(self):
+		return self.tree.expansion_key[self.index]
+
+	@expansion_key.setter
+	def expansion_key(self, value):
+		self.tree.expansion_key[self.index] = value
+
+	@property
+	def parent(self):
+		parent = self.tree.parent[self.index]
+		return ArrayNode(self.tree, parent) if parent >= 0 else None
+
+	@property
+	def children(self):
+		return [ArrayNode(self.tree, child) for child in self.tree.children(self.index)]
+
+	@property
+	def child_moves(self):
+		return [self.tree.moves[child] for child in self.tree.children(self.index)]
+
+	def new_child(self, move, player_number = None, policy_value = None, discovery_factor = 0.35):
+		child = self.tree.add_node(self.index, move, player_number, policy_value, discovery_factor)
+		return ArrayNode(self.tree, child) if child >= 0 else None
+
+	def update_win_value(self, value):
+		self.tree.update_win_value(self.index, value)
+
+	def is_scorable(self):
+		return self.tree.is_scorable(self.index)
+
+# MonteCarlo over an ArrayTree, walking a mutable state with apply/undo. It exposes the same
+# surface as MonteCarlo (root_node, child_finder, node_evaluator, simulate, make_choice).
+#
+# With a determinizer the search runs as information-set MCTS: each iteration calls
+# determinizer(montecarlo) to sample the hidden information into the state at the root, then
+# descends the tree, whose nodes stand for information sets, choosing only among the children
+# whose move state.is_legal accepts in that determinization. child_finder is called on every
+# node of the path and must only add the legal moves that are not children yet, which it can
+# track through node.expansion_key
+
+class ArrayMonteCarlo:
+
+	def __init__(self, root_node, state, capacity = 8192, seed = None):
+		self.tree = ArrayTree(capacity, seed)
+		self.tree.add_node(-1, root_node.move, root_node.player_number, root_node.policy_value, root_node.discovery_factor)
+		self.root_node = ArrayNode(self.tree, 0)
+		self.state = state
+		self.child_finder = None
+		self.node_evaluator = lambda child, montecarlo: None
+		self.determinizer = None
+		# Optional transposition table, with transposition_key(montecarlo) returning a hashable
+		# key of montecarlo.state: children are registered the first time they are visited
+		self.transposition_table = None
+		self.transposition_key = None
+		# Progressive widening of information-set search: below the root, a node visited n times
+		# only asks child_finder for new children while fewer than
+		# max(1, widening_constant * n ** widening_exponent) of its children are available, and
+		# then for at most child_limit of them, best first (child_limit is None when child_finder
+		# must add every legal move). A single unvisited child is expanded per iteration
+		self.widening_constant = None
+		self.widening_exponent = 0.5
+		self.child_limit = None
+		# Player whose point of view the win values take, by default the player of the root node.
+		# Set it when the search starts from a node where another player moves, e.g. to ponder
+		# on the opponent's turn
+		self.root_player_number = None
+		# Set from another thread to end a running simulate after its current batch; whoever sets
+		# it clears it once simulate has returned
+		self.stop_requested = False
+		# Early termination: stop as soon as the iterations left cannot change make_choice and,
+		# with a confidence_delta, once a Hoeffding bound at that level separates the most visited
+		# root child from all the others (win values are assumed to lie in [-1, 1])
+		self.stop_when_settled = False
+		self.confidence_delta = None
+		# Iterations run, seconds spent and iterations saved by early termination in the last
+		# call to simulate
+		self.iterations = 0
+		self.elapsed = 0.
+		self.iterations_saved = 0
+		# Most visits backpropagated through the root in one iteration of the last simulate: an
+		# expansion scores every new child, so a root child can gain several visits per iteration
+		self.max_visits_per_iteration = 1
+
+	def make_choice(self):
+		children = self.tree.children(0)
+		visits = [self.tree.visits[child] for child in children]
+		tie_break = [self.tree.tie_break[child] for child in children]
+
+		return ArrayNode(self.tree, max(zip(visits, tie_break, children))[2])
+
+	def make_exploratory_choice(self):
+		children = self.tree.children(0)
+		children_visit_probabilities = [self.tree.visits[child] / self.tree.visits[0] for child in children]
+		random_probability = self.tree.random.uniform(0, sum(children_visit_probabilities))
+		probabilities_already_counted = 0.
+
+		for child, probability in zip(children, children_visit_probabilities):
+			if probabilities_already_counted + probability >= random_probability:
+				return ArrayNode(self.tree, child)
+
+			probabilities_already_counted += probability
+
+	def find_child(self, node, move):
+		for child in self.tree.children(node.index):
+			if self.tree.moves[child] == move:
+				return ArrayNode(self.tree, child)
+
+		return None
+
+	def warm_start(self, statistics):
+		# Seeds the root children with the (move, visits, win_value) of an earlier search from the
+		# same position, e.g. read from a persistent cache, and returns the visits added. The root
+		# children are created by child_finder; moves at the root are always available, so each
+		# child was available as many times as the root was visited
+		tree = self.tree
+		self.child_finder(self.root_node, self)
+		seeded = dict((move, (visits, win_value)) for move, visits, win_value in statistics)
+		children = [child for child in tree.children(0) if tree.moves[child] in seeded]
+		total_visits = 0
+		total_win_value = 0.
+
+		for child in children:
+			visits, win_value = seeded[tree.moves[child]]
+			tree.set_statistics([child], visits, win_value)
+			total_visits += visits
+			total_win_value += win_value
+
+		for child in tree.children(0):
+			tree.availability[child] += total_visits
+
+		tree.set_statistics([0], tree.visits[0] + total_visits, tree.win_value[0] + total_win_value)
+		return total_visits
+
+	def reroot(self, node, state):
+		# Keeps only the subtree of node, which becomes the root of a search from state, and
+		# returns the visits it brings along
+		tree = ArrayTree(self.tree.capacity, 0)
+		tree.random = self.tree.random
+		self.tree.copy_subtree(node.index, tree)
+
+		self.tree = tree
+		self.root_node = ArrayNode(tree, 0)
+		self.state = state
+
+		if self.transposition_table is not None:
+			self.transposition_table.rebuild(tree)
+
+		return tree.visits[0]
+
+	def simulate(self, expansion_count = 1, time_budget = None, node_budget = None, check_interval = 16):
+		# Same budgets as MonteCarlo.simulate, plus a node budget that stops the search once the
+		# tree holds that many nodes (at most its capacity). The budgets are checked every
+		# check_interval iterations
+		if expansion_count is None and time_budget is None and node_budget is None:
+			raise ValueError('simulate needs an expansion_count, a time_budget or a node_budget')
+
+		run_iterations = self.simulate_information_sets if self.determinizer is not None else self.simulate_perfect_information
+		start = time.perf_counter()
+		self.iterations = 0
+		self.iterations_saved = 0
+		self.max_visits_per_iteration = 1
+
+		if self.transposition_table is not None:
+			self.transposition_table.reset_counters()
+
+		while expansion_count is None or self.iterations < expansion_count:
+			batch = check_interval if expansion_count is None else min(check_interval, expansion_count - self.iterations)
+			run_iterations(batch)
+			self.iterations += batch
+			self.elapsed = time.perf_counter() - start
+
+			if time_budget is not None and self.elapsed >= time_budget:
+				break
+
+			if node_budget is not None and self.tree.size >= min(node_budget, self.tree.capacity):
+				break
+
+			if self.stop_requested:
+				break
+
+			if self.stop_when_settled or self.confidence_delta is not None:
+				# With only a time budget the iterations left are estimated from the rate so far
+				remaining = expansion_count - self.iterations if expansion_count is not None else None
+
+				if time_budget is not None:
+					estimate = int(self.iterations / self.elapsed * (time_budget - self.elapsed)) if self.elapsed else 0
+					remaining = estimate if remaining is None else min(remaining, estimate)
+
+				if self.stop_when_settled and remaining is not None and self.choice_is_settled(remaining):
+					self.iterations_saved = remaining
+					break
+
+				if self.confidence_delta is not None and self.choice_is_separated(self.confidence_delta):
+					self.iterations_saved = remaining or 0
+					break
+
+		self.elapsed = time.perf_counter() - start
+		return self.iterations
+
+	def choice_is_settled(self, remaining):
+		# An iteration adds at most max_visits_per_iteration visits to a root child, so the most
+		# visited child cannot be overtaken when it leads by more than the visits still to come
+		visits = sorted((self.tree.visits[child] for child in self.tree.children(0)), reverse = True)
+		return len(visits) < 2 or visits[0] - visits[1] > remaining * self.max_visits_per_iteration
+
+	def choice_is_separated(self, delta):
+		tree = self.tree
+		children = tree.children(0)
+
+		if len(children) < 2:
+			return True
+
+		if not all(tree.visits[child] for child in children):
+			return False
+
+		def radius(child):
+			return 2. * sqrt(log(2. / delta) / (2. * tree.visits[child]))
+
+		leader = max(children, key = lambda child: (tree.visits[child], tree.tie_break[child]))
+		lower_bound = tree.exploit[leader] - radius(leader)
+
+		return all(tree.exploit[child] + radius(child) < lower_bound for child in children if child != leader)
+
+	def simulate_perfect_information(self, expansion_count = 1):
+		tree = self.tree
+		state = self.state
+		root_player_number = self.root_player_number or tree.player_number[0]
+		expanded = tree.expanded
+		terminal = tree.terminal
+		moves = tree.moves
+		get_preferred_child = tree.get_preferred_child
+
+		for i in range(expansion_count):
+			root_visits = tree.visits[0]
+			index = 0
+			path = []
+
+			while expanded[index]:
+				index = get_preferred_child(index, root_player_number)
+				path.append(moves[index])
+
+			if terminal[index]:
+				if tree.has_terminal_value[index]:
+					tree.update_win_value(index, tree.terminal_value[index])
+				continue
+
+			for move in path:
+				state.apply(move)
+
+			self.expand(index)
+
+			for move in reversed(path):
+				state.undo(move)
+
+			self.max_visits_per_iteration = max(self.max_visits_per_iteration, tree.visits[0] - root_visits)
+
+	def simulate_information_sets(self, expansion_count = 1):
+		tree = self.tree
+		state = self.state
+		root_player_number = self.root_player_number or tree.player_number[0]
+		moves = tree.moves
+		next_sibling = tree.next_sibling
+		get_preferred_available_child = tree.get_preferred_available_child
+		widening_constant = self.widening_constant
+		widening_exponent = self.widening_exponent
+
+		for i in range(expansion_count):
+			self.determinizer(self)
+			root_visits = tree.visits[0]
+			index = 0
+			path = []
+
+			while True:
+				tree.full = False
+
+				if widening_constant is None or index == 0:
+					# Every legal move becomes a child at once, and all the new ones are expanded
+					self.child_limit = None
+					self.child_finder(ArrayNode(tree, index), self)
+					child, unvisited, available = get_preferred_available_child(index, root_player_number, state.is_legal)
+				else:
+					child, unvisited, available = get_preferred_available_child(index, root_player_number, state.is_legal)
+					width = max(1, int(widening_constant * tree.visits[index] ** widening_exponent))
+
+					if available < width:
+						last = tree.last_child[index]
+						self.child_limit = width - available
+						self.child_finder(ArrayNode(tree, index), self)
+						new = next_sibling[last] if last >= 0 else tree.first_child[index]
+
+						# The children just added are legal in this determinization
+						while new >= 0:
+							tree.availability[new] += 1
+							unvisited.append(new)
+							new = next_sibling[new]
+
+					del unvisited[1:]
+
+				if unvisited:
+					self.expand_children(unvisited)
+					break
+
+				if child < 0:
+					# No legal move in this determinization: the node is scored as a leaf
+					win_value = self.node_evaluator(ArrayNode(tree, index), self)
+
+					if win_value != None:
+						tree.update_win_value(index, win_value)
+					break
+
+				state.apply(moves[child])
+				path.append(moves[child])
+				index = child
+
+			for move in reversed(path):
+				state.undo(move)
+
+			self.max_visits_per_iteration = max(self.max_visits_per_iteration, tree.visits[0] - root_visits)
+
+	def expand(self, index):
+		tree = self.tree
+		tree.full = False
+		self.child_finder(ArrayNode(tree, index), self)
+
+		if tree.full:
+			# No room for all the children: drop the partial range and score the leaf itself
+			tree.remove_children(index)
+			win_value = self.node_evaluator(ArrayNode(tree, index), self)
+
+			if win_value != None:
+				tree.update_win_value(index, win_value)
+
+			return
+
+		self.expand_children(tree.children(index))
+
+		if tree.child_count[index]:
+			tree.expanded[index] = 1
+			return
+
+		# A leaf without children keeps its value, so selecting it again still counts as a visit
+		tree.terminal[index] = 1
+		win_value = self.node_evaluator(ArrayNode(tree, index), self)
+
+		if win_value != None:
+			tree.terminal_value[index] = win_value
+			tree.has_terminal_value[index] = 1
+			tree.update_win_value(index, win_value)
+
+	def expand_children(self, children):
+		tree = self.tree
+		state = self.state
+
+		for child in children:
+			state.apply(tree.moves[child])
+
+			if self.transposition_table is not None:
+				self.transposition_table.register(tree, child, self.transposition_key(self))
+
+			child_win_value = self.node_evaluator(ArrayNode(tree, child), self)
+
+			if child_win_value != None:
+				tree.update_win_value(child, child_win_value)
+
+			if not tree.is_scorable(child):
+				# The rollout nodes are allocated past the current end and dropped afterwards
+				size = tree.size
+				self.random_rollout(child)
+				tree.truncate(child, size)
+
+			state.undo(tree.moves[child])
+
+	def random_rollout(self, index):
+		tree = self.tree
+		state = self.state
+		path = []
+
+		while True:
+			tree.full = False
+			self.child_finder(ArrayNode(tree, index), self)
+
+			if tree.full:
+				tree.remove_children(index)
+				child_win_value = self.node_evaluator(ArrayNode(tree, index), self)
+
+				if child_win_value != None:
+					tree.update_win_value(index, child_win_value)
+				break
+
+			child = tree.keep_only_child(index, tree.random.choice(tree.children(index)))
+			state.apply(tree.moves[child])
+			path.append(tree.moves[child])
+			child_win_value = self.node_evaluator(ArrayNode(tree, child), self)
+
+			if child_win_value != None:
+				tree.update_win_value(index, child_win_value)
+				break
+
+			index = child
+
+		for move in reversed(path):
+			state.undo(move)
@@ -1,11 +1,19 @@
 import random
+import time
 
 class MonteCarlo:
 
-	def __init__(self, root_node):
+	def __init__(self, root_node, state = None):
 		self.root_node = root_node
+		# With a mutable state (apply/undo), nodes only store their move and the tree is
+		# walked by applying and undoing moves on this state, which always reflects the
+		# node handed to child_finder and node_evaluator
+		self.state = state
 		self.child_finder = None
 		self.node_evaluator = lambda child, montecarlo: None
+		# Iterations run and seconds spent by the last call to simulate
+		self.iterations = 0
+		self.elapsed = 0.
 
 	def make_choice(self):
 		best_children = []
@@ -32,19 +40,64 @@ class MonteCarlo:
 
 			probabilities_already_counted += probability
 
-	def simulate(self, expansion_count = 1):
+	def simulate(self, expansion_count = 1, time_budget = None, check_interval = 16):
+		# With a time budget (in seconds) the clock is read every check_interval iterations and
+		# the search stops as soon as the budget is spent, so make_choice returns the best move
+		# found so far. An expansion_count of None leaves the iterations unbounded
+		if expansion_count is None and time_budget is None:
+			raise ValueError('simulate needs an expansion_count or a time_budget')
+
+		start = time.perf_counter()
+		self.iterations = 0
+
+		while expansion_count is None or self.iterations < expansion_count:
+			batch = check_interval if expansion_count is None else min(check_interval, expansion_count - self.iterations)
+			self.run_iterations(batch)
+			self.iterations += batch
+			self.elapsed = time.perf_counter() - start
+
+			if time_budget is not None and self.elapsed >= time_budget:
+				break
+
+		self.elapsed = time.perf_counter() - start
+		return self.iterations
+
+	def run_iterations(self, expansion_count):
+		state = self.state
+
 		for i in range(expansion_count):
 			current_node = self.root_node
+			path = []
 
 			while current_node.expanded:
 				current_node = current_node.get_preferred_child(self.root_node)
+				path.append(current_node.move)
+
+			if state is None:
+				self.expand(current_node)
+				continue
+
+			# A leaf already found to have no children has nothing left to expand, so
+			# there is no need to walk the state down to it again
+			if current_node.terminal:
+				continue
+
+			for move in path:
+				state.apply(move)
 
 			self.expand(current_node)
 
+			for move in reversed(path):
+				state.undo(move)
+
 	def expand(self, node):
+		state = self.state
 		self.child_finder(node, self)
 
 		for child in node.children:
+			if state is not None:
+				state.apply(child.move)
+
 			child_win_value = self.node_evaluator(child, self)
 
 			if child_win_value != None:
@@ -54,18 +107,35 @@ class MonteCarlo:
 				self.random_rollout(child)
 				child.children = []
 
+			if state is not None:
+				state.undo(child.move)
+
 		if len(node.children):
 			node.expanded = True
+		elif state is not None:
+			node.terminal = True
 
 	def random_rollout(self, node):
-		self.child_finder(node, self)
-		child = random.choice(node.children)
-		node.children = []
-		node.add_child(child)
-		child_win_value = self.node_evaluator(child, self)
+		state = self.state
+		path = []
+
+		while True:
+			self.child_finder(node, self)
+			child = random.choice(node.children)
+			node.children = []
+			node.add_child(child)
+
+			if state is not None:
+				state.apply(child.move)
+				path.append(child.move)
+
+			child_win_value = self.node_evaluator(child, self)
+
+			if child_win_value != None:
+				node.update_win_value(child_win_value)
+				break
 
-		if child_win_value != None:
-			node.update_win_value(child_win_value)
-		else:
-			self.random_rollout(child)
+			node = child
 
+		for move in reversed(path):
+			state.undo(move)
@@ -1,18 +1,20 @@
-import random
 from math import log, sqrt
 
 class Node:
 
-	def __init__(self, state):
+	def __init__(self, state, move = None):
 		self.state = state
+		self.move = move
 		self.win_value = 0
 		self.policy_value = None
 		self.visits = 0
 		self.parent = None
 		self.children = []
 		self.expanded = False
+		self.terminal = False
 		self.player_number = None
 		self.discovery_factor = 0.35
+		self.expansion_key = 0
 
 	def update_win_value(self, value):
 		self.win_value += value
@@ -21,6 +23,10 @@ class Node:
 		if self.parent:
 			self.parent.update_win_value(value)
 
+	@property
+	def child_moves(self):
+		return [child.move for child in self.children]
+
 	def update_policy_value(self, value):
 		self.policy_value = value
 
@@ -28,24 +34,30 @@ class Node:
 		self.children.append(child)
 		child.parent = self
 
+	def new_child(self, move, player_number = None, policy_value = None, discovery_factor = 0.35):
+		child = Node(None, move)
+		child.player_number = player_number
+		child.policy_value = policy_value
+		child.discovery_factor = discovery_factor
+		self.add_child(child)
+		return child
+
 	def add_children(self, children):
 		for child in children:
 			self.add_child(child)
 
 	def get_preferred_child(self, root_node):
-		best_children = []
-		best_score = float('-inf')
-
-		for child in self.children:
-			score = child.get_score(root_node)
-
-			if score > best_score:
-				best_score = score
-				best_children = [child]
-			elif score == best_score:
-				best_children.append(child)
-
-		return random.choice(best_children)
+		# Scores of all children in one pass, with the log of the visits computed once
+		log_visits = log(self.visits)
+		win_multiplier = 1 if self.player_number == root_node.player_number else -1
+		scores = [
+			win_multiplier * child.win_value / (child.visits or 1)
+			+ child.discovery_factor * (child.policy_value or 1) * sqrt(log_visits / (child.visits or 1))
+			for child in self.children
+		]
+
+		# Ties go to the first child, so the search only depends on the moves and the evaluator
+		return self.children[scores.index(max(scores))]
 
 	def get_score(self, root_node):
 		discovery_operand = self.discovery_factor * (self.policy_value or 1) * sqrt(log(self.parent.visits) / (self.visits or 1))
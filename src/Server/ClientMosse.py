@@ -0,0 +1,131 @@
+import asyncio
+import itertools
+import json
+import os
+
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from GameEngine import Maschera
+from Server.ServerMosse import PERCORSO_PREDEFINITO
+
+
+def serializza_stato(giocatore, avversario, tavolo):
+    """
+    Stato da inviare al server per la mossa di giocatore: solo quello che il giocatore vede.
+
+    :param giocatore: Il giocatore di turno (GameEngine.Giocatore)
+    :param avversario: Il giocatore avversario, di cui si inviano le carte raccolte, le scope e
+        il numero di carte in mano
+    :param tavolo: Il tavolo di gioco
+    """
+    return {
+        'mano': giocatore.maschera_mano,
+        'tavolo': tavolo.maschera,
+        'raccolte': giocatore.maschera_raccolte,
+        'raccolte_avversario': avversario.maschera_raccolte,
+        'carte_avversario': len(avversario.carte_mano),
+        'scope': giocatore.scope,
+        'scope_avversario': avversario.scope
+    }
+
+
+def serializza_stato_compatto(stato):
+    """Come serializza_stato, per il giocatore di turno in uno StatoCompatto."""
+    g = stato.turno
+    return {
+        'mano': stato.mani[g],
+        'tavolo': stato.tavolo,
+        'raccolte': stato.raccolte[g],
+        'raccolte_avversario': stato.raccolte[1 - g],
+        'carte_avversario': Maschera.conta(stato.mani[1 - g]),
+        'scope': stato.scope[g],
+        'scope_avversario': stato.scope[1 - g]
+    }
+
+
+class ClientMosse:
+    """
+    Client asyncio di ServerMosse. Su una sola connessione si possono avere molte richieste in
+    corso, anche di sessioni diverse: le risposte sono riconosciute dal loro id.
+    """
+
+    def __init__(self, indirizzo=PERCORSO_PREDEFINITO):
+        """
+        :param indirizzo: Percorso del socket Unix del server, oppure coppia (host, porta)
+        """
+        self.indirizzo = indirizzo
+        self.reader = None
+        self.writer = None
+        self.in_corso = {}  # id -> futuro della risposta
+        self._id = itertools.count()
+        self._lettore = None
+
+    async def connetti(self):
+        if isinstance(self.indirizzo, str):
+            self.reader, self.writer = await asyncio.open_unix_connection(self.indirizzo)
+        else:
+            self.reader, self.writer = await asyncio.open_connection(*self.indirizzo)
+        self._lettore = asyncio.create_task(self._leggi())
+        return self
+
+    async def chiudi(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+        await self._lettore
+
+    async def __aenter__(self):
+        return await self.connetti()
+
+    async def __aexit__(self, *eccezione):
+        await self.chiudi()
+
+    async def _leggi(self):
+        while True:
+            riga = await self.reader.readline()
+            if not riga:
+                break
+            risposta = json.loads(riga)
+            futuro = self.in_corso.pop(risposta.pop('id', None), None)
+            if futuro is not None and not futuro.done():
+                futuro.set_result(risposta)
+
+        for futuro in self.in_corso.values():
+            futuro.set_exception(ConnectionError("Connessione con il server chiusa"))
+        self.in_corso.clear()
+
+    async def richiesta(self, **campi):
+        """Invia una richiesta e ne attende la risposta (un dizionario, con 'errore' se è fallita)."""
+        identificativo = next(self._id)
+        futuro = asyncio.get_running_loop().create_future()
+        self.in_corso[identificativo] = futuro
+        self.writer.write(json.dumps(dict(campi, id=identificativo)).encode() + b"\n")
+        await self.writer.drain()
+        return await futuro
+
+    async def scegli_mossa(self, sessione, stato, tempo=None, iterazioni=None):
+        """
+        Chiede al server la mossa per lo stato serializzato di una sessione.
+
+        :param sessione: Identificativo della partita, lo stesso per tutte le sue mosse
+        :param stato: Stato da serializza_stato o serializza_stato_compatto
+        :param tempo: Secondi entro cui avere la risposta (None per i limiti del server)
+        :param iterazioni: Iterazioni della ricerca (None per i limiti del server)
+        :return: Coppia (indice della carta, maschera della presa)
+        """
+        campi = {'tipo': 'mossa', 'sessione': sessione, 'stato': stato}
+        if tempo is not None:
+            campi['tempo'] = tempo
+        if iterazioni is not None:
+            campi['iterazioni'] = iterazioni
+        risposta = await self.richiesta(**campi)
+        if 'errore' in risposta:
+            raise RuntimeError(risposta['errore'])
+        return risposta['carta'], risposta['presa']
+
+    async def chiudi_sessione(self, sessione):
+        await self.richiesta(tipo='chiudi', sessione=sessione)
+
+    async def statistiche(self):
+        return await self.richiesta(tipo='statistiche')
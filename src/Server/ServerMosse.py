@@ -0,0 +1,390 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from Agent.AgenteMonteCarlo import AgenteMonteCarlo
+from GameEngine import Maschera
+from GameEngine.Giocatore import Giocatore
+from GameEngine.Partita import miglior_presa
+from GameEngine.Tavolo import Tavolo
+
+# Socket Unix su cui il server ascolta se non si indica un altro indirizzo
+PERCORSO_PREDEFINITO = "/tmp/scopa_mosse.sock"
+
+# Richieste al più inviate insieme a un processo di lavoro
+DIMENSIONE_LOTTO = 32
+
+
+class SessioneAgente:
+    """
+    Una partita servita dal server, dentro un processo di lavoro: l'AgenteMonteCarlo e i
+    giocatori e il tavolo che ne descrivono la posizione, aggiornati a ogni richiesta. L'agente
+    resta lo stesso per tutta la sessione, così tra una mossa e la successiva riusa l'albero e
+    ricava chi ha fatto l'ultima presa, anche tra un round e l'altro.
+    """
+
+    def __init__(self, parametri):
+        """
+        :param parametri: Argomenti di AgenteMonteCarlo (configurazione e campi della configurazione)
+        """
+        self.giocatore = Giocatore()
+        self.avversario = Giocatore()
+        self.tavolo = Tavolo()
+        self.agente = AgenteMonteCarlo(self.giocatore, self.avversario, **parametri)
+        self.configurazione = self.agente.configurazione
+
+    def scegli_mossa(self, stato, scadenza=None, iterazioni=None):
+        """
+        Sceglie la mossa per lo stato serializzato (vedi ClientMosse.serializza_stato).
+
+        :param stato: Dizionario con le maschere di mano, tavolo e carte raccolte, le carte in
+            mano all'avversario e le scope dei due giocatori
+        :param scadenza: Istante (time.monotonic) entro cui rispondere, o None per i limiti della configurazione
+        :param iterazioni: Iterazioni della ricerca, se la richiesta le indica
+        :return: Dizionario con carta, presa (maschera) e iterazioni della ricerca
+        """
+        self.giocatore.carte_mano = Maschera.carte(stato['mano'])
+        self.giocatore.carte_raccolte = Maschera.carte(stato['raccolte'])
+        self.giocatore.scope = stato.get('scope', 0)
+        # Dell'avversario l'agente guarda solo quante carte ha in mano
+        self.avversario.carte_mano = [None] * stato['carte_avversario']
+        self.avversario.carte_raccolte = Maschera.carte(stato['raccolte_avversario'])
+        self.avversario.scope = stato.get('scope_avversario', 0)
+        self.tavolo.carte = Maschera.carte(stato['tavolo'])
+
+        # Il budget della richiesta sostituisce i limiti della configurazione: il tempo è quello
+        # che resta fino alla scadenza, tolta l'attesa in coda
+        configurazione = self.configurazione
+        if scadenza is not None:
+            configurazione = configurazione.modifica(iterazioni=iterazioni,
+                                                     tempo_per_mossa=max(scadenza - time.monotonic(), 0.001))
+        elif iterazioni is not None:
+            configurazione = configurazione.modifica(iterazioni=iterazioni, tempo_per_mossa=None)
+        self.agente.configurazione = configurazione
+
+        carta = self.agente.scegli_mossa(self.tavolo)
+        prese_possibili = self.giocatore.cerca_prese_possibili(carta, self.tavolo.carte)
+        presa = Maschera.da_carte(miglior_presa(prese_possibili)) if prese_possibili else 0
+        return {'carta': carta.indice, 'presa': presa, 'iterazioni': self.agente.ultima_ricerca['iterazioni']}
+
+
+def _esegui(sessioni, richiesta, parametri):
+    """Esegue una richiesta nel processo di lavoro e ne restituisce la risposta."""
+    try:
+        if richiesta['tipo'] == 'chiudi':
+            sessioni.pop(richiesta['sessione'], None)
+            return {}
+
+        sessione = sessioni.get(richiesta['sessione'])
+        if sessione is None:
+            sessione = sessioni[richiesta['sessione']] = SessioneAgente(parametri)
+        return sessione.scegli_mossa(richiesta['stato'], richiesta.get('scadenza'), richiesta.get('iterazioni'))
+    except Exception as errore:
+        return {'errore': f"{type(errore).__name__}: {errore}"}
+
+
+def _lavoratore(connessione, parametri):
+    """
+    Ciclo di un processo di lavoro: riceve lotti di richieste, le esegue in ordine con le
+    sessioni che tiene in memoria e rimanda le risposte, finché non riceve None.
+    """
+    sessioni = {}
+
+    # Riscaldamento: una ricerca breve prepara moduli e tabelle prima della prima richiesta
+    riscaldamento = SessioneAgente(parametri)
+    riscaldamento.scegli_mossa({'mano': 0b111, 'tavolo': 0b1111 << 10, 'raccolte': 0, 'raccolte_avversario': 0,
+                                'carte_avversario': 3}, iterazioni=50)
+    connessione.send('pronto')
+
+    while True:
+        lotto = connessione.recv()
+        if lotto is None:
+            break
+        connessione.send([_esegui(sessioni, richiesta, parametri) for richiesta in lotto])
+
+
+def percentile(valori_ordinati, frazione):
+    """Percentile (interpolato) di una lista già ordinata."""
+    if not valori_ordinati:
+        return 0.
+    posizione = (len(valori_ordinati) - 1) * frazione
+    inferiore = int(posizione)
+    superiore = min(inferiore + 1, len(valori_ordinati) - 1)
+    return valori_ordinati[inferiore] + (valori_ordinati[superiore] - valori_ordinati[inferiore]) * (posizione - inferiore)
+
+
+class ServerMosse:
+    """
+    Server asyncio che sceglie le mosse per molte partite in parallelo, per frontend e tornei
+    in altri processi. Ascolta su un socket Unix (o su un indirizzo (host, porta) locale) e
+    parla per righe JSON: ogni richiesta ha un id, ripetuto nella risposta, e un tipo:
+
+        'mossa'       sessione, stato (vedi ClientMosse.serializza_stato) e, facoltativi, tempo
+                      (secondi entro cui rispondere) o iterazioni; risponde con carta, presa,
+                      iterazioni e latenza
+        'chiudi'      sessione: libera l'albero e l'agente della sessione
+        'statistiche' richieste servite, throughput e percentili delle latenze
+
+    Le ricerche girano in un pool di processi avviati e riscaldati all'avvio. Ogni sessione è
+    assegnata al processo con meno sessioni e ci resta, così il suo agente riusa l'albero tra
+    una mossa e la successiva. Le richieste che arrivano mentre un processo è occupato vengono
+    accodate e inviate insieme in un solo lotto appena si libera.
+    """
+
+    def __init__(self, indirizzo=PERCORSO_PREDEFINITO, lavoratori=None, finestra_latenze=10000, **parametri):
+        """
+        :param indirizzo: Percorso del socket Unix, oppure coppia (host, porta) per TCP locale
+        :param lavoratori: Numero di processi di lavoro (di default uno per core)
+        :param finestra_latenze: Numero di latenze recenti su cui calcolare i percentili
+        :param parametri: Argomenti di AgenteMonteCarlo per gli agenti delle sessioni
+        """
+        self.indirizzo = indirizzo
+        self.num_lavoratori = lavoratori or os.cpu_count()
+        self.parametri = parametri
+        self.server = None
+        self.processi = []
+        self.connessioni = []
+        self.code = []
+        self.eventi = []
+        self.sessioni = {}  # sessione -> indice del processo di lavoro
+        self.sessioni_per_lavoratore = [0] * self.num_lavoratori
+        self._esecutore = None
+        self._compiti = []
+
+        # Statistiche: latenze recenti (secondi, dalla ricezione alla risposta), istanti delle
+        # risposte per il throughput recente e dimensioni dei lotti inviati
+        self.latenze = deque(maxlen=finestra_latenze)
+        self.istanti = deque(maxlen=finestra_latenze)
+        self.mosse = 0
+        self.iterazioni = 0
+        self.errori = 0
+        self.lotti = 0
+        self.richieste_in_lotti = 0
+        self.inizio = None
+
+    async def avvia(self):
+        """Avvia e riscalda i processi di lavoro, poi inizia ad accettare connessioni."""
+        loop = asyncio.get_running_loop()
+        self._esecutore = ThreadPoolExecutor(max_workers=self.num_lavoratori)
+
+        for _ in range(self.num_lavoratori):
+            connessione, connessione_lavoratore = multiprocessing.Pipe()
+            processo = multiprocessing.Process(target=_lavoratore, args=(connessione_lavoratore, self.parametri),
+                                               daemon=True)
+            processo.start()
+            # Il capo del processo di lavoro resta aperto solo in quel processo: se termina, recv
+            # solleva EOFError invece di restare in attesa
+            connessione_lavoratore.close()
+            self.processi.append(processo)
+            self.connessioni.append(connessione)
+            self.code.append([])
+            self.eventi.append(asyncio.Event())
+
+        await asyncio.gather(*(loop.run_in_executor(self._esecutore, connessione.recv)
+                               for connessione in self.connessioni))
+        self._compiti = [asyncio.create_task(self._smista(indice)) for indice in range(self.num_lavoratori)]
+
+        if isinstance(self.indirizzo, str):
+            if os.path.exists(self.indirizzo):
+                os.remove(self.indirizzo)
+            self.server = await asyncio.start_unix_server(self._gestisci_connessione, path=self.indirizzo)
+        else:
+            self.server = await asyncio.start_server(self._gestisci_connessione, *self.indirizzo)
+        self.inizio = time.monotonic()
+
+    async def servi(self, intervallo_statistiche=None):
+        """
+        Avvia il server e risponde alle richieste finché non viene interrotto.
+
+        :param intervallo_statistiche: Se indicato, ogni quanti secondi stampare le statistiche
+        """
+        await self.avvia()
+        try:
+            if intervallo_statistiche:
+                while True:
+                    await asyncio.sleep(intervallo_statistiche)
+                    print(json.dumps(self.statistiche()), flush=True)
+            else:
+                await self.server.serve_forever()
+        finally:
+            await self.chiudi()
+
+    async def chiudi(self):
+        """Smette di accettare connessioni e ferma i processi di lavoro."""
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+        for compito in self._compiti:
+            compito.cancel()
+        for connessione, processo in zip(self.connessioni, self.processi):
+            try:
+                connessione.send(None)
+            except OSError:
+                pass  # Il processo di lavoro è già terminato
+            processo.join()
+        self.processi = []
+        self.connessioni = []
+        if self._esecutore is not None:
+            self._esecutore.shutdown()
+        if isinstance(self.indirizzo, str) and os.path.exists(self.indirizzo):
+            os.remove(self.indirizzo)
+
+    async def _smista(self, indice):
+        """Invia al processo di lavoro le richieste accodate, a lotti, e ne consegna le risposte."""
+        loop = asyncio.get_running_loop()
+        coda = self.code[indice]
+        connessione = self.connessioni[indice]
+
+        def scambia(lotto):
+            connessione.send(lotto)
+            return connessione.recv()
+
+        while True:
+            await self.eventi[indice].wait()
+            self.eventi[indice].clear()
+
+            while coda:
+                lotto = coda[:DIMENSIONE_LOTTO]
+                del coda[:DIMENSIONE_LOTTO]
+                self.lotti += 1
+                self.richieste_in_lotti += len(lotto)
+                try:
+                    risposte = await loop.run_in_executor(self._esecutore, scambia, [richiesta for richiesta, _ in lotto])
+                except Exception as errore:
+                    # Il processo di lavoro non risponde più (ad esempio è terminato): le richieste del
+                    # lotto e quelle in coda ricevono un errore invece di restare in attesa
+                    lotto += coda
+                    del coda[:]
+                    risposte = [{'errore': f"Processo di lavoro {indice} non disponibile: {type(errore).__name__}"}
+                                for _ in lotto]
+                for (_, futuro), risposta in zip(lotto, risposte):
+                    if not futuro.done():
+                        futuro.set_result(risposta)
+
+    def _invia(self, indice, richiesta):
+        futuro = asyncio.get_running_loop().create_future()
+        self.code[indice].append((richiesta, futuro))
+        self.eventi[indice].set()
+        return futuro
+
+    async def _rispondi(self, richiesta):
+        """Risposta (senza id) a una richiesta."""
+        tipo = richiesta.get('tipo')
+
+        if tipo == 'statistiche':
+            return self.statistiche()
+
+        sessione = richiesta.get('sessione')
+        if sessione is None:
+            return {'errore': "Richiesta senza sessione"}
+
+        if tipo == 'chiudi':
+            indice = self.sessioni.pop(sessione, None)
+            if indice is not None:
+                self.sessioni_per_lavoratore[indice] -= 1
+                await self._invia(indice, {'tipo': 'chiudi', 'sessione': sessione})
+            return {}
+
+        if tipo != 'mossa':
+            return {'errore': f"Tipo di richiesta sconosciuto: {tipo}"}
+
+        ricevuta = time.monotonic()
+        indice = self.sessioni.get(sessione)
+        if indice is None:
+            indice = min(range(self.num_lavoratori), key=lambda i: self.sessioni_per_lavoratore[i])
+            self.sessioni[sessione] = indice
+            self.sessioni_per_lavoratore[indice] += 1
+
+        tempo = richiesta.get('tempo')
+        risposta = await self._invia(indice, {
+            'tipo': 'mossa',
+            'sessione': sessione,
+            'stato': richiesta.get('stato'),
+            'scadenza': ricevuta + tempo if tempo is not None else None,
+            'iterazioni': richiesta.get('iterazioni')
+        })
+
+        latenza = time.monotonic() - ricevuta
+        if 'errore' in risposta:
+            self.errori += 1
+        else:
+            self.mosse += 1
+            self.iterazioni += risposta['iterazioni']
+            self.latenze.append(latenza)
+            self.istanti.append(time.monotonic())
+        risposta['latenza'] = latenza
+        return risposta
+
+    async def _gestisci_richiesta(self, riga, writer):
+        try:
+            richiesta = json.loads(riga)
+        except ValueError:
+            risposta = {'errore': "Richiesta non in JSON"}
+        else:
+            if isinstance(richiesta, dict):
+                risposta = await self._rispondi(richiesta)
+                risposta['id'] = richiesta.get('id')
+            else:
+                risposta = {'errore': "La richiesta non è un oggetto JSON"}
+        writer.write(json.dumps(risposta).encode() + b"\n")
+
+    async def _gestisci_connessione(self, reader, writer):
+        """Legge le richieste di una connessione e risponde a ognuna appena pronta, anche fuori ordine."""
+        compiti = set()
+        try:
+            while True:
+                riga = await reader.readline()
+                if not riga:
+                    break
+                compito = asyncio.create_task(self._gestisci_richiesta(riga, writer))
+                compiti.add(compito)
+                compito.add_done_callback(compiti.discard)
+            if compiti:
+                await asyncio.gather(*compiti)
+        finally:
+            writer.close()
+
+    def statistiche(self):
+        """
+        Richieste servite, throughput (in totale e negli ultimi 10 secondi), iterazioni medie per
+        mossa (che calano se il server è sovraccarico e le scadenze tagliano le ricerche) e
+        percentili delle latenze in ms.
+        """
+        adesso = time.monotonic()
+        durata = adesso - self.inizio if self.inizio is not None else 0.
+        latenze = sorted(self.latenze)
+        recenti = sum(1 for istante in self.istanti if adesso - istante <= 10)
+        return {
+            'mosse': self.mosse,
+            'errori': self.errori,
+            'sessioni': len(self.sessioni),
+            'lavoratori': self.num_lavoratori,
+            'lotto_medio': self.richieste_in_lotti / self.lotti if self.lotti else 0.,
+            'iterazioni_per_mossa': self.iterazioni / self.mosse if self.mosse else 0.,
+            'mosse_al_secondo': self.mosse / durata if durata else 0.,
+            'mosse_al_secondo_recenti': recenti / min(durata, 10) if durata else 0.,
+            'latenza_p50_ms': percentile(latenze, 0.5) * 1000,
+            'latenza_p90_ms': percentile(latenze, 0.9) * 1000,
+            'latenza_p99_ms': percentile(latenze, 0.99) * 1000,
+            'latenza_massima_ms': (latenze[-1] if latenze else 0.) * 1000
+        }
+
+
+if __name__ == "__main__":
+    percorso = input(f"Inserisci il percorso del socket (invio per {PERCORSO_PREDEFINITO}): ") or PERCORSO_PREDEFINITO
+    lavoratori = input("Inserisci il numero di processi di lavoro (invio per usare tutti i core): ")
+    server = ServerMosse(percorso, int(lavoratori) if lavoratori else None)
+    print(f"Server in ascolto su {percorso}")
+    try:
+        asyncio.run(server.servi(intervallo_statistiche=10))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,2 @@
+from .ServerMosse import ServerMosse, SessioneAgente, PERCORSO_PREDEFINITO
+from .ClientMosse import ClientMosse, serializza_stato, serializza_stato_compatto
@@ -0,0 +1,174 @@
+import os
+import random
+import sys
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from MonteCarloTreeSearch import ArrayMonteCarlo, MonteCarlo, Node
+
+NUM_MOSSE = 3
+
+
+class Cammino:
+    """Gioco senza fine con tre mosse per turno: lo stato è la sequenza delle mosse applicate."""
+
+    def __init__(self):
+        self.mosse = []
+
+    def apply(self, mossa):
+        self.mosse.append(mossa)
+
+    def undo(self, mossa):
+        self.mosse.pop()
+
+    def is_legal(self, mossa):
+        return True
+
+
+def child_finder(node, montecarlo):
+    # Allo stato dei figli muove il giocatore 1 se le mosse applicate sono pari, il 2 se sono dispari
+    giocatore = 1 + (len(montecarlo.state.mosse) + 1) % 2
+    for mossa in range(NUM_MOSSE):
+        node.new_child(mossa, player_number=giocatore)
+
+
+def valore(mosse):
+    # Un valore fisso per ogni stato, diverso tra gli stati, così le due ricerche non hanno pareggi
+    return random.Random(hash(tuple(mosse))).uniform(-1, 1)
+
+
+def node_evaluator(child, montecarlo):
+    return valore(montecarlo.state.mosse)
+
+
+def nuova_ricerca(montecarlo):
+    montecarlo.child_finder = child_finder
+    montecarlo.node_evaluator = node_evaluator
+    return montecarlo
+
+
+class TestArrayTree(unittest.TestCase):
+    """La stessa ricerca con l'albero di Node e con ArrayTree."""
+
+    def setUp(self):
+        radice = Node(None)
+        radice.player_number = 1
+        self.mcts = nuova_ricerca(MonteCarlo(radice, Cammino()))
+        radice = Node(None)
+        radice.player_number = 1
+        self.array = nuova_ricerca(ArrayMonteCarlo(radice, Cammino(), seed=0))
+        self.mcts.simulate(300)
+        self.array.simulate(300)
+
+    def confronta(self, node, tree, index):
+        """Confronta ricorsivamente il sottoalbero di node con quello di index e ne conta i nodi."""
+        self.assertEqual(node.move, tree.moves[index])
+        self.assertEqual(node.visits, tree.visits[index])
+        self.assertEqual(node.win_value, tree.win_value[index])
+        self.assertEqual(bool(node.expanded), bool(tree.expanded[index]))
+        figli = tree.children(index)
+        self.assertEqual(len(node.children), len(figli))
+        return 1 + sum(self.confronta(child, tree, figlio) for child, figlio in zip(node.children, figli))
+
+    def controlla_collegamenti(self, tree):
+        """Liste dei fratelli, genitori e conteggi dei figli coerenti per tutti i nodi."""
+        raggiunti = 1
+        for index in range(tree.size):
+            figli = tree.children(index)
+            self.assertEqual(tree.child_count[index], len(figli))
+            self.assertEqual(tree.first_child[index], figli[0] if figli else -1)
+            self.assertEqual(tree.last_child[index], figli[-1] if figli else -1)
+            for figlio in figli:
+                self.assertEqual(tree.parent[figlio], index)
+                self.assertLess(figlio, tree.size)
+            raggiunti += len(figli)
+        # Ogni nodo allocato è raggiungibile dalla radice
+        self.assertEqual(raggiunti, tree.size)
+
+    def test_stessa_ricerca(self):
+        tree = self.array.tree
+        self.assertEqual(self.confronta(self.mcts.root_node, tree, 0), tree.size)
+        self.assertEqual(self.array.make_choice().move, self.mcts.make_choice().move)
+        self.controlla_collegamenti(tree)
+
+    def test_retropropagazione(self):
+        # Ogni valutazione passa per tutti gli antenati: un nodo espanso ha le visite e il valore
+        # dei figli, più la propria valutazione (la radice non viene valutata)
+        tree = self.array.tree
+        for index in range(1, tree.size):
+            mosse = []
+            antenato = index
+            while antenato > 0:
+                mosse.insert(0, tree.moves[antenato])
+                antenato = tree.parent[antenato]
+            figli = tree.children(index)
+            self.assertEqual(tree.visits[index], 1 + sum(tree.visits[figlio] for figlio in figli))
+            self.assertAlmostEqual(tree.win_value[index] - sum(tree.win_value[figlio] for figlio in figli),
+                                   valore(mosse))
+        self.assertEqual(tree.visits[0], sum(tree.visits[figlio] for figlio in tree.children(0)))
+
+    def test_truncate(self):
+        tree = self.array.tree
+        foglia = next(index for index in range(tree.size) if not tree.child_count[index])
+        dimensione = tree.size
+        fratelli = {index: tree.children(index) for index in range(tree.size)}
+
+        # Figli e nipoti aggiunti in fondo agli array, poi scartati
+        figlio = tree.add_node(foglia, 0)
+        tree.add_node(foglia, 1)
+        tree.add_node(figlio, 2)
+        self.assertEqual(tree.children(foglia), [dimensione, dimensione + 1])
+        tree.truncate(foglia, dimensione)
+
+        self.assertEqual(tree.size, dimensione)
+        self.assertEqual({index: tree.children(index) for index in range(tree.size)}, fratelli)
+        self.controlla_collegamenti(tree)
+        # Gli indici liberati vengono riusati
+        self.assertEqual(tree.add_node(foglia, 0), dimensione)
+
+    def test_reroot(self):
+        node = self.mcts.make_choice()
+        figlio = self.array.make_choice()
+        self.assertEqual(node.move, figlio.move)
+        nodi = self.confronta(node, self.array.tree, figlio.index)
+
+        # Il sottoalbero diventa la radice, con gli indici rinumerati in ampiezza
+        self.mcts.state.apply(node.move)
+        node.parent = None
+        self.mcts.root_node = node
+        self.array.state.apply(figlio.move)
+        self.assertEqual(self.array.reroot(figlio, self.array.state), node.visits)
+        tree = self.array.tree
+        self.assertEqual(tree.size, nodi)
+        self.assertEqual(tree.parent[0], -1)
+        self.assertEqual(self.confronta(node, tree, 0), nodi)
+        self.controlla_collegamenti(tree)
+        ordine = [0]
+        for index in ordine:
+            ordine.extend(tree.children(index))
+        self.assertEqual(ordine, list(range(tree.size)))
+
+        # La ricerca prosegue allo stesso modo sui due alberi
+        self.mcts.simulate(200)
+        self.array.simulate(200)
+        self.assertEqual(self.confronta(self.mcts.root_node, tree, 0), tree.size)
+        self.controlla_collegamenti(tree)
+
+
+class TestNode(unittest.TestCase):
+    """Scelta del figlio da esplorare nell'albero di Node."""
+
+    def test_pareggio(self):
+        # A parità di punteggio vince il primo figlio, senza usare il generatore globale
+        radice = Node(None)
+        radice.player_number = 1
+        for mossa in range(NUM_MOSSE):
+            radice.new_child(mossa, player_number=2).update_win_value(0.5)
+        stato = random.getstate()
+        self.assertIs(radice.get_preferred_child(radice), radice.children[0])
+        self.assertEqual(random.getstate(), stato)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from Agent import CacheDecisioni
+from GameEngine import Simmetria
+
+
+class TestCacheDecisioni(unittest.TestCase):
+    """Scarto delle posizioni usate meno di recente, con più connessioni allo stesso file."""
+
+    def setUp(self):
+        self.cartella = tempfile.TemporaryDirectory()
+        self.percorso = os.path.join(self.cartella.name, "decisioni.sqlite")
+
+    def tearDown(self):
+        self.cartella.cleanup()
+
+    def salva(self, cache, chiave):
+        cache.salva(chiave, Simmetria.IDENTITA, [((0, 0), 10, 1.5)])
+
+    def test_lru_tra_connessioni(self):
+        # Come due processi che aprono il file insieme, prima che ci sia scritto qualcosa
+        prima = CacheDecisioni(self.percorso)
+        seconda = CacheDecisioni(self.percorso, capacita=2)
+
+        self.salva(prima, b"a")
+        self.salva(prima, b"b")
+        self.assertEqual(prima.cerca(b"a", Simmetria.IDENTITA), [((0, 0), 10, 1.5)])
+
+        # Le posizioni salvate dalla seconda connessione sono più recenti di quelle della prima:
+        # superata la capacità si scartano b, a e c, in quest'ordine
+        for chiave in (b"c", b"d", b"e"):
+            self.salva(seconda, chiave)
+        self.assertEqual(len(seconda), 2)
+        self.assertEqual(seconda.scartate, 3)
+        for chiave in (b"a", b"b", b"c"):
+            self.assertIsNone(prima.cerca(chiave, Simmetria.IDENTITA))
+        for chiave in (b"d", b"e"):
+            self.assertIsNotNone(prima.cerca(chiave, Simmetria.IDENTITA))
+
+        prima.close()
+        seconda.close()
+
+    def test_permutazione(self):
+        cache = CacheDecisioni(self.percorso)
+        permutazione = (0, 3, 2, 1)
+        # Asso di bastoni che prende l'asso di coppe, salvato in forma canonica
+        cache.salva(b"k", permutazione, [((10, 1), 4, -2.)])
+        self.assertEqual(cache.cerca(b"k", permutazione), [((10, 1), 4, -2.)])
+        self.assertEqual(cache.cerca(b"k", Simmetria.IDENTITA), [((30, 1), 4, -2.)])
+        self.assertEqual(cache.statistiche()['trovate'], 2)
+        cache.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import os
+import random
+import sys
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from Agent import ScopaGameState
+from GameEngine import StatoCompatto
+
+
+def fotografia(stato_gioco):
+    """Tutto quello che apply cambia e undo deve ripristinare."""
+    return stato_gioco.stato.istantanea(), stato_gioco.last_move, stato_gioco.giocate
+
+
+class TestApplyUndo(unittest.TestCase):
+    """ScopaGameState.apply seguito da undo riporta lo stato esattamente com'era."""
+
+    def test_round_interi(self):
+        rng = random.Random(5)
+        ridistribuzioni = 0
+        for seme in range(100):
+            stato_gioco = ScopaGameState.da_stato_compatto(StatoCompatto.nuovo_round(seme % 2, random.Random(seme)))
+            stato_gioco.determinizza(rng)
+
+            # Un round intero di mosse casuali, fino all'ultima carta (con le ridistribuzioni e
+            # le carte rimaste assegnate a fine mazzo)
+            fotografie, mosse = [], []
+            while not stato_gioco.stato.terminato:
+                mossa = rng.choice(stato_gioco.get_possible_moves())
+                fotografie.append(fotografia(stato_gioco))
+                mosse.append(mossa)
+                mazzo = stato_gioco.stato.mazzo
+                atteso = stato_gioco.move(mossa)
+                stato_gioco.apply(mossa)
+                ridistribuzioni += stato_gioco.stato.mazzo != mazzo
+                self.assertEqual(fotografia(stato_gioco), fotografia(atteso))
+
+            while mosse:
+                stato_gioco.undo(mosse.pop())
+                self.assertEqual(fotografia(stato_gioco), fotografie.pop())
+            self.assertEqual(stato_gioco._storia, [])
+
+        self.assertGreater(ridistribuzioni, 0)
+
+    def test_undo_dopo_ridistribuzione(self):
+        # L'ultima carta della mano fa ridistribuire: undo rimette le carte nel mazzo
+        stato_gioco = ScopaGameState.da_stato_compatto(StatoCompatto.nuovo_round(0, random.Random(1)))
+        stato_gioco.determinizza(random.Random(2))
+        for _ in range(5):
+            stato_gioco.apply(stato_gioco.get_possible_moves()[0])
+        prima = fotografia(stato_gioco)
+        mossa = stato_gioco.get_possible_moves()[0]
+
+        stato_gioco.apply(mossa)
+        self.assertEqual(len(stato_gioco.stato.ordine_mazzo), len(prima[0][5]) - 6)
+        stato_gioco.undo(mossa)
+        self.assertEqual(fotografia(stato_gioco), prima)
+
+
+if __name__ == '__main__':
+    unittest.main()
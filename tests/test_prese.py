@@ -0,0 +1,61 @@
+import os
+import random
+import sys
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from GameEngine import Giocatore, Maschera
+from GameEngine.Prese import prese_tavolo
+
+
+def prese_ricorsive(giocatore, carta_giocata, carte_tavolo):
+    """
+    Prese possibili calcolate con la ricerca ricorsiva originale (Giocatore.trova_combinazioni),
+    come faceva Giocatore.cerca_prese_possibili prima dell'indice delle prese.
+    """
+    prese_possibili = [[carta] for carta in carte_tavolo if carta.valore == carta_giocata.valore]
+
+    # Le combinazioni di somme si cercano solo se non ci sono prese dirette
+    if not prese_possibili:
+        tutte_combinazioni = []
+        giocatore.trova_combinazioni(carta_giocata.valore, carte_tavolo, [], tutte_combinazioni)
+        for combo in tutte_combinazioni:
+            if combo not in prese_possibili and len(combo) > 1:
+                prese_possibili.append(combo)
+
+    return prese_possibili
+
+
+class TestPrese(unittest.TestCase):
+    """Confronto tra la ricerca ricorsiva delle prese e l'indice di GameEngine.Prese su tavoli casuali."""
+
+    def setUp(self):
+        self.giocatore = Giocatore()
+        self.rng = random.Random(2024)
+
+    def tavoli_casuali(self, numero):
+        for _ in range(numero):
+            tavolo = self.rng.sample(Maschera.CARTE, self.rng.randint(0, 12))
+            carte_giocate = [carta for carta in Maschera.CARTE if carta not in tavolo]
+            yield tavolo, self.rng.sample(carte_giocate, 4)
+
+    def test_cerca_prese_possibili(self):
+        for tavolo, carte_giocate in self.tavoli_casuali(2000):
+            for carta in carte_giocate:
+                attese = prese_ricorsive(self.giocatore, carta, tavolo)
+                self.assertEqual(self.giocatore.cerca_prese_possibili(carta, tavolo), attese,
+                                 (carta, [str(c) for c in tavolo]))
+
+    def test_prese_tavolo(self):
+        for tavolo, carte_giocate in self.tavoli_casuali(2000):
+            # Le maschere elencano le carte in ordine di indice
+            ordinato = sorted(tavolo, key=lambda carta: carta.indice)
+            prese = prese_tavolo(Maschera.da_carte(tavolo))
+            for carta in carte_giocate:
+                attese = [Maschera.da_carte(presa) for presa in prese_ricorsive(self.giocatore, carta, ordinato)]
+                self.assertEqual(list(prese[carta.valore]), attese, (carta, [str(c) for c in ordinato]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import os
+import random
+import sys
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from GameEngine import Giocatore, Maschera, Punteggio
+
+
+class TestPunteggioLotto(unittest.TestCase):
+    """Confronto tra Punteggio.calcola_punteggio_round_lotto e calcola_punteggio_round su round casuali."""
+
+    def setUp(self):
+        self.rng = random.Random(2025)
+
+    def round_casuali(self, numero):
+        # Le 40 carte divise tra i due giocatori, più qualche carta rimasta fuori (round non
+        # finiti, per coprire anche raccolte con meno carte), e le scope di ciascuno
+        raccolte, raccolte_avv, scope, scope_avv = [], [], [], []
+        for _ in range(numero):
+            carte = list(range(Maschera.NUM_CARTE))
+            self.rng.shuffle(carte)
+            taglio = self.rng.randint(0, Maschera.NUM_CARTE)
+            fine = self.rng.randint(taglio, Maschera.NUM_CARTE)
+            raccolte.append(sum(1 << i for i in carte[:taglio]))
+            raccolte_avv.append(sum(1 << i for i in carte[taglio:fine]))
+            scope.append(self.rng.randint(0, 4))
+            scope_avv.append(self.rng.randint(0, 4))
+        return raccolte, raccolte_avv, scope, scope_avv
+
+    def riferimento(self, raccolte, raccolte_avv, scope):
+        giocatore, avversario = Giocatore(), Giocatore()
+        giocatore.carte_raccolte = Maschera.carte(raccolte)
+        avversario.carte_raccolte = Maschera.carte(raccolte_avv)
+        giocatore.scope = scope
+        return Punteggio().calcola_punteggio_round(giocatore, avversario)[1]
+
+    def confronta(self, lotto, raccolte, raccolte_avv, scope):
+        for i in range(len(raccolte)):
+            dettagli = self.riferimento(raccolte[i], raccolte_avv[i], scope[i])
+            for categoria, valori in lotto.items():
+                self.assertEqual(valori[i], dettagli[categoria], (categoria, raccolte[i], raccolte_avv[i]))
+
+    def test_maschere(self):
+        raccolte, raccolte_avv, scope, scope_avv = self.round_casuali(3000)
+        punteggio = Punteggio()
+        self.confronta(punteggio.calcola_punteggio_round_lotto(raccolte, raccolte_avv, scope),
+                       raccolte, raccolte_avv, scope)
+        self.confronta(punteggio.calcola_punteggio_round_lotto(raccolte_avv, raccolte, scope_avv),
+                       raccolte_avv, raccolte, scope_avv)
+
+    def test_conteggi(self):
+        # Sequenze di 40 conteggi per carta, in liste e in tuple
+        raccolte, raccolte_avv, scope, _ = self.round_casuali(500)
+        conteggi = [[maschera >> i & 1 for i in range(Maschera.NUM_CARTE)] for maschera in raccolte]
+        conteggi_avv = [tuple(maschera >> i & 1 for i in range(Maschera.NUM_CARTE)) for maschera in raccolte_avv]
+        self.confronta(Punteggio().calcola_punteggio_round_lotto(conteggi, conteggi_avv, scope),
+                       raccolte, raccolte_avv, scope)
+
+    def test_interi_non_int(self):
+        # Gli interi che non sono int (come bool) sono maschere, non sequenze di conteggi
+        lotto = Punteggio().calcola_punteggio_round_lotto([True], [False], [0])
+        self.assertEqual(lotto['carte_giocatore'], [1])
+        # Carte e primiera (l'asso di coppe)
+        self.assertEqual(lotto['totale'], [2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,172 @@
+import os
+import random
+import sys
+import tempfile
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from GameEngine import Maschera, Partita, StatoCompatto
+from GameEngine.RegistroPartite import (ESTENSIONE_INDICE, INTESTAZIONE, LettoreRegistro, RegistratorePartita,
+                                        ScrittoreRegistro, _decodifica_round, codifica_round)
+
+
+def agente_casuale(rng):
+    """Agente che gioca una carta a caso e, se può prendere, l'ultima delle prese possibili."""
+    def agente(giocatore, avversario, tavolo):
+        carta = rng.choice(giocatore.carte_mano)
+        prese = giocatore.cerca_prese_possibili(carta, tavolo.carte)
+        return (carta, prese[-1]) if prese else carta
+    return agente
+
+
+def gioca_partite(numero, seme=0):
+    """Record di partite complete tra due agenti casuali."""
+    record = []
+    for n in range(numero):
+        rng = random.Random(seme + n)
+        partita = Partita([agente_casuale(rng), agente_casuale(rng)], seme + n, turno_iniziale=n % 2)
+        registratore = RegistratorePartita(partita, n)
+        partita.gioca()
+        record.append((partita, registratore))
+    return record
+
+
+class TestCodificaRound(unittest.TestCase):
+    """Un round codificato con codifica_round e decodificato rigiocandolo restituisce le stesse mosse."""
+
+    def test_round_casuali(self):
+        rng = random.Random(3)
+        posizioni_oltre_la_terza = 0
+        for seme in range(200):
+            ordine = list(range(Maschera.NUM_CARTE))
+            random.Random(seme).shuffle(ordine)
+            stato = StatoCompatto.da_ordine_mazzo(ordine, seme % 2)
+            mosse = []
+            while not stato.terminato:
+                carta, presa = mossa = rng.choice(stato.mosse())
+                if presa and stato.prese_possibili(carta).index(presa) >= 2:
+                    posizioni_oltre_la_terza += 1
+                mosse.append(mossa)
+                stato.gioca(*mossa)
+            dettagli = ({'carte_giocatore': 20, 'denari': 6, 'settebello': 1, 'scope': 2, 'punteggio_primiera': 78},
+                        {'carte_giocatore': 20, 'denari': 4, 'settebello': 0, 'scope': 0, 'punteggio_primiera': 70})
+
+            dati = codifica_round(ordine, seme % 2, mosse, dettagli)
+            round_registrato, fine = _decodifica_round(dati, 0, seme % 2)
+            self.assertEqual(fine, len(dati))
+            self.assertEqual(round_registrato.mosse, mosse)
+            self.assertEqual(round_registrato.stato().istantanea(), stato.istantanea())
+            for originali, decodificati in zip(dettagli, round_registrato.dettagli):
+                for chiave, valore in originali.items():
+                    self.assertEqual(decodificati[chiave], valore)
+
+        # Le prese dalla terza posizione in poi usano il byte aggiuntivo
+        self.assertGreater(posizioni_oltre_la_terza, 0)
+
+    def test_presa_non_valida(self):
+        ordine = list(range(Maschera.NUM_CARTE))
+        stato = StatoCompatto.da_ordine_mazzo(ordine)
+        carta = Maschera.indici(stato.mani[0])[0]
+        # Una presa di carte che non sono sul tavolo
+        with self.assertRaises(ValueError):
+            codifica_round(ordine, 0, [(carta, stato.mani[1])], ({}, {}))
+
+
+class TestRegistro(unittest.TestCase):
+    """Scrittura e lettura del file del registro e del suo indice."""
+
+    def setUp(self):
+        self.cartella = tempfile.TemporaryDirectory()
+        self.percorso = os.path.join(self.cartella.name, "partite.scpr")
+        self.partite = gioca_partite(4)
+
+    def tearDown(self):
+        self.cartella.cleanup()
+
+    def scrivi(self, partite):
+        with ScrittoreRegistro(self.percorso) as scrittore:
+            for _, registratore in partite:
+                scrittore.aggiungi(registratore.codifica())
+            scrittore.flush()
+
+    def controlla(self, lettore, partite):
+        self.assertEqual(len(lettore), len(partite))
+        self.assertEqual(lettore.numeri(), [registratore.numero for _, registratore in partite])
+        for record, (partita, registratore) in zip(lettore, partite):
+            self.assertEqual(record.seme, partita.seme)
+            self.assertEqual(record.punti, tuple(p.punteggio_totale for p in partita.punteggi))
+            self.assertEqual(len(record.round), len(registratore.round))
+            for round_registrato, (ordine, mosse, dettagli) in zip(record.round, registratore.round):
+                self.assertEqual(list(round_registrato.ordine_mazzo), ordine)
+                self.assertEqual(round_registrato.mosse, mosse)
+                self.assertEqual(round_registrato.dettagli, tuple({k: v for k, v in d.items()
+                                                                   if not k.startswith('dettagli')}
+                                                                  for d in dettagli))
+                # Rigiocato fino in fondo, il round dà le carte raccolte dei dettagli
+                stato = round_registrato.stato()
+                self.assertTrue(stato.terminato)
+                self.assertEqual([Maschera.conta(r) for r in stato.raccolte],
+                                 [d['carte_giocatore'] for d in dettagli])
+
+    def test_scrittura_e_lettura(self):
+        self.scrivi(self.partite)
+        with LettoreRegistro(self.percorso) as lettore:
+            self.controlla(lettore, self.partite)
+
+    def test_coda_troncata(self):
+        self.scrivi(self.partite[:3])
+        dimensione = os.path.getsize(self.percorso)
+        with LettoreRegistro(self.percorso) as lettore:
+            inizio_terza = lettore._offset(2)
+
+        # Un'interruzione a metà del terzo record, con l'indice già aggiornato
+        with open(self.percorso, "r+b") as f:
+            f.truncate((inizio_terza + dimensione) // 2)
+        with LettoreRegistro(self.percorso) as lettore:
+            self.controlla(lettore, self.partite[:2])
+
+        # Riaprendo il registro la coda viene eliminata e si riprende a scrivere dopo il secondo
+        self.scrivi(self.partite[3:])
+        self.assertEqual(os.path.getsize(self.percorso + ESTENSIONE_INDICE), 3 * 8)
+        with LettoreRegistro(self.percorso) as lettore:
+            self.controlla(lettore, self.partite[:2] + self.partite[3:])
+
+    def test_solo_intestazione_troncata(self):
+        # Un record di cui è stata scritta solo una parte della lunghezza
+        self.scrivi(self.partite[:1])
+        with open(self.percorso, "ab") as f:
+            f.write(b"\x07\x00")
+        self.scrivi(self.partite[1:2])
+        with LettoreRegistro(self.percorso) as lettore:
+            self.controlla(lettore, self.partite[:2])
+
+    def test_indice_mancante(self):
+        self.scrivi(self.partite)
+        with open(self.percorso + ESTENSIONE_INDICE, "rb") as f:
+            indice = f.read()
+        os.remove(self.percorso + ESTENSIONE_INDICE)
+
+        # Il lettore scorre il file, lo scrittore ricostruisce l'indice
+        with LettoreRegistro(self.percorso) as lettore:
+            self.assertIsNone(lettore.indice)
+            self.controlla(lettore, self.partite)
+        with ScrittoreRegistro(self.percorso) as scrittore:
+            self.assertEqual(scrittore.partite, len(self.partite))
+        with open(self.percorso + ESTENSIONE_INDICE, "rb") as f:
+            self.assertEqual(f.read(), indice)
+        with LettoreRegistro(self.percorso) as lettore:
+            self.assertIsNotNone(lettore.indice)
+            self.controlla(lettore, self.partite)
+
+    def test_file_non_registro(self):
+        with open(self.percorso, "wb") as f:
+            f.write(b"altro" + INTESTAZIONE)
+        with self.assertRaises(ValueError):
+            ScrittoreRegistro(self.percorso)
+        with self.assertRaises(ValueError):
+            LettoreRegistro(self.percorso)
+
+
+if __name__ == '__main__':
+    unittest.main()
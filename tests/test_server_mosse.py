@@ -0,0 +1,60 @@
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from GameEngine import StatoCompatto
+from Server import ClientMosse, ServerMosse, serializza_stato_compatto
+
+
+class TestServerMosse(unittest.IsolatedAsyncioTestCase):
+    """Richieste al server con un solo processo di lavoro e ricerche brevi."""
+
+    async def asyncSetUp(self):
+        self.cartella = tempfile.TemporaryDirectory()
+        self.server = ServerMosse(os.path.join(self.cartella.name, "mosse.sock"), lavoratori=1, iterazioni=20)
+        await self.server.avvia()
+        self.client = await ClientMosse(self.server.indirizzo).connetti()
+        self.stato = serializza_stato_compatto(StatoCompatto.nuovo_round(0, random.Random(0)))
+
+    async def asyncTearDown(self):
+        await self.client.chiudi()
+        await self.server.chiudi()
+        self.cartella.cleanup()
+
+    async def test_mossa(self):
+        carta, presa = await self.client.scegli_mossa('partita', self.stato)
+        self.assertTrue(self.stato['mano'] >> carta & 1)
+        self.assertEqual(presa & ~self.stato['tavolo'], 0)
+
+    async def test_richiesta_non_oggetto(self):
+        # Righe JSON valide che non sono oggetti ricevono un errore, senza fermare la connessione
+        reader, writer = await asyncio.open_unix_connection(self.server.indirizzo)
+        for riga in (b"[]\n", b"3\n", b'"mossa"\n', b"non json\n"):
+            writer.write(riga)
+        writer.write(json.dumps({'tipo': 'statistiche', 'id': 1}).encode() + b"\n")
+        risposte = [json.loads(await asyncio.wait_for(reader.readline(), 5)) for _ in range(5)]
+        writer.close()
+        await writer.wait_closed()
+        self.assertEqual(sum('errore' in risposta for risposta in risposte), 4)
+        self.assertIn(1, [risposta.get('id') for risposta in risposte])
+
+    async def test_processo_di_lavoro_terminato(self):
+        await self.client.scegli_mossa('partita', self.stato)
+        self.server.processi[0].kill()
+        self.server.processi[0].join()
+
+        # Le richieste inviate dopo ricevono un errore invece di restare in attesa
+        risposte = await asyncio.wait_for(asyncio.gather(
+            *(self.client.richiesta(tipo='mossa', sessione=f'partita {i}', stato=self.stato) for i in range(5))), 10)
+        self.assertTrue(all('errore' in risposta for risposta in risposte))
+        self.assertEqual(self.server.statistiche()['errori'], 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
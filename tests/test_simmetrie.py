@@ -0,0 +1,51 @@
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from Agent import AgenteMonteCarlo, ScopaGameState
+from GameEngine import Carta, Giocatore, Maschera, StatoCompatto
+
+
+def maschera(*carte):
+    return Maschera.da_carte([Carta(seme, valore) for seme, valore in carte])
+
+
+class TestSimmetrie(unittest.TestCase):
+    """Figli aggiunti da AgenteMonteCarlo.child_finder con configurazione.simmetrie."""
+
+    def setUp(self):
+        self.agente = AgenteMonteCarlo(Giocatore(), simmetrie=True)
+
+    def ricerca(self, mano, tavolo):
+        stato = ScopaGameState.da_stato_compatto(StatoCompatto(mani=(mano, 0), tavolo=tavolo),
+                                                 self.agente.configurazione)
+        mcts = self.agente._nuova_ricerca(stato, seme=0)
+        mcts.child_limit = None
+        return mcts
+
+    def test_mossa_equivalente_aggiunta_una_volta(self):
+        # Con Coppe e Spade scambiabili il 5 di denari prende 2+3 in quattro modi, due per classe
+        mcts = self.ricerca(maschera(('Denari', 5), ('Denari', 9)),
+                            maschera(('Coppe', 2), ('Coppe', 3), ('Spade', 2), ('Spade', 3)))
+        self.agente.child_finder(mcts.root_node, mcts)
+        mosse = mcts.root_node.child_moves
+        self.assertEqual(len([mossa for mossa in mosse if mossa[0] == Carta('Denari', 5).indice]), 2)
+
+    def test_nessun_figlio_ripetuto_quando_la_simmetria_cade(self):
+        mcts = self.ricerca(maschera(('Denari', 5), ('Denari', 9)),
+                            maschera(('Coppe', 2), ('Coppe', 3), ('Spade', 2), ('Spade', 3)))
+        self.agente.child_finder(mcts.root_node, mcts)
+
+        # In un'altra determinizzazione chi muove ha anche l'asso di coppe: la mano non è più
+        # simmetrica e le mosse del 5 di denari tolte prima vanno aggiunte, senza ripetere le altre
+        mcts.state.stato.mani[0] |= maschera(('Coppe', 1))
+        self.agente.child_finder(mcts.root_node, mcts)
+        mosse = mcts.root_node.child_moves
+        self.assertEqual(len(mosse), len(set(mosse)))
+        self.assertEqual(set(mosse), set(mcts.state.get_possible_moves()))
+
+
+if __name__ == '__main__':
+    unittest.main()
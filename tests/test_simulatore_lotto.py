@@ -0,0 +1,84 @@
+import os
+import random
+import sys
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from Agent import ScopaGameState
+from Agent.SimulatoreLotto import SimulatoreLotto, crea_politica_avida, politica_casuale
+from GameEngine import Giocatore, Maschera, Punteggio, StatoCompatto
+
+
+def punti_round(stato):
+    """Punti del round finito dello StatoCompatto, calcolati da Punteggio.calcola_punteggio_round."""
+    giocatori = []
+    for g in (0, 1):
+        giocatore = Giocatore()
+        giocatore.carte_raccolte = Maschera.carte(stato.raccolte[g])
+        giocatore.scope = stato.scope[g]
+        giocatori.append(giocatore)
+    return (Punteggio().calcola_punteggio_round(giocatori[0], giocatori[1])[0],
+            Punteggio().calcola_punteggio_round(giocatori[1], giocatori[0])[0])
+
+
+class TestSimulatoreLotto(unittest.TestCase):
+    """Round giocati dal SimulatoreLotto confrontati con gli stessi round giocati con StatoCompatto."""
+
+    NUM_ROUND = 200
+
+    def ordini(self, seme):
+        rng = random.Random(seme)
+        ordini = []
+        for _ in range(self.NUM_ROUND):
+            ordine = list(range(Maschera.NUM_CARTE))
+            rng.shuffle(ordine)
+            ordini.append(ordine)
+        return ordini
+
+    def confronta(self, simulatore, stati):
+        punti = simulatore.punteggi()
+        for i, stato in enumerate(stati):
+            self.assertTrue(stato.terminato)
+            self.assertEqual((simulatore.raccolte[0][i], simulatore.raccolte[1][i]), tuple(stato.raccolte))
+            self.assertEqual((simulatore.scope[0][i], simulatore.scope[1][i]), tuple(stato.scope))
+            self.assertEqual((punti[0][i], punti[1][i]), punti_round(stato))
+
+    def test_politica_avida(self):
+        # La politica avida gioca la prima mossa di ScopaGameState.get_possible_moves
+        ordini = self.ordini(1)
+        turni = [i % 2 for i in range(self.NUM_ROUND)]
+        avida = crea_politica_avida()
+        simulatore = SimulatoreLotto(self.NUM_ROUND, turni, random.Random(0), ordini)
+        simulatore.gioca_round((avida, avida))
+
+        stati = []
+        for ordine, turno in zip(ordini, turni):
+            stato = StatoCompatto.da_ordine_mazzo(ordine, turno)
+            stato_gioco = ScopaGameState.da_stato_compatto(stato)
+            stato_gioco.stato = stato
+            while not stato.terminato:
+                stato.gioca(*stato_gioco.get_possible_moves()[0])
+            stati.append(stato)
+        self.confronta(simulatore, stati)
+
+    def test_politica_casuale(self):
+        # Le stesse mosse casuali, scelte con un generatore con lo stesso seme nello stesso ordine
+        # (una mossa per round a ogni passo), devono essere legali e dare lo stesso round
+        ordini = self.ordini(2)
+        simulatore = SimulatoreLotto(self.NUM_ROUND, 0, random.Random(3), ordini)
+        simulatore.gioca_round((politica_casuale, politica_casuale))
+
+        rng = random.Random(3)
+        stati = [StatoCompatto.da_ordine_mazzo(ordine) for ordine in ordini]
+        while not stati[0].terminato:
+            for stato in stati:
+                g = stato.turno
+                mossa = politica_casuale(stato.mani[g], stato.tavolo, stato.raccolte[1 - g], rng)
+                self.assertIn(mossa, stato.mosse())
+                stato.gioca(*mossa)
+        self.confronta(simulatore, stati)
+
+
+if __name__ == '__main__':
+    unittest.main()
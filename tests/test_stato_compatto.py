@@ -0,0 +1,101 @@
+import os
+import random
+import sys
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from GameEngine import Giocatore, Maschera, Mazzo, StatoCompatto, Tavolo
+
+
+class RoundListe:
+    """Round giocato con le liste di carte di Giocatore, Tavolo e Mazzo, come in Partita.gioca_round."""
+
+    def __init__(self, mazzo, turno):
+        self.mazzo = mazzo
+        self.tavolo = Tavolo()
+        self.giocatori = [Giocatore(), Giocatore()]
+        self.turno = turno
+        self.ultimo_presa = None
+        for _ in range(4):
+            self.tavolo.aggiungi_carta_da_mazzo(self.mazzo.carte[0], self.mazzo)
+        self.distribuisci()
+
+    def distribuisci(self):
+        for giocatore in self.giocatori:
+            for _ in range(3):
+                if self.mazzo.carte:
+                    giocatore.aggiungi_mano(self.mazzo.carte[0], self.mazzo)
+
+    def mosse(self):
+        """Mosse del giocatore di turno come (indice carta, maschera presa)."""
+        mosse = []
+        for carta in self.giocatori[self.turno].carte_mano:
+            prese = self.giocatori[self.turno].cerca_prese_possibili(carta, self.tavolo.carte)
+            mosse.extend((carta.indice, Maschera.da_carte(presa)) for presa in prese)
+            if not prese:
+                mosse.append((carta.indice, 0))
+        return mosse
+
+    def gioca(self, indice, presa):
+        giocatore = self.giocatori[self.turno]
+        carta = Maschera.CARTE[indice]
+        scopa = False
+        if presa:
+            carte_prese = [c for c in self.tavolo.carte if c.bit & presa]
+            scopa = giocatore.raccogli_carte(carta, carte_prese, self.tavolo)
+            self.ultimo_presa = self.turno
+        else:
+            self.tavolo.aggiungi_carta_da_giocatore(carta)
+        giocatore.carte_mano.remove(carta)
+        self.turno = 1 - self.turno
+
+        if not any(g.carte_mano for g in self.giocatori):
+            if self.mazzo.carte:
+                self.distribuisci()
+            elif self.ultimo_presa is not None:
+                # Le carte rimaste sul tavolo vanno all'ultimo giocatore che ha fatto una presa
+                for c in self.tavolo.carte[:]:
+                    self.giocatori[self.ultimo_presa].carte_raccolte.append(c)
+                    self.tavolo.elimina_carta(c)
+        return scopa
+
+
+class TestStatoCompatto(unittest.TestCase):
+    """Round casuali giocati in parallelo con StatoCompatto e con il motore a liste."""
+
+    def confronta(self, stato, riferimento):
+        atteso = StatoCompatto.da_partita(riferimento.giocatori, riferimento.tavolo, riferimento.mazzo,
+                                          riferimento.turno, riferimento.ultimo_presa)
+        self.assertEqual(stato.istantanea(), atteso.istantanea())
+
+    def test_round_casuali(self):
+        rng = random.Random(11)
+        scope = 0
+        for seme in range(300):
+            mazzo = Mazzo(random.Random(seme))
+            stato = StatoCompatto.da_ordine_mazzo([carta.indice for carta in mazzo.carte], seme % 2)
+            riferimento = RoundListe(mazzo, seme % 2)
+            self.confronta(stato, riferimento)
+
+            while not stato.terminato:
+                mosse = stato.mosse()
+                # Le liste tengono le carte nell'ordine di arrivo, le maschere in ordine di indice
+                self.assertEqual(sorted(mosse), sorted(riferimento.mosse()))
+                mossa = rng.choice(mosse)
+                scopa = stato.gioca(*mossa)
+                self.assertEqual(scopa, riferimento.gioca(*mossa))
+                scope += scopa
+                self.confronta(stato, riferimento)
+
+            # A fine round tutte le 40 carte sono state raccolte, se qualcuno ha preso
+            if stato.ultimo_presa is not None:
+                self.assertEqual(stato.raccolte[0] | stato.raccolte[1], Maschera.TUTTE)
+                self.assertEqual(stato.tavolo, 0)
+
+        # Le mosse casuali fanno anche qualche scopa
+        self.assertGreater(scope, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from Evaluation import ValutationGame
+from Evaluation.ValutationGame import gioca_partita, leggi_partite, tronca_riga_incompleta
+from GameEngine.RegistroPartite import LettoreRegistro
+
+NUM_PARTITE = 4
+SEME = 7
+
+
+def gioca_partita_rapida(partita, seme, parametri=None, registra=False):
+    """gioca_partita con agenti da poche iterazioni, per tenere brevi le valutazioni dei test."""
+    return gioca_partita(partita, seme, ({'iterazioni': 20}, {'iterazioni': 20}), registra)
+
+
+def senza_tempi(risultato):
+    """Record di una partita senza i tempi misurati, che cambiano da un'esecuzione all'altra."""
+    risultato = dict(risultato)
+    del risultato['tempo']
+    risultato['contatori'] = {chiave: valore for chiave, valore in risultato['contatori'].items()
+                              if not chiave.startswith('tempo')}
+    return risultato
+
+
+class TestValutationGame(unittest.TestCase):
+    """Valutazioni di poche partite brevi, distribuite tra processi e riprese da un file interrotto."""
+
+    def setUp(self):
+        # Il report viene scritto in reports/ nella cartella corrente
+        self.cartella = tempfile.TemporaryDirectory()
+        self.cartella_iniziale = os.getcwd()
+        os.chdir(self.cartella.name)
+        patch = mock.patch.object(ValutationGame, 'gioca_partita', gioca_partita_rapida)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        os.chdir(self.cartella_iniziale)
+        self.cartella.cleanup()
+
+    def valuta(self, nome, processi=1, seme=SEME, registro=None):
+        with mock.patch('builtins.print'):
+            ValutationGame.main(NUM_PARTITE, processi, seme, nome, dimensione_blocco=2, percorso_registro=registro)
+        return list(leggi_partite(nome))
+
+    def test_processi(self):
+        # Ogni partita ha il suo seme: con uno o più processi le partite sono le stesse, nello stesso ordine
+        seriale = self.valuta("seriale.jsonl")
+        parallela = self.valuta("parallela.jsonl", processi=3)
+        self.assertEqual([r['partita'] for r in seriale], list(range(NUM_PARTITE)))
+        self.assertEqual([senza_tempi(r) for r in parallela], [senza_tempi(r) for r in seriale])
+
+    def test_ripresa(self):
+        completa = self.valuta("completa.jsonl", registro="completa.scpr")
+
+        # Un'interruzione a metà della scrittura della terza partita (già aggiunta al registro)
+        with open("completa.jsonl", "rb") as f:
+            righe = f.readlines()
+        with open("interrotta.jsonl", "wb") as f:
+            f.write(b"".join(righe[:2]) + righe[2][:len(righe[2]) // 2])
+        self.assertEqual(len(list(leggi_partite("interrotta.jsonl"))), 2)
+
+        # Senza seme viene letto dal file; le partite mancanti vengono giocate una volta sola
+        ripresa = self.valuta("interrotta.jsonl", seme=None, registro="completa.scpr")
+        self.assertEqual([senza_tempi(r) for r in ripresa], [senza_tempi(r) for r in completa])
+        with open("interrotta.jsonl") as f:
+            self.assertEqual([json.loads(riga)['partita'] for riga in f], list(range(NUM_PARTITE)))
+        with LettoreRegistro("completa.scpr") as lettore:
+            self.assertEqual(lettore.numeri(), list(range(NUM_PARTITE)))
+
+    def test_tronca_riga_incompleta(self):
+        with open("partite.jsonl", "w") as f:
+            f.write('{"partita": 0}\n{"partita": 1}\n{"parti')
+        tronca_riga_incompleta("partite.jsonl")
+        with open("partite.jsonl") as f:
+            self.assertEqual(f.read(), '{"partita": 0}\n{"partita": 1}\n')
+        # Un file completo o mancante resta com'è
+        tronca_riga_incompleta("partite.jsonl")
+        tronca_riga_incompleta("mancante.jsonl")
+        self.assertEqual(list(leggi_partite("partite.jsonl")), [{"partita": 0}, {"partita": 1}])
+        self.assertFalse(os.path.exists("mancante.jsonl"))
+
+    def test_seme_diverso(self):
+        self.valuta("partite.jsonl")
+        with self.assertRaises(ValueError):
+            self.valuta("partite.jsonl", seme=SEME + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()